@@ -0,0 +1,449 @@
+"""Headless batch ranking over a resume folder.
+
+Example:
+    python -m app.cli resumes/ --jd job.txt --output results.csv \
+        --weights skills_match=35,experience=25,education=20,certifications=10,location=10
+
+Rows are written as each resume finishes, so an interrupted run can be
+continued with ``--resume-from results.csv`` (or by passing the same
+``--run-id`` again). Resumes whose evaluation failed are not written, so
+the continued run retries them.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+import pandas as pd
+from .config.settings import Settings
+from .services.ranking_service import RankingService
+
+OUTPUT_FORMATS = ("csv", "jsonl", "parquet")
+
+# Columns written per streamed row; Rank is only known once the run is complete
+STREAM_COLUMNS = [column for column in RankingService.RESULT_COLUMNS if column != 'Rank']
+NUMERIC_COLUMNS = ['total_score', *Settings.SCORE_CRITERIA, 'total_professional_experience',
+                   'total_relevant_experience', 'processing_time']
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == "json":
+        extension = "jsonl"
+    if extension not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format '{extension}' (use one of {', '.join(OUTPUT_FORMATS)})")
+    return extension
+
+
+def to_frame(rows: List[Dict]) -> pd.DataFrame:
+    """Rows as a frame with a stable column order and types."""
+    df = pd.DataFrame(rows).reindex(columns=STREAM_COLUMNS)
+    for column in NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype(float)
+    for column in STREAM_COLUMNS:
+        if column not in NUMERIC_COLUMNS:
+            df[column] = df[column].fillna("").astype(str)
+    return df
+
+
+class ResultWriter(ABC):
+    """Append result rows to a file as they arrive."""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.append = append
+        self.rows_written = 0
+
+    @abstractmethod
+    def write(self, row: Dict) -> None:
+        """Append one result row."""
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CsvResultWriter(ResultWriter):
+    def __init__(self, path: str, append: bool = False):
+        super().__init__(path, append)
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=STREAM_COLUMNS, extrasaction="ignore")
+        if write_header:
+            self._writer.writeheader()
+
+    def write(self, row: Dict) -> None:
+        self._writer.writerow(row)
+        self._file.flush()
+        self.rows_written += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JsonlResultWriter(ResultWriter):
+    def __init__(self, path: str, append: bool = False):
+        super().__init__(path, append)
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, row: Dict) -> None:
+        record = {column: row.get(column) for column in STREAM_COLUMNS}
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+        self.rows_written += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetResultWriter(ResultWriter):
+    """Buffers rows and writes them as Parquet row groups (requires pyarrow)."""
+
+    def __init__(self, path: str, append: bool = False, batch_size: int = 200):
+        if append:
+            raise ValueError("Parquet files cannot be appended to; write the continued run to a new file")
+        super().__init__(path, append)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet output requires pyarrow (pip install pyarrow)")
+        self._pa = pa
+        self._pq = pq
+        self._writer = None
+        self._buffer = []
+        self.batch_size = batch_size
+
+    def write(self, row: Dict) -> None:
+        self._buffer.append(row)
+        self.rows_written += 1
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        table = self._pa.Table.from_pandas(to_frame(self._buffer), preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is None:
+            # Still produce a valid file with the expected columns
+            self._pq.write_table(self._pa.Table.from_pandas(to_frame([]), preserve_index=False), self.path)
+        else:
+            self._writer.close()
+
+
+WRITERS = {
+    "csv": CsvResultWriter,
+    "jsonl": JsonlResultWriter,
+    "parquet": ParquetResultWriter,
+}
+
+
+def open_writer(path: str, append: bool = False) -> ResultWriter:
+    return WRITERS[detect_format(path)](path, append=append)
+
+
+def read_results(path: str) -> pd.DataFrame:
+    """Load rows written by a previous run (empty frame if the file does not exist yet)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return to_frame([])
+    fmt = detect_format(path)
+    if fmt == "csv":
+        df = pd.read_csv(path, dtype={"File": str}, keep_default_na=False)
+    elif fmt == "jsonl":
+        df = pd.read_json(path, lines=True, dtype={"File": str})
+    else:
+        df = pd.read_parquet(path)
+    return to_frame(df.to_dict("records"))
+
+
+def write_results(df: pd.DataFrame, path: str) -> None:
+    fmt = detect_format(path)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "jsonl":
+        df.to_json(path, orient="records", lines=True)
+    else:
+        df.to_parquet(path, index=False)
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """Parse "skills_match=35,experience=25,..." (percentages or fractions) into fractions."""
+    weights = {}
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition("=")
+        name = name.strip()
+        if not sep or name not in (*Settings.SCORE_CRITERIA, *Settings.CRITERION_ALIASES):
+            raise argparse.ArgumentTypeError(f"Invalid weight '{item}'")
+        try:
+            weights[name] = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight value in '{item}'")
+    total = sum(weights.values())
+    if total > 1.5:
+        weights = {name: value / 100 for name, value in weights.items()}
+        total /= 100
+    if abs(total - 1.0) > 0.01:
+        raise argparse.ArgumentTypeError(f"Weights must sum to 100% (got {total:.0%})")
+    return weights
+
+
+def parse_priority(text: str) -> List[str]:
+    priority = [name.strip() for name in text.split(",") if name.strip()]
+    for name in priority:
+        if name not in (*Settings.SCORE_CRITERIA, *Settings.CRITERION_ALIASES):
+            raise argparse.ArgumentTypeError(f"Unknown priority criterion '{name}'")
+    return priority
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="profile-rank",
+        description="Rank a folder of resumes against a job description without the Streamlit UI."
+    )
+    parser.add_argument("resume_dir", help="Directory containing PDF/DOC/DOCX resumes")
+    parser.add_argument("--jd", required=True, help="Path to a text file with the job description")
+    parser.add_argument("--output", "-o", required=True,
+                        help="Streamed results file (.csv, .jsonl or .parquet)")
+    parser.add_argument("--ranked-output", help="Also write the final ranked table to this file")
+    parser.add_argument("--model", default=next(iter(Settings.SUPPORTED_MODELS)),
+                        choices=list(Settings.SUPPORTED_MODELS))
+    parser.add_argument("--weights", type=parse_weights,
+                        help="Comma-separated criterion=weight pairs summing to 100 (or 1.0)")
+    parser.add_argument("--priority", type=parse_priority,
+                        help="Comma-separated tie-breaking order of criteria")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false",
+                        help="Only look at files directly inside resume_dir")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"LLM worker threads (default {Settings.LLM_WORKERS})")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="Parser processes (default: one per CPU; 0 parses in-process)")
+    parser.add_argument("--resume-from", metavar="PATH",
+                        help="Results file of an earlier run; files listed there are skipped")
+    parser.add_argument("--run-id",
+                        help="Journal completed results under this id; rerunning with it continues the run")
+    parser.add_argument("--triage-model", choices=list(Settings.SUPPORTED_MODELS),
+                        help="Score everything with this cheaper model first and only re-score "
+                             "the contested band with --model")
+    parser.add_argument("--cascade-top-n", type=int, default=None,
+                        help=f"Size of the band re-scored by --model (default {Settings.CASCADE_TOP_N})")
+    parser.add_argument("--cascade-margin", type=float, default=None,
+                        help=f"Also re-score anyone within this many points of the band cutoff "
+                             f"(default {Settings.CASCADE_MARGIN:g})")
+    parser.add_argument("--batch", action="store_true",
+                        help="Score through the OpenAI Batch API: cheaper, but finishes within 24 hours")
+    parser.add_argument("--poll-interval", type=float, default=None,
+                        help=f"Seconds between batch status checks (default {Settings.BATCH_POLL_INTERVAL_SECONDS:g})")
+    parser.add_argument("--shortlist", type=int, metavar="K",
+                        help="Only LLM-score the K resumes that best match the job description (BM25 pre-filter)")
+    parser.add_argument("--min-relevance", type=float, metavar="FRACTION",
+                        help="Only LLM-score resumes whose pre-filter score is at least this fraction of the best")
+    parser.add_argument("--dedupe", nargs="?", type=float, const=Settings.DEDUP_THRESHOLD, metavar="SIMILARITY",
+                        help=f"Evaluate near-duplicate resumes once and copy the result to the others "
+                             f"(similarity 0-1, default {Settings.DEDUP_THRESHOLD:g})")
+    parser.add_argument("--examples", metavar="DIR",
+                        help="Directory of example good resumes used to derive ideal characteristics")
+    parser.add_argument("--force-rescore", action="store_true",
+                        help="Ignore cached evaluations and re-score every resume")
+    parser.add_argument("--top", type=int, default=10, help="Candidates to print in the summary")
+    parser.add_argument("--log-level", default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    return parser
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """Rank args.resume_dir, streaming rows to args.output; return the run summary."""
+    with open(args.jd, encoding="utf-8") as jd_file:
+        job_description = jd_file.read()
+
+    previous = read_results(args.resume_from) if args.resume_from else to_frame([])
+    skip_files = set(previous["File"])
+    # Continue in place when resuming into the same CSV/JSONL file
+    append = bool(args.resume_from) and os.path.abspath(args.resume_from) == os.path.abspath(args.output) \
+        and detect_format(args.output) != "parquet"
+
+    ranker = RankingService(
+        model=args.model,
+        scoring_weights=args.weights,
+        ranking_priority=args.priority,
+        force_rescore=args.force_rescore,
+        prefilter_top_k=args.shortlist,
+        prefilter_min_score=args.min_relevance,
+        triage_model=args.triage_model,
+        cascade_top_n=args.cascade_top_n,
+        cascade_margin=args.cascade_margin,
+        dedupe=args.dedupe is not None,
+        dedupe_threshold=args.dedupe
+    )
+
+    start = time.time()
+
+    def report_progress(completed: int, total: int):
+        # Roughly every 5%
+        if completed % max(1, total // 20) == 0 or completed == total:
+            elapsed = time.time() - start
+            rate = completed / elapsed * 60 if elapsed else 0.0
+            print(f"[{completed}/{total}] {rate:.1f} resumes/min", file=sys.stderr)
+
+    if args.batch:
+        # Rows only exist once the whole batch has finished
+        results = ranker.score_resumes_batch(
+            args.resume_dir, job_description,
+            progress_callback=report_progress,
+            parse_workers=args.parse_workers,
+            recursive=args.recursive,
+            skip_files=skip_files,
+            poll_interval=args.poll_interval,
+            example_good_dir=args.examples
+        )
+    else:
+        results = ranker.iter_resumes(
+            args.resume_dir, job_description,
+            progress_callback=report_progress,
+            parse_workers=args.parse_workers,
+            llm_workers=args.workers,
+            recursive=args.recursive,
+            skip_files=skip_files,
+            run_id=args.run_id,
+            example_good_dir=args.examples
+        )
+
+    rows = previous.to_dict("records")
+    processed = 0
+    failed = 0
+    with open_writer(args.output, append=append) as writer:
+        if not append:
+            for row in rows:
+                writer.write(row)
+        for result in results:
+            # Failed evaluations stay out of the streamed file so --resume-from retries them
+            if result.get('failed'):
+                failed += 1
+            else:
+                writer.write(result)
+            rows.append(result)
+            processed += 1
+
+    elapsed = time.time() - start
+    ranked = ranker.rank_results(rows)
+    if args.ranked_output:
+        write_results(ranked, args.ranked_output)
+
+    return {
+        "previous": len(previous),
+        "scored": processed,
+        "failed": failed,
+        "total_rows": len(rows),
+        "elapsed_seconds": round(elapsed, 2),
+        "resumes_per_minute": round(processed / elapsed * 60, 1) if elapsed else 0.0,
+        "usage": ranker.last_run_usage,
+        "prefilter": ranker.last_run_prefilter,
+        "cascade": ranker.last_run_cascade,
+        "normalization": ranker.last_run_normalization,
+        "dedupe": ranker.last_run_dedupe,
+        "ranked": ranked,
+    }
+
+
+def print_summary(summary: Dict, top: int) -> None:
+    usage = summary["usage"]
+    print(
+        f"Scored {summary['scored']} resumes in {summary['elapsed_seconds']}s "
+        f"({summary['resumes_per_minute']} resumes/min); "
+        f"{summary['previous']} carried over from the previous run",
+        file=sys.stderr
+    )
+    if summary.get("failed"):
+        print(
+            f"{summary['failed']} resumes failed to evaluate and were not written; "
+            f"--resume-from the output file retries them",
+            file=sys.stderr
+        )
+    dedupe = summary.get("dedupe")
+    if dedupe:
+        print(
+            f"Duplicate detection: {dedupe['duplicates']} near-duplicates of {dedupe['resumes']} resumes "
+            f"reuse another resume's evaluation ({dedupe['seconds']}s)",
+            file=sys.stderr
+        )
+    prefilter = summary.get("prefilter")
+    if prefilter:
+        print(
+            f"Pre-filter sent {prefilter['shortlisted']} of {prefilter['candidates']} resumes to the LLM "
+            f"({prefilter['seconds']}s)",
+            file=sys.stderr
+        )
+    cascade = summary.get("cascade")
+    if cascade:
+        line = (
+            f"Cascade: {cascade['triaged']} triaged by {cascade['triage_model']}, "
+            f"{cascade['rescored']} re-scored by {cascade['model']}; "
+            f"cost ${cascade.get('cost', 0):.2f} vs ${cascade.get('cost_without_cascade', 0):.2f} "
+            f"(saved ${cascade.get('cost_saved', 0):.2f})"
+        )
+        if "latency_saved" in cascade:
+            line += f", model time saved {cascade['latency_saved']}s"
+        print(line, file=sys.stderr)
+    normalization = summary.get("normalization")
+    if normalization and normalization.get("resumes"):
+        print(
+            f"Normalization saved {normalization['tokens_saved']} resume tokens "
+            f"({normalization['saved_ratio']:.1%}, {normalization['avg_tokens_saved']} per resume)",
+            file=sys.stderr
+        )
+    if usage:
+        print(
+            f"LLM: {usage['calls']} calls, {usage['input_tokens']} prompt tokens "
+            f"({usage['cached_token_ratio']:.1%} cached), {usage['output_tokens']} completion tokens, "
+            f"avg latency {usage['avg_latency']}s",
+            file=sys.stderr
+        )
+    ranked = summary["ranked"]
+    if top and not ranked.empty:
+        print(ranked[['Rank', 'name', 'total_score', 'File']].head(top).to_string(index=False))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(args.log_level)
+
+    if not os.path.isdir(args.resume_dir):
+        parser.error(f"Resume directory not found: {args.resume_dir}")
+    if args.triage_model and args.triage_model == args.model:
+        parser.error("--triage-model must differ from --model")
+    if args.batch and args.run_id:
+        parser.error("--run-id cannot be combined with --batch; use --resume-from to continue a batch run")
+    try:
+        detect_format(args.output)
+        if args.ranked_output:
+            detect_format(args.ranked_output)
+        summary = run(args)
+    except (ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    print_summary(summary, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
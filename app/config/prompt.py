@@ -1,4 +1,13 @@
-PROMPT_TEMPLATE = """<｜begin▁of▁sentence｜>System Role<｜end▁of▁sentence｜>
+# Bump whenever PROMPT_TEMPLATE / PROMPT_TEMPLATE_GOOD change so cached evaluations are invalidated
+PROMPT_TEMPLATE_VERSION = "2"
+
+# Evaluation prompts are laid out from most to least stable so provider-side prefix
+# caching covers as much of each request as possible:
+#   1. PROMPT_INSTRUCTIONS     - identical for every request
+#   2. PROMPT_RUN_CONTEXT      - identical within a ranking run (date, weights, priority)
+#   3. PROMPT_GOOD_CHARACTERISTICS (optional) and PROMPT_JOB_DESCRIPTION - identical within a run
+#   4. PROMPT_RESUME           - the only per-resume text, always last
+PROMPT_INSTRUCTIONS = """<｜begin▁of▁sentence｜>System Role<｜end▁of▁sentence｜>
 You are an expert HR analyst with 15+ years experience in technical recruitment. Your task is to rigorously evaluate resumes against job descriptions with focus on role alignment and technical relevance.
 
 <｜begin▁of▁sentence｜>Evaluation Protocol<｜end▁of▁sentence｜>
@@ -12,6 +21,7 @@ You are an expert HR analyst with 15+ years experience in technical recruitment.
    - Full name as shown on resume
    - Location in City, State format
    - Valid email and phone number
+
 2. Professional Experience
 - Identify only **full-time, paid roles** with clearly mentioned job titles and employment periods.
 - Exclude:
@@ -20,14 +30,13 @@ You are an expert HR analyst with 15+ years experience in technical recruitment.
   - Ambiguous or unverified experience
 - Use strict date format: `MM/YYYY` (e.g., 04/2019)
 - Calculate experience durations:
-  - For current roles, use `{current_month_year}` as the end date
+  - For current roles, use the reference date from the Run Configuration as the end date
   - Account only for continuous work periods (ignore any gaps >3 months)
   - Do not overlap concurrent roles unless explicitly stated
 - Output:
   - `total_professional_experience` = total full-time experience (in years, rounded to 1 decimal place)
   - `total_relevant_experience` = experience aligned to JD roles/responsibilities
 
-
 3. Skills Assessment:
    - Match skills directly mentioned in resume
    - Verify context and practical application
@@ -47,18 +56,11 @@ You are an expert HR analyst with 15+ years experience in technical recruitment.
 
 ### 1. **Score Calculation:**
 - Total Score = Σ(Weight × Score for each criterion)
-- Use {criteria_list} for weights.
+- Use the criteria weights from the Run Configuration.
 - Maintain precision and fair variation. No copy-paste scoring across candidates.
 
 ### 2. **Tie-Breaking Order:**
-- Apply this priority if multiple candidates have the same score: {priority_order}
-
-<｜begin▁of▁sentence｜>Job Description<｜end▁of▁sentence｜>
-{job_desc}
-
-<｜begin▁of▁sentence｜>Resume Content<｜end▁of▁sentence｜>
-{resume}
-
+- Apply the tie-breaking priority from the Run Configuration if multiple candidates have the same score.
 
 <｜begin▁of▁sentence｜>Output Requirements<｜end▁of▁sentence｜>
 Return JSON format:
@@ -84,98 +86,40 @@ Return JSON format:
         "explanation": "Detailed match analysis with specific differentiators..."
     }}
 }}
-"""
-PROMPT_TEMPLATE_GOOD = """<｜begin▁of▁sentence｜>System Role<｜end▁of▁sentence｜>
-You are an expert HR analyst with 15+ years experience in technical recruitment. Your task is to rigorously evaluate resumes against job descriptions with focus on role alignment and technical relevance.
-
-<｜begin▁of▁sentence｜>Evaluation Protocol<｜end▁of▁sentence｜>
-
-### Phase 1: Role Alignment Check
-- Compare job titles and responsibilities with JD requirements
-- Identify direct and indirect experience relevance
-
-### Phase 2: Data Extraction & Scoring
-1. Personal Information:
-   - Full name as shown on resume
-   - Location in City, State format
-   - Valid email and phone number
-
-2. Professional Experience
-- Identify only **full-time, paid roles** with clearly mentioned job titles and employment periods.
-- Exclude:
-  - Internships
-  - Part-time/freelance/contract roles
-  - Ambiguous or unverified experience
-- Use strict date format: `MM/YYYY` (e.g., 04/2019)
-- Calculate experience durations:
-  - For current roles, use `{current_month_year}` as the end date
-  - Account only for continuous work periods (ignore any gaps >3 months)
-  - Do not overlap concurrent roles unless explicitly stated
-- Output:
-  - `total_professional_experience` = total full-time experience (in years, rounded to 1 decimal place)
-  - `total_relevant_experience` = experience aligned to JD roles/responsibilities
-
-3. Skills Assessment:
-   - Match skills directly mentioned in resume
-   - Verify context and practical application
-   - No assumed or inferred skills
-
-4. Education & Certifications:
-   - List all formal degrees
-   - Include only valid, relevant certifications
-   - Verify certification status
 
-### Phase 3: Scoring Criteria (0-100 scale)
-- Skills Match: Relevance, depth, and recency
-- Experience: Role alignment and impact
-- Education: Degree relevance and prestige
-- Certifications: Validity and relevance
-- Location: Proximity or remote work alignment
-
-### 1. **Score Calculation:**
-- Total Score = Σ(Weight × Score for each criterion)
-- Use {criteria_list} for weights.
-- Maintain precision and fair variation. No copy-paste scoring across candidates.
-
-### 2. **Tie-Breaking Order:**
-- Apply this priority if multiple candidates have the same score: {priority_order}
+"""
+PROMPT_RUN_CONTEXT = """<｜begin▁of▁sentence｜>Run Configuration<｜end▁of▁sentence｜>
+- Reference date for current roles: {current_month_year}
+- Criteria weights:
+{criteria_list}
+- Tie-breaking priority: {priority_order}
 
-### 3. **Good Resume Characteristics to Consider:
+"""
+PROMPT_GOOD_CHARACTERISTICS = """<｜begin▁of▁sentence｜>Good Resume Characteristics to Consider<｜end▁of▁sentence｜>
 When evaluating resumes, give higher scores to those that include:
 {good_resume_characteristics}
 
-<｜begin▁of▁sentence｜>Job Description<｜end▁of▁sentence｜>
+"""
+PROMPT_JOB_DESCRIPTION = """<｜begin▁of▁sentence｜>Job Description<｜end▁of▁sentence｜>
 {job_desc}
 
-<｜begin▁of▁sentence｜>Resume Content<｜end▁of▁sentence｜>
+"""
+PROMPT_RESUME = """<｜begin▁of▁sentence｜>Resume Content<｜end▁of▁sentence｜>
 {resume}
-
-
-<｜begin▁of▁sentence｜>Output Requirements<｜end▁of▁sentence｜>
-Return JSON format:
-{{
-    "information": {{
-        "name": "Full Name",
-        "total_professional_experience": 7.0,
-        "total_relevant_experience": 5.5,
-        "skills": ["Python", "SQL"],
-        "education": ["BSc Computer Science"],
-        "certifications": ["AWS Certified"],
-        "location": "City, State",
-        "email": "email@example.com",
-        "phone": "+1234567890"
-    }},
-    "evaluation": {{
-        "skills_match": 85.75,
-        "experience": 90.25,
-        "education": 80.50,
-        "certifications": 75.25,
-        "location": 100.00,
-        "total_score": 85.75,
-        "explanation": "Detailed match analysis with specific differentiators..."
-    }}
-}}
 """
+# Appended after the resume (keeping the cached prefix) for the one retry after a schema violation
+PROMPT_SCHEMA_CORRECTION = """
+<｜begin▁of▁sentence｜>Correction<｜end▁of▁sentence｜>
+Your previous answer did not match the required JSON schema:
+{validation_error}
+Return the complete evaluation again as a single JSON object that satisfies the schema.
+"""
+
+PROMPT_TEMPLATE = PROMPT_INSTRUCTIONS + PROMPT_RUN_CONTEXT + PROMPT_JOB_DESCRIPTION + PROMPT_RESUME
+PROMPT_TEMPLATE_GOOD = (
+    PROMPT_INSTRUCTIONS + PROMPT_RUN_CONTEXT + PROMPT_GOOD_CHARACTERISTICS
+    + PROMPT_JOB_DESCRIPTION + PROMPT_RESUME
+)
 GOOD_RESUME_TEMPLATE = """You are an expert HR analyst examining resumes that were highly successful for a particular position.
         
 I've provided you with resumes that were ranked as "good" matches for a job description.
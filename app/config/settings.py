@@ -1,3 +1,4 @@
+import os
 from typing import Dict
 from datetime import datetime
 
@@ -18,8 +19,122 @@ class Settings:
         "location"
     ]
 
+    # Per-criterion scores returned by the LLM under "evaluation"
+    SCORE_CRITERIA = [
+        "skills_match",
+        "experience",
+        "education",
+        "certifications",
+        "location"
+    ]
+
+    # Weight/priority keys used by the UI that are scored under another criterion
+    CRITERION_ALIASES: Dict[str, str] = {
+        "total_professional_experience": "experience",
+        "total_relevant_experience": "experience"
+    }
+
     SUPPORTED_MODELS = {
         "gpt-4o": "openai",
         "gpt-4o-mini": "openai",
     }
 
+    # Local on-disk caches (parsed documents, LLM evaluations)
+    CACHE_DIR: str = os.getenv(
+        "PROFILE_RANKING_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "profile_ranking")
+    )
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    EVALUATION_CACHE_ENABLED: bool = True
+    EVALUATION_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    EVALUATION_CACHE_MAX_ENTRIES: int = 50000
+    # Characteristics extracted from example resumes, keyed by example text and job description
+    CHARACTERISTICS_CACHE_ENABLED: bool = True
+    CHARACTERISTICS_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    CHARACTERISTICS_CACHE_MAX_ENTRIES: int = 1000
+    # Per-run journals of completed results, used to resume interrupted runs
+    RUN_JOURNAL_DIR: str = os.path.join(CACHE_DIR, "runs")
+    RUN_JOURNAL_TTL_SECONDS: int = 30 * 24 * 60 * 60
+
+    # Pipeline concurrency
+    MAX_CONCURRENT_REQUESTS: int = 50
+    INITIAL_CONCURRENT_REQUESTS: int = 10
+    PARSE_WORKERS: int = os.cpu_count() or 1
+    # "spawn" avoids forking a process that already runs Streamlit/LLM threads
+    PARSE_START_METHOD: str = "spawn"
+    # Smaller batches parse on a thread; spawning workers would cost more than it saves
+    PARSE_PROCESS_MIN_FILES: int = 8
+    # Parsed resumes waiting for an LLM worker; bounds memory when parsing outpaces the API
+    PARSE_QUEUE_SIZE: int = 32
+    # Threads issuing LLM calls; the adaptive limiter decides how many are in flight
+    LLM_WORKERS: int = MAX_CONCURRENT_REQUESTS
+    # Keep-alive HTTP pool of the chat client shared by every LLMService for a model
+    HTTP_MAX_CONNECTIONS: int = MAX_CONCURRENT_REQUESTS
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 120.0
+
+    # Client-side OpenAI rate limits per model (match your account's usage tier)
+    RATE_LIMITS: Dict[str, Dict[str, int]] = {
+        "gpt-4o": {"requests_per_minute": 500, "tokens_per_minute": 30000},
+        "gpt-4o-mini": {"requests_per_minute": 500, "tokens_per_minute": 200000},
+    }
+    DEFAULT_RATE_LIMITS: Dict[str, int] = {"requests_per_minute": 500, "tokens_per_minute": 30000}
+    # Tokens reserved for each response on top of the rendered prompt
+    EXPECTED_COMPLETION_TOKENS: int = 700
+    LLM_MAX_RETRIES: int = 5
+    LLM_BACKOFF_BASE_SECONDS: float = 1.0
+    LLM_BACKOFF_MAX_SECONDS: float = 60.0
+    # Responses slower than this shrink the adaptive concurrency limit
+    LLM_LATENCY_TARGET_SECONDS: float = 45.0
+
+    # Constrain evaluations to the ResumeAnalysis JSON schema (OpenAI structured outputs)
+    STRUCTURED_OUTPUT: bool = True
+    # Validation error text included in the one corrective retry
+    SCHEMA_ERROR_MAX_CHARS: int = 1000
+
+    # Batch API runs: rendered prompts are written here before upload
+    BATCH_DIR: str = os.path.join(CACHE_DIR, "batches")
+    BATCH_ENDPOINT: str = "/v1/chat/completions"
+    # OpenAI accepts at most 50,000 requests per batch file
+    BATCH_MAX_REQUESTS: int = 50000
+    BATCH_POLL_INTERVAL_SECONDS: float = 30.0
+    # Batches complete within the 24h window; wait a little longer before giving up
+    BATCH_TIMEOUT_SECONDS: float = 25 * 60 * 60
+
+    # Lexical (BM25) pre-filter that shortlists resumes before LLM scoring
+    PREFILTER_BM25_K1: float = 1.5
+    PREFILTER_BM25_B: float = 0.75
+
+    # Two-tier cascade: re-score the top N triage scores and anyone within MARGIN points of the N-th
+    CASCADE_TOP_N: int = 20
+    CASCADE_MARGIN: float = 5.0
+    # USD per 1M tokens, used to report what a run cost (update when prices change)
+    MODEL_PRICING: Dict[str, Dict[str, float]] = {
+        "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+        "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    }
+
+    # LlamaParse requests in flight at once when PDFs PyPDF cannot read are parsed as a batch
+    LLAMA_PARSE_CONCURRENCY: int = 8
+
+    # PDF text extraction budget; longer documents (portfolios, theses) are cut off
+    PDF_MAX_PAGES: int = 15
+    PDF_MAX_CHARS: int = 60000
+    # Memory-map PDFs read-only instead of reading them through a file object
+    PDF_USE_MMAP: bool = True
+
+    # Resume text normalization before prompting (whitespace, page headers/footers, noise)
+    NORMALIZE_RESUME_TEXT: bool = True
+    # Lines at the top or bottom of at least this many pages are treated as page headers/footers
+    NORMALIZE_REPEATED_LINE_MIN: int = 3
+    # Non-empty lines at each end of a page that may be a header, footer or page number
+    NORMALIZE_PAGE_EDGE_LINES: int = 3
+    # Token budget for a resume in the prompt; 0 disables truncation
+    RESUME_MAX_TOKENS: int = 6000
+
+    # Near-duplicate detection (MinHash + LSH); resumes at least this similar share one evaluation
+    DEDUP_THRESHOLD: float = 0.9
+    DEDUP_NUM_PERM: int = 64
+    # 16 bands of 4 rows: pairs above ~0.5 similarity become candidates, then THRESHOLD decides
+    DEDUP_BANDS: int = 16
+    DEDUP_SHINGLE_SIZE: int = 3
@@ -0,0 +1,39 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+# Every field is required (nullable where a resume may omit it) so the models can
+# be used as an OpenAI strict JSON schema, which does not allow optional keys.
+
+
+class CandidateInformation(BaseModel):
+    """Facts extracted from the resume."""
+    name: str = Field(description="Full name as shown on the resume")
+    total_professional_experience: float = Field(
+        ge=0, description="Full-time paid experience in years, rounded to 1 decimal place"
+    )
+    total_relevant_experience: float = Field(
+        ge=0, description="Experience aligned to the job description in years"
+    )
+    skills: List[str]
+    education: List[str]
+    certifications: List[str]
+    location: Optional[str] = Field(description="City, State")
+    email: Optional[str]
+    phone: Optional[str]
+
+
+class CandidateEvaluation(BaseModel):
+    """Per-criterion scores on a 0-100 scale and the weighted total."""
+    skills_match: float = Field(ge=0, le=100)
+    experience: float = Field(ge=0, le=100)
+    education: float = Field(ge=0, le=100)
+    certifications: float = Field(ge=0, le=100)
+    location: float = Field(ge=0, le=100)
+    total_score: float = Field(ge=0, le=100)
+    explanation: str
+
+
+class ResumeAnalysis(BaseModel):
+    """Shape of one resume evaluation returned by the LLM."""
+    information: CandidateInformation
+    evaluation: CandidateEvaluation
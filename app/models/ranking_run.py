@@ -0,0 +1,19 @@
+from typing import Dict, List, Tuple
+from pydantic import BaseModel, ConfigDict
+
+
+class RankingRun(BaseModel):
+    """Settings of one ranking run, passed along the pipeline instead of stored on the services.
+
+    Frozen, so every worker thread and task scoring the run's resumes can share
+    it, and concurrent runs on one service never see each other's settings.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    job_description: str
+    scoring_weights: Dict[str, float]
+    ranking_priority: List[str]
+    # Extracted from the run's example good resumes; empty selects the standard prompt
+    good_characteristics: Tuple[str, ...] = ()
+    # Bypass cached evaluations, journaled results and cached example characteristics
+    force_refresh: bool = False
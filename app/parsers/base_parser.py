@@ -1,10 +1,42 @@
+import os
+import tempfile
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Union
+
+# In-memory document contents, e.g. an upload's getbuffer()
+DocumentData = Union[bytes, bytearray, memoryview]
 
 class BaseParser(ABC):
     """Abstract base class for document parsers."""
+
+    # Identify the parser in cache keys; bump version when extraction output changes
+    name: str = "base"
+    version: str = "1"
+    # Whether an empty extraction is deterministic and safe to cache
+    cache_empty_results: bool = True
     
     @abstractmethod
     def parse(self, file_path: str) -> Dict[str, Optional[str]]:
         """Parse document and return content with metadata."""
-        pass
\ No newline at end of file
+        pass
+
+    def parse_many(self, file_paths: List[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        """Parse several documents, keyed by path; parsers with a batch API override this."""
+        return {file_path: self.parse(file_path) for file_path in file_paths}
+
+    def parse_bytes(self, file_name: str, data: DocumentData) -> Dict[str, Optional[str]]:
+        """Parse a document held in memory; file_name identifies it and its type.
+
+        Parsers that can read from memory override this; the default writes
+        data to a temporary file with file_name's extension and parses that.
+        """
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(file_name)[1], delete=False) as handle:
+            handle.write(data)
+        try:
+            return self.parse(handle.name)
+        finally:
+            os.remove(handle.name)
+
+    def parse_many_bytes(self, documents: Dict[str, DocumentData]) -> Dict[str, Dict[str, Optional[str]]]:
+        """Parse several in-memory documents, keyed by file name."""
+        return {file_name: self.parse_bytes(file_name, data) for file_name, data in documents.items()}
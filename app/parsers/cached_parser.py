@@ -0,0 +1,134 @@
+import os
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+from .base_parser import BaseParser, DocumentData
+from ..config.settings import Settings
+from ..utils.disk_cache import DiskCache
+
+_default_cache: Optional[DiskCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> DiskCache:
+    """Return the process-wide parse cache shared by all parsers."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DiskCache(
+                os.path.join(Settings.CACHE_DIR, "parse_cache.sqlite3"),
+                max_bytes=Settings.PARSE_CACHE_MAX_BYTES
+            )
+        return _default_cache
+
+
+def file_sha256(file_path: str) -> str:
+    """Hash file contents in chunks so large uploads are not loaded at once."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CachedParser(BaseParser):
+    """Content-addressed cache in front of another parser.
+
+    Entries are keyed by the SHA-256 of the file bytes plus the wrapped parser's
+    name and version, so renamed or re-uploaded copies of the same document are
+    served from disk without touching the underlying parser.
+    """
+
+    def __init__(self, parser: BaseParser, cache: Optional[DiskCache] = None):
+        self.parser = parser
+        self.cache = cache if cache is not None else get_parse_cache()
+        self.name = getattr(parser, "name", type(parser).__name__)
+        self.version = getattr(parser, "version", "1")
+        self.cache_empty_results = getattr(parser, "cache_empty_results", True)
+
+    def cache_key(self, file_path: str) -> str:
+        return f"{self.name}:{self.version}:{file_sha256(file_path)}"
+
+    def bytes_cache_key(self, data: DocumentData) -> str:
+        """Same key as cache_key would give for a file holding data."""
+        return f"{self.name}:{self.version}:{hashlib.sha256(data).hexdigest()}"
+
+    def parse(self, file_path: str) -> Dict[str, str]:
+        try:
+            key = self.cache_key(file_path)
+        except OSError as e:
+            logging.debug(f"Skipping parse cache for {file_path}: {str(e)}")
+            return self.parser.parse(file_path)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            logging.debug(f"Parse cache hit for {file_path} ({self.name})")
+            return cached
+
+        result = self.parser.parse(file_path)
+        self._store(key, result)
+        return result
+
+    def parse_many(self, file_paths: List[str]) -> Dict[str, Dict[str, str]]:
+        """Serve cached documents and send only the misses to the wrapped parser, as one batch."""
+        results = {}
+        missing = {}
+        for file_path in file_paths:
+            try:
+                key = self.cache_key(file_path)
+            except OSError as e:
+                logging.debug(f"Skipping parse cache for {file_path}: {str(e)}")
+                missing[file_path] = None
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[file_path] = cached
+            else:
+                missing[file_path] = key
+        if missing:
+            for file_path, result in self.parser.parse_many(list(missing)).items():
+                if missing.get(file_path):
+                    self._store(missing[file_path], result)
+                results[file_path] = result
+        return results
+
+    def parse_bytes(self, file_name: str, data: DocumentData) -> Dict[str, str]:
+        key = self.bytes_cache_key(data)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logging.debug(f"Parse cache hit for {file_name} ({self.name})")
+            return cached
+
+        result = self.parser.parse_bytes(file_name, data)
+        self._store(key, result)
+        return result
+
+    def parse_many_bytes(self, documents: Dict[str, DocumentData]) -> Dict[str, Dict[str, str]]:
+        """Serve cached documents and send only the misses to the wrapped parser, as one batch."""
+        results = {}
+        missing = {}
+        for file_name, data in documents.items():
+            key = self.bytes_cache_key(data)
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[file_name] = cached
+            else:
+                missing[file_name] = key
+        if missing:
+            misses = {file_name: documents[file_name] for file_name in missing}
+            for file_name, result in self.parser.parse_many_bytes(misses).items():
+                self._store(missing[file_name], result)
+                results[file_name] = result
+        return results
+
+    def _store(self, key: str, result) -> None:
+        if isinstance(result, dict) and (result.get("content") or self.cache_empty_results):
+            self.cache.set(key, result)
+
+
+def with_parse_cache(parser: BaseParser) -> BaseParser:
+    """Wrap parser with the shared parse cache unless caching is disabled."""
+    if not Settings.PARSE_CACHE_ENABLED:
+        return parser
+    return CachedParser(parser)
@@ -1,13 +1,26 @@
+import io
 import docx2txt
 import logging
 from typing import Dict
-from .base_parser import BaseParser
+from .base_parser import BaseParser, DocumentData
 
 class DocxParser(BaseParser):
+    name = "docx2txt"
+    version = "1"
+
     def parse(self, file_path: str) -> Dict[str, str]:
         try:
             text = docx2txt.process(file_path)
             return {"content": text, "parser_used": "docx2txt"}
         except Exception as e:
             logging.warning(f"Error reading DOCX {file_path}: {str(e)}")
+            return {"content": "", "parser_used": "docx2txt"}
+
+    def parse_bytes(self, file_name: str, data: DocumentData) -> Dict[str, str]:
+        try:
+            # A .docx is a zip archive; docx2txt reads it from any file-like object
+            text = docx2txt.process(io.BytesIO(data))
+            return {"content": text, "parser_used": "docx2txt"}
+        except Exception as e:
+            logging.warning(f"Error reading DOCX {file_name}: {str(e)}")
             return {"content": "", "parser_used": "docx2txt"}
\ No newline at end of file
@@ -1,44 +1,137 @@
 import os
+import asyncio
+import threading
 from llama_parse import LlamaParse
 import logging
-from typing import Dict
-from .base_parser import BaseParser
+from typing import Dict, List, Tuple
+from .base_parser import BaseParser, DocumentData
+from ..config.settings import Settings
 from dotenv import load_dotenv
 import streamlit as st
 
 load_dotenv()
 
+_clients: Dict[str, LlamaParse] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llama_client(api_key: str) -> LlamaParse:
+    """Shared LlamaParse client for api_key, built once per process instead of per file."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = LlamaParse(
+                api_key=api_key,
+                result_type="text",
+                num_workers=Settings.LLAMA_PARSE_CONCURRENCY
+            )
+            _clients[api_key] = client
+        return client
+
+
 class LlamaParser(BaseParser):
-    def parse(self, file_path: str) -> Dict[str, str]:
-        """Parse document using LlamaParse."""
-        try:
-            # api_key = os.getenv("LLAMA_CLOUD_API_KEY")
-            api_key = st.secrets ["LLAMA_CLOUD_API_KEY"]
-            
+    name = "LlamaParse"
+    version = "2"
+    # Empty results usually mean a failed remote call, so retry them next time
+    cache_empty_results = False
+
+    def __init__(self, client=None):
+        # Resolved on first use so building a parser never reads secrets
+        self._client = client
+
+    def _get_client(self):
+        if self._client is None:
+            api_key = os.getenv("LLAMA_CLOUD_API_KEY") or st.secrets ["LLAMA_CLOUD_API_KEY"]
             if not api_key:
                 raise ValueError("Missing Llama Cloud API Key")
+            self._client = get_llama_client(api_key)
+        return self._client
+
+    @staticmethod
+    def _check_file(file_path: str) -> None:
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
 
-            parser = LlamaParse(api_key=api_key, result_type="text")
-            
-            # Process with LlamaParse - using file_path instead of file_name
-            documents = parser.load_data(file_path=file_path)
+    def _to_result(self, file_path: str, documents) -> Dict[str, str]:
+        if not documents:
+            logging.warning(f"No content extracted from {file_path}")
+            return {"content": "", "parser_used": "LlamaParse"}
 
-            if not documents:
-                logging.warning(f"No content extracted from {file_path}")
-                return {"content": "", "parser_used": "LlamaParse"}
+        # Combine text from all pages, separated by form feeds like PyPDF output
+        text = "\f".join(str(doc.text) for doc in documents if hasattr(doc, 'text'))
 
-            # Combine text from all pages
-            text = "\n".join(str(doc.text) for doc in documents if hasattr(doc, 'text'))
-            
-            if not text.strip():
-                logging.warning(f"Extracted empty content from {file_path}")
-                return {"content": "", "parser_used": "LlamaParse"}
+        if not text.strip():
+            logging.warning(f"Extracted empty content from {file_path}")
+            return {"content": "", "parser_used": "LlamaParse"}
 
-            return {
-                "content": text,
-                "parser_used": "LlamaParse"
-            }
+        return {
+            "content": text,
+            "parser_used": "LlamaParse"
+        }
 
+    @staticmethod
+    def _error_result(file_path: str, error: Exception) -> Dict[str, str]:
+        logging.error(f"LlamaParse failed to read {file_path}: {str(error)}")
+        return {"content": "", "parser_used": "LlamaParse", "error": str(error)}
+
+    def parse(self, file_path: str) -> Dict[str, str]:
+        """Parse document using LlamaParse."""
+        try:
+            self._check_file(file_path)
+            documents = self._get_client().load_data(file_path=file_path)
+            return self._to_result(file_path, documents)
+        except Exception as e:
+            return self._error_result(file_path, e)
+
+    def parse_bytes(self, file_name: str, data: DocumentData) -> Dict[str, str]:
+        """Parse an in-memory document; LlamaParse needs file_name to tell its type."""
+        try:
+            documents = self._get_client().load_data(bytes(data), extra_info={"file_name": file_name})
+            return self._to_result(file_name, documents)
         except Exception as e:
-            logging.error(f"LlamaParse failed to read {file_path}: {str(e)}")
-            return {"content": "", "parser_used": "LlamaParse"}
\ No newline at end of file
+            return self._error_result(file_name, e)
+
+    def parse_many(self, file_paths: List[str]) -> Dict[str, Dict[str, str]]:
+        """Parse files concurrently over the shared client (LLAMA_PARSE_CONCURRENCY at a time)."""
+        if not file_paths:
+            return {}
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aparse_many(file_paths))
+        # asyncio.run is not allowed inside a running loop; parse one by one instead
+        return super().parse_many(file_paths)
+
+    def parse_many_bytes(self, documents: Dict[str, DocumentData]) -> Dict[str, Dict[str, str]]:
+        """In-memory counterpart of parse_many, keyed by file name."""
+        if not documents:
+            return {}
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._aparse([
+                (file_name, bytes(data), {"file_name": file_name}) for file_name, data in documents.items()
+            ]))
+        return super().parse_many_bytes(documents)
+
+    async def aparse_many(self, file_paths: List[str]) -> Dict[str, Dict[str, str]]:
+        """Async form of parse_many for callers that already run an event loop."""
+        return await self._aparse([(file_path, file_path, None) for file_path in file_paths])
+
+    async def _aparse(self, items: List[Tuple[str, object, Dict]]) -> Dict[str, Dict[str, str]]:
+        """Load (key, file path or bytes, extra_info) items with at most LLAMA_PARSE_CONCURRENCY in flight."""
+        semaphore = asyncio.Semaphore(Settings.LLAMA_PARSE_CONCURRENCY)
+
+        async def parse_one(key: str, file_input, extra_info):
+            async with semaphore:
+                try:
+                    if extra_info is None:
+                        self._check_file(file_input)
+                        documents = await self._get_client().aload_data(file_input)
+                    else:
+                        documents = await self._get_client().aload_data(file_input, extra_info=extra_info)
+                except Exception as e:
+                    return key, self._error_result(key, e)
+            return key, self._to_result(key, documents)
+
+        return dict(await asyncio.gather(*(parse_one(*item) for item in items)))
@@ -1,29 +1,99 @@
 import PyPDF2
 import logging
 import os
-from typing import Dict
-from .base_parser import BaseParser
+import io
+import mmap
+import itertools
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from .base_parser import BaseParser, DocumentData
+from ..config.settings import Settings
 
 class PyPDFParser(BaseParser):
+    """Text extraction with PyPDF2, streamed page by page under a page and character budget.
+
+    Pages are extracted lazily and extraction stops once PDF_MAX_PAGES pages
+    or PDF_MAX_CHARS characters have been read, so a 200-page portfolio costs
+    no more than a long resume. The file is memory-mapped read-only instead of
+    being read through a Python file object.
+    """
+    name = "PyPDF2"
+    version = "3"
+
+    def __init__(self, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                 use_mmap: Optional[bool] = None):
+        self.max_pages = Settings.PDF_MAX_PAGES if max_pages is None else max_pages
+        self.max_chars = Settings.PDF_MAX_CHARS if max_chars is None else max_chars
+        self.use_mmap = Settings.PDF_USE_MMAP if use_mmap is None else use_mmap
+        # Budgets change the extracted text, so they are part of the parse cache key
+        self.version = f"{PyPDFParser.version}:{self.max_pages}:{self.max_chars}"
+
+    @contextmanager
+    def _open_reader(self, file_path: str) -> Iterator[PyPDF2.PdfReader]:
+        with open(file_path, 'rb') as file:
+            # Empty files cannot be mapped; PdfReader reports them as invalid below
+            if self.use_mmap and os.fstat(file.fileno()).st_size > 0:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    yield PyPDF2.PdfReader(mapped)
+            else:
+                yield PyPDF2.PdfReader(file)
+
+    @staticmethod
+    def _page_texts(reader: PyPDF2.PdfReader) -> Iterator[str]:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+    def iter_pages(self, file_path: str) -> Iterator[str]:
+        """Yield each page's text lazily; pages after the consumer stops are never extracted."""
+        with self._open_reader(file_path) as reader:
+            yield from self._page_texts(reader)
+
     def parse(self, file_path: str) -> Dict[str, str]:
         if not os.path.exists(file_path):
             logging.error(f"File not found: {file_path}")
             return {"content": "", "parser_used": "PyPDF2", "error": "File not found"}
-            
+
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = "\n".join(page.extract_text() for page in pdf_reader.pages)
-                
-                if not text.strip():
-                    logging.warning(f"No text content extracted from {file_path}")
-                    return {"content": "", "parser_used": "PyPDF2", "error": "No text content extracted"}
-                    
-                return {
-                    "content": text,
-                    "parser_used": "PyPDF2"
-                }
-                
+            with self._open_reader(file_path) as reader:
+                return self._extract(reader, file_path)
         except Exception as e:
             logging.error(f"Error parsing PDF {file_path}: {str(e)}")
-            return {"content": "", "parser_used": "PyPDF2", "error": str(e)}
\ No newline at end of file
+            return {"content": "", "parser_used": "PyPDF2", "error": str(e)}
+
+    def parse_bytes(self, file_name: str, data: DocumentData) -> Dict[str, str]:
+        try:
+            return self._extract(PyPDF2.PdfReader(io.BytesIO(data)), file_name)
+        except Exception as e:
+            logging.error(f"Error parsing PDF {file_name}: {str(e)}")
+            return {"content": "", "parser_used": "PyPDF2", "error": str(e)}
+
+    def _extract(self, reader: PyPDF2.PdfReader, label: str) -> Dict[str, str]:
+        """Text of reader's pages within the page and character budget."""
+        page_count = len(reader.pages)
+        pages = []
+        chars = 0
+        for text in itertools.islice(self._page_texts(reader), self.max_pages or None):
+            if self.max_chars and chars + len(text) > self.max_chars:
+                pages.append(text[:self.max_chars - chars])
+                break
+            pages.append(text)
+            chars += len(text) + 1
+        # Form feeds keep page breaks, so normalization can tell page headers from body lines
+        text = "\f".join(pages)
+
+        if not text.strip():
+            logging.warning(f"No text content extracted from {label}")
+            return {"content": "", "parser_used": "PyPDF2", "error": "No text content extracted"}
+
+        result = {
+            "content": text,
+            "parser_used": "PyPDF2"
+        }
+        truncated = len(pages) < page_count or len(text) >= self.max_chars > 0
+        if truncated:
+            logging.info(
+                f"Stopped reading {label} after {len(pages)} of {page_count} pages "
+                f"({len(text)} characters)"
+            )
+            result.update({"truncated": True, "pages_read": len(pages), "page_count": page_count})
+        return result
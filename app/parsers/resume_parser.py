@@ -0,0 +1,91 @@
+import logging
+from typing import Dict, List, Optional
+from .base_parser import BaseParser, DocumentData
+from .pypdf_parser import PyPDFParser
+from .docx_parser import DocxParser
+from .llama_parser import LlamaParser
+from .cached_parser import with_parse_cache
+
+
+class ResumeParser(BaseParser):
+    """Pick the parser for a resume by extension, falling back to LlamaParse for PDFs.
+
+    With fallback=False, PDFs PyPDF cannot read are returned empty instead; the
+    caller collects them and sends them to parse_fallback as one batch.
+    """
+    name = "resume"
+
+    def __init__(self, pdf_parser: BaseParser = None, docx_parser: BaseParser = None,
+                 llama_parser: BaseParser = None, fallback: bool = True):
+        self.pdf_parser = pdf_parser or with_parse_cache(PyPDFParser())
+        self.docx_parser = docx_parser or with_parse_cache(DocxParser())
+        self.llama_parser = llama_parser or with_parse_cache(LlamaParser())
+        self.fallback = fallback
+
+    def parse(self, file_path: str, fallback: bool = None) -> Dict[str, str]:
+        fallback = self.fallback if fallback is None else fallback
+        if file_path.lower().endswith('.pdf'):
+            # Always use hybrid mode
+            try:
+                content = self.pdf_parser.parse(file_path)
+            except Exception as pdf_error:
+                logging.error(f"PyPDF parser error: {str(pdf_error)}, falling back to LlamaParse")
+                content = None
+            if needs_fallback(file_path, content):
+                if not fallback:
+                    return content or {"content": "", "parser_used": "PyPDF2"}
+                logging.warning(f"PyPDF parser failed for {file_path}, trying LlamaParse")
+                content = self.llama_parser.parse(file_path)
+            return content
+        return self.docx_parser.parse(file_path)
+
+    def parse_bytes(self, file_name: str, data: DocumentData, fallback: bool = None) -> Dict[str, str]:
+        """Parse an in-memory resume, picking the parser by file_name's extension."""
+        fallback = self.fallback if fallback is None else fallback
+        if file_name.lower().endswith('.pdf'):
+            try:
+                content = self.pdf_parser.parse_bytes(file_name, data)
+            except Exception as pdf_error:
+                logging.error(f"PyPDF parser error: {str(pdf_error)}, falling back to LlamaParse")
+                content = None
+            if needs_fallback(file_name, content):
+                if not fallback:
+                    return content or {"content": "", "parser_used": "PyPDF2"}
+                logging.warning(f"PyPDF parser failed for {file_name}, trying LlamaParse")
+                content = self.llama_parser.parse_bytes(file_name, data)
+            return content
+        return self.docx_parser.parse_bytes(file_name, data)
+
+    def parse_fallback(self, file_paths: List[str]) -> Dict[str, Dict[str, str]]:
+        """Parse PDFs that PyPDF could not read with LlamaParse, all in one batch."""
+        logging.info(f"Sending {len(file_paths)} PDFs PyPDF could not read to LlamaParse as one batch")
+        return self.llama_parser.parse_many(file_paths)
+
+    def parse_fallback_bytes(self, documents: Dict[str, DocumentData]) -> Dict[str, Dict[str, str]]:
+        """In-memory counterpart of parse_fallback, keyed by file name."""
+        logging.info(f"Sending {len(documents)} PDFs PyPDF could not read to LlamaParse as one batch")
+        return self.llama_parser.parse_many_bytes(documents)
+
+
+def needs_fallback(file_path: str, content: Optional[Dict]) -> bool:
+    """Whether file_path is a PDF that PyPDF returned no text for."""
+    return file_path.lower().endswith('.pdf') and not (content and (content.get("content") or "").strip())
+
+
+_process_parser: Optional[ResumeParser] = None
+
+
+def parse_resume_file(file_path: str, fallback: bool = True) -> Dict[str, str]:
+    """Parse a resume with a per-process ResumeParser; picklable entry point for process pools."""
+    global _process_parser
+    if _process_parser is None:
+        _process_parser = ResumeParser()
+    return _process_parser.parse(file_path, fallback=fallback)
+
+
+def parse_resume_bytes(file_name: str, data: bytes, fallback: bool = True) -> Dict[str, str]:
+    """In-memory counterpart of parse_resume_file (data must be bytes to cross process boundaries)."""
+    global _process_parser
+    if _process_parser is None:
+        _process_parser = ResumeParser()
+    return _process_parser.parse_bytes(file_name, data, fallback=fallback)
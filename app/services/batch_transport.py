@@ -0,0 +1,76 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+# Batch states after which the batch will not change any more
+TERMINAL_BATCH_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchTransport(ABC):
+    """Submits a JSONL batch file and fetches its results.
+
+    Implementations wrap a provider's batch API; tests plug in a local fake.
+    status() returns a dict with at least "status" (see TERMINAL_BATCH_STATUSES),
+    "output_file_id" and "error_file_id".
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    def submit(self, batch_file: str, endpoint: str, metadata: Optional[Dict[str, str]] = None) -> str:
+        """Upload batch_file and start a batch over it; return the batch id."""
+        pass
+
+    @abstractmethod
+    def status(self, batch_id: str) -> Dict:
+        """Current state of the batch."""
+        pass
+
+    @abstractmethod
+    def download(self, file_id: str) -> str:
+        """Contents of a result (output or error) file as JSONL text."""
+        pass
+
+    def cancel(self, batch_id: str) -> None:
+        """Ask the provider to stop the batch; optional for transports."""
+        logging.warning(f"{self.name} transport cannot cancel batch {batch_id}")
+
+
+class OpenAIBatchTransport(BatchTransport):
+    """OpenAI Batch API: asynchronous requests at a discounted price, done within 24 hours."""
+
+    name = "openai"
+
+    def __init__(self, client, completion_window: str = "24h"):
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, batch_file: str, endpoint: str, metadata: Optional[Dict[str, str]] = None) -> str:
+        with open(batch_file, "rb") as upload:
+            input_file = self.client.files.create(file=upload, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=endpoint,
+            completion_window=self.completion_window,
+            metadata=metadata
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> Dict:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+            "completed": counts.completed if counts else 0,
+            "failed": counts.failed if counts else 0,
+            "total": counts.total if counts else 0,
+            "errors": [error.message for error in (batch.errors.data or [])] if batch.errors else [],
+        }
+
+    def download(self, file_id: str) -> str:
+        return self.client.files.content(file_id).text
+
+    def cancel(self, batch_id: str) -> None:
+        self.client.batches.cancel(batch_id)
@@ -0,0 +1,192 @@
+import re
+import time
+import logging
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import numpy as np
+from ..config.settings import Settings
+
+EMPTY_BIN = np.uint64(np.iinfo(np.uint64).max)
+# Polynomial word hashing works modulo 2**64, where any odd base has an inverse
+HASH_BASE = 0x100000001B3
+# Byte -> 0 for ASCII whitespace, 1 for anything else
+WORD_BYTE = np.ones(256, dtype=np.int8)
+WORD_BYTE[list(b" \t\n\r\x0b\x0c")] = 0
+# Contact details that tell applicants apart when they share a resume template
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{5,}\d")
+
+
+class MinHasher:
+    """One-permutation MinHash signatures of word shingles, computed with numpy.
+
+    Each shingle is hashed once to 64 bits; the top bits pick one of num_perm
+    bins and a signature is the minimum hash in every bin (EMPTY_BIN when a bin
+    got no shingle). That costs one sort per resume instead of num_perm hash
+    permutations. Words are hashed with a polynomial hash over the UTF-8 bytes,
+    vectorized with prefix sums, so signatures are the same in every process.
+    """
+
+    def __init__(self, num_perm: int = None, shingle_size: int = None, seed: int = 1):
+        self.num_perm = num_perm or Settings.DEDUP_NUM_PERM
+        if self.num_perm & (self.num_perm - 1):
+            raise ValueError("num_perm must be a power of two")
+        self.shingle_size = shingle_size or Settings.DEDUP_SHINGLE_SIZE
+        rng = np.random.default_rng(seed)
+        # Odd multipliers mix each word's hash into the high (bin-selecting) bits
+        self._multipliers = rng.integers(1, np.iinfo(np.int64).max, self.shingle_size,
+                                         dtype=np.int64).astype(np.uint64) | np.uint64(1)
+        bin_bits = 64 - self.num_perm.bit_length() + 1
+        self._bin_starts = np.arange(self.num_perm, dtype=np.uint64) << np.uint64(bin_bits)
+        self._powers = np.ones(1, dtype=np.uint64)
+        self._inverse_powers = np.ones(1, dtype=np.uint64)
+
+    def _ensure_powers(self, length: int) -> None:
+        """Grow the cached HASH_BASE**i and HASH_BASE**-i (mod 2**64) tables to length + 1 entries."""
+        if len(self._powers) > length:
+            return
+        size = max(length + 1, 2 * len(self._powers))
+        self._powers = np.concatenate([
+            [np.uint64(1)], np.cumprod(np.full(size - 1, HASH_BASE, dtype=np.uint64))
+        ])
+        self._inverse_powers = np.concatenate([
+            [np.uint64(1)], np.cumprod(np.full(size - 1, pow(HASH_BASE, -1, 1 << 64), dtype=np.uint64))
+        ])
+
+    def word_hashes(self, text: str) -> np.ndarray:
+        """64-bit hash of every whitespace-separated, lower-cased word, in order."""
+        data = np.frombuffer((text or "").lower().encode("utf-8"), dtype=np.uint8)
+        in_word = np.concatenate([[0], WORD_BYTE[data], [0]]).astype(np.int8)
+        edges = np.diff(in_word)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        if len(starts) == 0:
+            return np.empty(0, dtype=np.uint64)
+        self._ensure_powers(len(data))
+        # prefix[i] = sum of (byte + 1) * BASE**j for j < i; a word's hash is its slice, shifted to BASE**0
+        prefix = np.concatenate([
+            [np.uint64(0)], np.cumsum((data.astype(np.uint64) + np.uint64(1)) * self._powers[:len(data)])
+        ])
+        hashes = (prefix[ends] - prefix[starts]) * self._inverse_powers[starts]
+        # Mix so the high (bin-selecting) bits depend on every byte
+        hashes ^= hashes >> np.uint64(29)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        hashes ^= hashes >> np.uint64(32)
+        return hashes
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Sorted 64-bit hashes of the text's word shingles (the whole text if it is shorter).
+
+        Repeated shingles are kept; they cannot change a bin's minimum.
+        """
+        values = self.word_hashes(text)
+        if len(values) == 0:
+            return values
+        width = min(self.shingle_size, len(values))
+        count = len(values) - width + 1
+        hashes = values[:count] * self._multipliers[0]
+        for offset in range(1, width):
+            hashes += values[offset:offset + count] * self._multipliers[offset]
+        hashes.sort()
+        return hashes
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """num_perm bin minima, or None when the text has no words."""
+        shingles = self.shingles(text)
+        if len(shingles) == 0:
+            return None
+        # shingles is sorted, so each bin's minimum is the first hash at or after its start
+        first = np.searchsorted(shingles, self._bin_starts)
+        found = first < len(shingles)
+        signature = np.full(self.num_perm, EMPTY_BIN)
+        signature[found] = shingles[first[found]]
+        next_starts = np.append(self._bin_starts[1:], EMPTY_BIN)
+        signature[found & (signature >= next_starts) & (np.arange(self.num_perm) < self.num_perm - 1)] = EMPTY_BIN
+        return signature
+
+
+def contact_key(text: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """The lower-cased emails and the phone numbers (digits only) found in text."""
+    emails = frozenset(email.lower() for email in EMAIL_PATTERN.findall(text or ""))
+    phones = frozenset(re.sub(r"\D", "", phone) for phone in PHONE_PATTERN.findall(text or ""))
+    return emails, frozenset(phone for phone in phones if len(phone) >= 7)
+
+
+class DuplicateDetector:
+    """Clusters near-duplicate resumes with MinHash and an LSH band index.
+
+    Signatures are split into bands; resumes sharing any band land in the same
+    bucket and become candidates, and a candidate joins a cluster when its
+    estimated Jaccard similarity is at least threshold. Each resume is only
+    compared with the first resume of its buckets, so clustering stays linear
+    in the number of resumes. Similar resumes with different emails or phone
+    numbers are different applicants on a shared template and are kept apart.
+    """
+
+    def __init__(self, threshold: float = None, num_perm: int = None, bands: int = None):
+        self.threshold = Settings.DEDUP_THRESHOLD if threshold is None else threshold
+        if not 0 < self.threshold <= 1:
+            raise ValueError("Duplicate threshold must be between 0 and 1")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands or Settings.DEDUP_BANDS
+        if self.hasher.num_perm % self.bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.last_stats: Dict = {}
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures; bins empty in both are ignored."""
+        used = (first != EMPTY_BIN) | (second != EMPTY_BIN)
+        return float(np.count_nonzero((first == second) & used) / max(np.count_nonzero(used), 1))
+
+    def cluster(self, texts: Dict[str, str]) -> Dict[str, List[str]]:
+        """Map each cluster's representative key to its other members (keys sorted, first is kept).
+
+        Every key in texts is in exactly one cluster; most clusters have no
+        other members.
+        """
+        start = time.perf_counter()
+        keys = sorted(texts)
+        parent = list(range(len(keys)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        signatures = [self.hasher.signature(texts[key]) for key in keys]
+        rows = self.hasher.num_perm // self.bands
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            for band in range(self.bands):
+                bucket = (band, signature[band * rows:(band + 1) * rows].tobytes())
+                first = buckets.setdefault(bucket, i)
+                if first != i and find(first) != find(i) and \
+                        self.similarity(signatures[first], signature) >= self.threshold:
+                    # Keys are sorted, so the smaller root keeps the cluster stable across runs
+                    root_i, root_first = find(i), find(first)
+                    parent[max(root_i, root_first)] = min(root_i, root_first)
+
+        # Keys are visited in order, so each group's first key represents it
+        clusters = {}
+        heads = {}
+        for i, key in enumerate(keys):
+            head = heads.setdefault((find(i), contact_key(texts[key])), key)
+            if head == key:
+                clusters[key] = []
+            else:
+                clusters[head].append(key)
+        duplicates = len(keys) - len(clusters)
+        self.last_stats = {
+            "resumes": len(keys),
+            "clusters": len(clusters),
+            "duplicates": duplicates,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        logging.info(
+            f"Duplicate detection found {duplicates} near-duplicates among {len(keys)} resumes "
+            f"({len(clusters)} to evaluate) in {self.last_stats['seconds']}s"
+        )
+        return clusters
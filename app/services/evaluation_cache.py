@@ -0,0 +1,76 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, List, Optional, Union
+from ..config.settings import Settings
+from ..utils.disk_cache import DiskCache
+
+_default_cache: Optional[DiskCache] = None
+_default_cache_lock = threading.Lock()
+_characteristics_cache: Optional[DiskCache] = None
+
+
+def get_evaluation_cache() -> DiskCache:
+    """Return the process-wide cache of LLM resume evaluations."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DiskCache(
+                os.path.join(Settings.CACHE_DIR, "evaluation_cache.sqlite3"),
+                max_entries=Settings.EVALUATION_CACHE_MAX_ENTRIES,
+                ttl_seconds=Settings.EVALUATION_CACHE_TTL_SECONDS
+            )
+        return _default_cache
+
+
+def get_characteristics_cache() -> DiskCache:
+    """Return the process-wide cache of characteristics extracted from example resumes."""
+    global _characteristics_cache
+    with _default_cache_lock:
+        if _characteristics_cache is None:
+            _characteristics_cache = DiskCache(
+                os.path.join(Settings.CACHE_DIR, "characteristics_cache.sqlite3"),
+                max_entries=Settings.CHARACTERISTICS_CACHE_MAX_ENTRIES,
+                ttl_seconds=Settings.CHARACTERISTICS_CACHE_TTL_SECONDS
+            )
+        return _characteristics_cache
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def evaluation_cache_key(resume_text: str, job_description: str,
+                         scoring_weights: Dict[str, float],
+                         priority_order: Union[List[str], str],
+                         model: str, template_version: str,
+                         **extra) -> str:
+    """Build a canonical key for one evaluation request.
+
+    Every input that changes the rendered prompt or the model output is part of
+    the key, serialized with sorted keys so equal requests always hash the same.
+    """
+    payload = {
+        "resume": _sha256(resume_text),
+        "job_description": _sha256(job_description),
+        "scoring_weights": {k: float(v) for k, v in (scoring_weights or {}).items()},
+        "priority_order": priority_order,
+        "model": model,
+        "template_version": template_version,
+        **extra
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def characteristics_cache_key(resumes_text: str, job_description: str, model: str, template: str) -> str:
+    """Key for the characteristics extracted from one set of example resumes and a job description."""
+    payload = {
+        "resumes": _sha256(resumes_text),
+        "job_description": _sha256(job_description),
+        "model": model,
+        "template": _sha256(template)
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
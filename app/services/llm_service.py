@@ -1,37 +1,179 @@
 import os
 import time
-from typing import Dict
+import tempfile
+import weakref
+import threading
+import httpx
+from typing import Callable, Dict, List, Optional, Tuple
+from functools import lru_cache
 from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.messages import BaseMessage
 import json
 import re
 import logging
 from datetime import datetime
-from ..config.prompt import PROMPT_TEMPLATE, PROMPT_TEMPLATE_GOOD, GOOD_RESUME_TEMPLATE
+from ..config.prompt import PROMPT_TEMPLATE, PROMPT_TEMPLATE_GOOD, GOOD_RESUME_TEMPLATE, PROMPT_TEMPLATE_VERSION
+from ..config.prompt import PROMPT_SCHEMA_CORRECTION
+from ..models.analysis import ResumeAnalysis
+from ..models.ranking_run import RankingRun
 from ..utils.helpers import clean_llm_output
 from dotenv import load_dotenv
 from ..parsers.pypdf_parser import PyPDFParser
 from ..parsers.docx_parser import DocxParser
 from ..parsers.llama_parser import LlamaParser
+from ..parsers.cached_parser import with_parse_cache
+from ..parsers.base_parser import BaseParser, DocumentData
 from ..config.settings import Settings
+from ..utils.tokens import count_tokens
+from .evaluation_cache import get_evaluation_cache, evaluation_cache_key
+from .evaluation_cache import get_characteristics_cache, characteristics_cache_key
+from .rate_limiter import get_rate_limiter, get_concurrency_limiter, backoff_delay
+from .usage_tracker import UsageTracker
+from .batch_transport import BatchTransport, OpenAIBatchTransport, TERMINAL_BATCH_STATUSES
+import openai
+from openai.lib._pydantic import to_strict_json_schema
+import asyncio
 import streamlit as st
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
+_chat_models: Dict[Tuple[str, str], ChatOpenAI] = {}
+_chat_models_lock = threading.Lock()
+
+
+class PerLoopTransport(httpx.AsyncBaseTransport):
+    """Async transport with one connection pool per event loop.
+
+    Pooled connections belong to the loop that opened them, and every
+    asyncio.run starts a new loop; a pool shared across loops would hand out
+    connections of a closed loop. Pools are dropped with their loop.
+    """
+
+    def __init__(self, limits: httpx.Limits):
+        self.limits = limits
+        # Event loop -> its transport
+        self._transports = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(limits=self.limits)
+                self._transports[loop] = transport
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def get_chat_model(model: str, api_key: str) -> ChatOpenAI:
+    """Shared chat client for model, built once per process instead of per LLMService.
+
+    Its sync HTTP client keeps up to HTTP_MAX_CONNECTIONS connections alive,
+    so connections and TLS sessions are reused across runs, Streamlit reruns
+    and sessions. The async client pools the same way within each event loop
+    (see PerLoopTransport). The client is thread-safe.
+    """
+    with _chat_models_lock:
+        client = _chat_models.get((model, api_key))
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=Settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=Settings.HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=Settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+            )
+            client = ChatOpenAI(
+                model=model,
+                api_key=api_key,
+                temperature=0.3,
+                top_p=1.0,
+                frequency_penalty=0.0,
+                presence_penalty=0.0,
+                n=1,
+                max_retries=0,  # Retries are handled by _invoke_with_retries
+                http_client=httpx.Client(limits=limits),
+                http_async_client=httpx.AsyncClient(transport=PerLoopTransport(limits))
+            )
+            _chat_models[(model, api_key)] = client
+        return client
+
+
+@lru_cache(maxsize=32)
+def _format_criteria_list(weights: Tuple[Tuple[str, float], ...]) -> str:
+    return "\n".join(
+        [f"- {k.capitalize()}: {v * 100}%"
+         for k, v in weights]
+    )
+
+
+@lru_cache(maxsize=32)
+def _format_characteristics(characteristics: Tuple[str, ...]) -> str:
+    return "\n".join(f"- {c}" for c in characteristics)
+
+
+@lru_cache(maxsize=64)
+def _static_prompt_tokens(template: str, run_constant: Tuple[Tuple[str, str], ...], model: str) -> int:
+    """Tokens of a prompt rendered with an empty resume; constant for a whole run."""
+    return count_tokens(PromptTemplate.from_template(template).format(**dict(run_constant), resume=""), model)
+
+
+@lru_cache(maxsize=1)
+def _analysis_response_format() -> Dict:
+    """response_format constraining raw API requests to the ResumeAnalysis schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": ResumeAnalysis.__name__, "schema": to_strict_json_schema(ResumeAnalysis), "strict": True}
+    }
+
+
 class LLMService:
+    """Evaluates resumes with an LLM.
+
+    Holds no per-run state: the job description, weights, priority and example
+    characteristics of a ranking travel in its RankingRun, so one service can
+    serve concurrent rankings from many threads or async tasks.
+    """
+
+    # Transient API failures worth retrying with backoff
+    RETRYABLE_ERRORS = (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError
+    )
+
     def __init__(self, model: str):
         self.model = model
-        # self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        self.openai_api_key = st.secrets ["OPENAI_API_KEY"]
+        # Environment first so headless runs (CLI, cron) work without Streamlit secrets
+        self.openai_api_key = os.getenv("OPENAI_API_KEY") or st.secrets ["OPENAI_API_KEY"]
         self.llm = self._initialize_llm()
-        self.current_month_year = datetime.today().strftime("%B %Y")
-        self.good_characteristics = []
-        self.use_example_resumes = False  # New flag for using example resumes
+        self.evaluation_cache = get_evaluation_cache() if Settings.EVALUATION_CACHE_ENABLED else None
+        self.characteristics_cache = get_characteristics_cache() if Settings.CHARACTERISTICS_CACHE_ENABLED else None
+        # Shared with every LLMService for the same model in this process
+        self.rate_limiter = get_rate_limiter(model)
+        self.concurrency_limiter = get_concurrency_limiter(model)
+        self.usage = UsageTracker()
+        self._structured_llm = None
+        self._structured_source = None
+        # (template, id(llm)) -> (prompt, chain, llm)
+        self._chains = {}
+
+    @property
+    def current_month_year(self) -> str:
+        """Reference date for experience calculations, read per call so long-lived services stay current."""
+        return datetime.today().strftime("%B %Y")
 
     def _initialize_llm(self):
-        """Initialize the OpenAI LLM."""
+        """Return the shared chat client for the model (see get_chat_model)."""
         try:
             if not self.openai_api_key:
                 raise ValueError("OpenAI API key not found")
@@ -41,15 +183,7 @@ class LLMService:
                 raise ValueError(f"Unsupported model: {self.model}")
                 
             if provider == "openai":
-                return ChatOpenAI(
-                    model=self.model,
-                    api_key=self.openai_api_key,
-                    temperature=0.3,
-                    top_p=1.0,
-                    frequency_penalty=0.0,
-                    presence_penalty=0.0,
-                    n=1
-                )
+                return get_chat_model(self.model, self.openai_api_key)
             
             raise ValueError(f"Unsupported provider: {provider}")
         except ValueError as e:
@@ -58,12 +192,11 @@ class LLMService:
             raise Exception(f"Error initializing LLM: {str(e)}")
 
     def _generate_criteria_list(self, scoring_weights: Dict[str, float]) -> str:
-        """Generate formatted criteria list for prompt."""
-        return "\n".join(
-            [f"- {k.capitalize()}: {v * 100}%"
-             for k, v in scoring_weights.items()]
-        )
-    def _analyze_characteristics(self, resumes_text: str, analysis_type: str) -> list[str]:
+        """Generate formatted criteria list for prompt (rendered once per distinct weights)."""
+        return _format_criteria_list(tuple(scoring_weights.items()))
+
+    def _analyze_characteristics(self, resumes_text: str, analysis_type: str,
+                                 job_description: str = "") -> list[str]:
         """Analyze resumes to extract characteristics"""
         try:
             if analysis_type != "good":
@@ -71,18 +204,14 @@ class LLMService:
                 return []
                 
             
-            # Create prompt template
-            prompt = PromptTemplate(
-                template=GOOD_RESUME_TEMPLATE,
-                input_variables=["job_description", "resumes_text"]
-            )
-            
-            # Create and run the chain
-            chain = prompt | self.llm | StrOutputParser()
-            response = chain.invoke({
-                "job_description": self.current_job_description,
+            # Reuse the compiled prompt and chain
+            prompt, chain = self._get_chain(GOOD_RESUME_TEMPLATE, self.llm)
+            input_vars = {
+                "job_description": job_description,
                 "resumes_text": resumes_text
-            })
+            }
+            estimated_tokens = count_tokens(prompt.format(**input_vars), self.model) + Settings.EXPECTED_COMPLETION_TOKENS
+            response = self._invoke_with_retries(chain, input_vars, estimated_tokens)
             
             # Parse the response into a list of characteristics
             characteristics = []
@@ -98,13 +227,43 @@ class LLMService:
             logging.error(f"Error analyzing characteristics: {str(e)}")
             return []
 
-    def analyze_example_resumes(self, good_resumes_dir: str = None, job_description: str = None):
-        """Analyze example good resumes to extract characteristics"""
-        self.current_job_description = job_description
-        
-        if good_resumes_dir:
-            logging.info(f"Processing example resumes from: {good_resumes_dir}")
-            good_text = self._read_resumes_from_dir(good_resumes_dir)
+    def _cached_characteristics(self, resumes_text: str, job_description: str,
+                                force_refresh: bool = False) -> list[str]:
+        """Characteristics of resumes_text for job_description, memoized by content hash."""
+        if self.characteristics_cache is None:
+            return self._analyze_characteristics(resumes_text, "good", job_description)
+        cache_key = characteristics_cache_key(
+            resumes_text, job_description, self.model, GOOD_RESUME_TEMPLATE
+        )
+        if not force_refresh:
+            cached = self.characteristics_cache.get(cache_key)
+            if cached is not None:
+                logging.info("Using cached good resume characteristics")
+                return cached
+        characteristics = self._analyze_characteristics(resumes_text, "good", job_description)
+        # Failed extractions come back empty and are retried next time
+        if characteristics:
+            self.characteristics_cache.set(cache_key, characteristics)
+        return characteristics
+
+    def analyze_example_resumes(self, good_resumes_dir: str = None, job_description: str = None,
+                                good_resumes: List[Tuple[str, DocumentData]] = None,
+                                force_refresh: bool = False) -> List[str]:
+        """Extract the characteristics of example good resumes for job_description.
+
+        The examples come from good_resumes_dir or, for uploads kept in memory,
+        from good_resumes as (file name, bytes) pairs. Characteristics already
+        extracted for the same examples and job description are reused unless
+        force_refresh is set. Nothing is stored on the service; pass the result
+        to the run (RankingRun.good_characteristics).
+        """
+        characteristics = []
+        if good_resumes_dir or good_resumes:
+            if good_resumes_dir:
+                logging.info(f"Processing example resumes from: {good_resumes_dir}")
+                good_text = self._read_resumes_from_dir(good_resumes_dir)
+            else:
+                good_text = self._read_resumes_from_documents(good_resumes)
             
             if good_text:
                 # Count number of resumes being analyzed
@@ -112,138 +271,499 @@ class LLMService:
                 logging.info(f"Analyzing characteristics from {resume_count} good resumes")
                 
                 # Extract characteristics from combined resumes
-                self.good_characteristics = self._analyze_characteristics(good_text, "good")
+                characteristics = self._cached_characteristics(good_text, job_description, force_refresh)
                 
-                if self.good_characteristics:
-                    self.use_example_resumes = True
-                    logging.info(f"Successfully extracted {len(self.good_characteristics)} characteristics")
+                if characteristics:
+                    logging.info(f"Successfully extracted {len(characteristics)} characteristics")
                     logging.info("=== Extracted Good Resume Characteristics ===")
-                    for i, char in enumerate(self.good_characteristics, 1):
+                    for i, char in enumerate(characteristics, 1):
                         logging.info(f"{i}. {char}")
                     logging.info("=" * 45)  # Visual separator for log readability
                 else:
                     logging.warning("No characteristics extracted from good resumes")
-                    self.use_example_resumes = False
             else:
                 logging.warning("No content extracted from example resumes")
-                self.use_example_resumes = False
-                self.good_characteristics = []
+        return characteristics
+
+    MAX_SAMPLE_RESUMES = 5  # Maximum number of sample resumes to process
 
     def _read_resumes_from_dir(self, directory: str) -> str:
         """Read and concatenate resumes from directory with a limit"""
-        MAX_SAMPLE_RESUMES = 5  # Maximum number of sample resumes to process
-        
         if not os.path.exists(directory):
             logging.warning(f"Directory not found: {directory}")
             return ""
             
-        resumes_text = []
         try:
-            pdf_parser = PyPDFParser()
-            docx_parser = DocxParser()
-            llama_parser = LlamaParser()  # Initialize LlamaParse
-            
             # Get all files and sort them
             files = [f for f in os.listdir(directory) 
                     if f.lower().endswith(('.pdf', '.doc', '.docx'))]
             files.sort()
-            
-            # Limit number of files
-            files = files[:MAX_SAMPLE_RESUMES]
-            logging.info(f"Processing {len(files)} sample resumes (maximum {MAX_SAMPLE_RESUMES})")
-            
-            for filename in files:
-                file_path = os.path.join(directory, filename)
-                content = None
-                
-                try:
-                    if filename.lower().endswith('.pdf'):
-                        # Try PyPDF first
-                        content = pdf_parser.parse(file_path)
-                        
-                        # If PyPDF fails or returns empty content, try LlamaParse
-                        if not content or not content.get("content") or not content.get("content").strip():
-                            logging.info(f"PyPDF parser failed for {filename}, trying LlamaParse")
-                            content = llama_parser.parse(file_path)
-                            
-                    elif filename.lower().endswith(('.doc', '.docx')):
-                        # Try docx parser first
-                        content = docx_parser.parse(file_path)
-                        
-                        # If docx parser fails, try LlamaParse
-                        if not content or not content.get("content") or not content.get("content").strip():
-                            logging.info(f"DOCX parser failed for {filename}, trying LlamaParse")
-                            content = llama_parser.parse(file_path)
-                    
-                    # Add successfully parsed content
-                    if content and content.get("content") and content.get("content").strip():
-                        resumes_text.append(f"=== Resume: {filename} ===\n{content['content']}\n")
-                        logging.info(f"Successfully extracted content from {filename} using {content.get('parser_used', 'unknown parser')}")
-                    else:
-                        logging.warning(f"Failed to extract content from {filename} with all parsers")
-                        
-                except Exception as e:
-                    logging.error(f"Error processing {filename}: {str(e)}")
-                    
-            # Combine all resume texts
-            combined_text = "\n\n".join(resumes_text)
-            logging.info(f"Successfully combined {len(resumes_text)} resumes")
-            
-            return combined_text
+            return self._combine_examples([
+                (filename, lambda parser, path=os.path.join(directory, filename): parser.parse(path))
+                for filename in files
+            ])
                 
         except Exception as e:
             logging.error(f"Error reading directory {directory}: {str(e)}")
             return ""
 
-    def analyze_resume(self, resume_text: str, job_description: str, 
-                      scoring_weights: Dict[str, float], priority_order: str) -> Dict:
-        try:
-            # Debug logging at the start
-            logging.info(f"Starting analyze_resume with use_example_resumes: {self.use_example_resumes}")
-            logging.info(f"Number of good characteristics: {len(self.good_characteristics)}")
+    def _read_resumes_from_documents(self, documents: List[Tuple[str, DocumentData]]) -> str:
+        """Read and concatenate in-memory (file name, bytes) resumes with the same limit"""
+        documents = sorted(
+            (item for item in documents if item[0].lower().endswith(('.pdf', '.doc', '.docx'))),
+            key=lambda item: item[0]
+        )
+        return self._combine_examples([
+            (filename, lambda parser, filename=filename, data=data: parser.parse_bytes(filename, data))
+            for filename, data in documents
+        ])
+
+    def _combine_examples(self, examples: List[Tuple[str, Callable[[BaseParser], Dict]]]) -> str:
+        """Parse up to MAX_SAMPLE_RESUMES examples; read(parser) runs parser on one example."""
+        pdf_parser = with_parse_cache(PyPDFParser())
+        docx_parser = with_parse_cache(DocxParser())
+        llama_parser = with_parse_cache(LlamaParser())  # Initialize LlamaParse
+
+        # Limit number of files
+        examples = examples[:self.MAX_SAMPLE_RESUMES]
+        logging.info(f"Processing {len(examples)} sample resumes (maximum {self.MAX_SAMPLE_RESUMES})")
+
+        resumes_text = []
+        for filename, read in examples:
+            content = None
             
-            # Select template based on whether good resumes were provided
-            if self.use_example_resumes and self.good_characteristics:
-                logging.info("Using GOOD template with characteristics")
-                template = PROMPT_TEMPLATE_GOOD
-                input_vars = {
-                    "current_month_year": self.current_month_year,
-                    "criteria_list": self._generate_criteria_list(scoring_weights),
-                    "priority_order": priority_order,
-                    "job_desc": job_description,
-                    "resume": resume_text,
-                    "good_resume_characteristics": "\n".join(f"- {c}" for c in self.good_characteristics)
-                }
-            else:
-                logging.info("Using STANDARD template")
-                template = PROMPT_TEMPLATE
-                input_vars = {
-                    "current_month_year": self.current_month_year,
-                    "criteria_list": self._generate_criteria_list(scoring_weights),
-                    "priority_order": priority_order,
-                    "job_desc": job_description,
-                    "resume": resume_text
-                }
-
-            # Create prompt template with correct variables
-            prompt = PromptTemplate(
-                template=template,
-                input_variables=list(input_vars.keys())
+            try:
+                if filename.lower().endswith('.pdf'):
+                    # Try PyPDF first
+                    content = read(pdf_parser)
+                    
+                    # If PyPDF fails or returns empty content, try LlamaParse
+                    if not content or not content.get("content") or not content.get("content").strip():
+                        logging.info(f"PyPDF parser failed for {filename}, trying LlamaParse")
+                        content = read(llama_parser)
+                        
+                elif filename.lower().endswith(('.doc', '.docx')):
+                    # Try docx parser first
+                    content = read(docx_parser)
+                    
+                    # If docx parser fails, try LlamaParse
+                    if not content or not content.get("content") or not content.get("content").strip():
+                        logging.info(f"DOCX parser failed for {filename}, trying LlamaParse")
+                        content = read(llama_parser)
+                
+                # Add successfully parsed content
+                if content and content.get("content") and content.get("content").strip():
+                    resumes_text.append(f"=== Resume: {filename} ===\n{content['content']}\n")
+                    logging.info(f"Successfully extracted content from {filename} using {content.get('parser_used', 'unknown parser')}")
+                else:
+                    logging.warning(f"Failed to extract content from {filename} with all parsers")
+                    
+            except Exception as e:
+                logging.error(f"Error processing {filename}: {str(e)}")
+
+        # Combine all resume texts
+        combined_text = "\n\n".join(resumes_text)
+        logging.info(f"Successfully combined {len(resumes_text)} resumes")
+        
+        return combined_text
+
+    @staticmethod
+    def _as_run(run: Optional[RankingRun], job_description: str, scoring_weights: Dict[str, float],
+                priority_order: List[str], force_refresh: bool) -> RankingRun:
+        """run, or a run without example characteristics built from the plain arguments."""
+        if run is None:
+            return RankingRun(
+                job_description=job_description,
+                scoring_weights=scoring_weights,
+                ranking_priority=priority_order,
+                force_refresh=force_refresh
             )
+        if force_refresh and not run.force_refresh:
+            return run.model_copy(update={"force_refresh": True})
+        return run
 
-            # Create and execute chain
-            chain = prompt | self.llm | StrOutputParser()
-            result = chain.invoke(input_vars)
+    def _prepare_analysis(self, resume_text: str, run: RankingRun):
+        """Select the prompt template and build its inputs plus the evaluation cache key."""
+        current_month_year = self.current_month_year
+        # Select template based on whether the run has example characteristics
+        if run.good_characteristics:
+            logging.debug(f"Using GOOD template with {len(run.good_characteristics)} characteristics")
+            template = PROMPT_TEMPLATE_GOOD
+            input_vars = {
+                "current_month_year": current_month_year,
+                "criteria_list": self._generate_criteria_list(run.scoring_weights),
+                "priority_order": run.ranking_priority,
+                "job_desc": run.job_description,
+                "resume": resume_text,
+                "good_resume_characteristics": _format_characteristics(run.good_characteristics)
+            }
+        else:
+            logging.debug("Using STANDARD template")
+            template = PROMPT_TEMPLATE
+            input_vars = {
+                "current_month_year": current_month_year,
+                "criteria_list": self._generate_criteria_list(run.scoring_weights),
+                "priority_order": run.ranking_priority,
+                "job_desc": run.job_description,
+                "resume": resume_text
+            }
+
+        cache_key = None
+        if self.evaluation_cache is not None:
+            cache_key = evaluation_cache_key(
+                resume_text, run.job_description, run.scoring_weights, run.ranking_priority,
+                model=self.model,
+                template_version=PROMPT_TEMPLATE_VERSION,
+                current_month_year=current_month_year,
+                good_resume_characteristics=input_vars.get("good_resume_characteristics", "")
+            )
+        return template, input_vars, cache_key
+
+    def _get_cached_analysis(self, cache_key: str, force_refresh: bool) -> Optional[Dict]:
+        if not cache_key or force_refresh:
+            return None
+        cached = self.evaluation_cache.get(cache_key)
+        if cached is not None:
+            logging.info("Using cached evaluation")
+        return cached
+
+    def _evaluation_llm(self):
+        """Model used for evaluations, constrained to the ResumeAnalysis schema when supported.
+
+        The structured model returns {"raw", "parsed", "parsing_error"}; models
+        without structured-output support fall back to free-text JSON.
+        """
+        if not Settings.STRUCTURED_OUTPUT:
+            return self.llm
+        if self._structured_source is not self.llm:
+            try:
+                self._structured_llm = self.llm.with_structured_output(
+                    ResumeAnalysis, method="json_schema", strict=True, include_raw=True
+                )
+            except (AttributeError, NotImplementedError, ValueError):
+                logging.info(f"{type(self.llm).__name__} has no structured output support, parsing free-text JSON")
+                self._structured_llm = None
+            self._structured_source = self.llm
+        return self._structured_llm or self.llm
+
+    def _get_chain(self, template: str, llm=None):
+        """Compiled prompt and prompt | llm chain for template, built once and reused across calls."""
+        llm = llm if llm is not None else self._evaluation_llm()
+        key = (template, id(llm))
+        entry = self._chains.get(key)
+        if entry is None or entry[2] is not llm:
+            prompt = PromptTemplate.from_template(template)
+            entry = (prompt, prompt | llm, llm)
+            self._chains[key] = entry
+        return entry[0], entry[1]
+
+    def _build_chain(self, template: str, input_vars: Dict):
+        """Return the reusable chain and estimate the tokens one call will consume.
+
+        Everything but the resume is constant within a run, so only the resume
+        is tokenized per call.
+        """
+        _, chain = self._get_chain(template)
+        # Values are stringified exactly as the prompt template would render them
+        run_constant = tuple(sorted((k, str(v)) for k, v in input_vars.items() if k != "resume"))
+        estimated_tokens = (
+            _static_prompt_tokens(template, run_constant, self.model)
+            + count_tokens(input_vars.get("resume", ""), self.model)
+            + Settings.EXPECTED_COMPLETION_TOKENS
+        )
+        return chain, estimated_tokens
+
+    @staticmethod
+    def _schema_error(result) -> Optional[Exception]:
+        """Validation error of a structured-output result, if any."""
+        if isinstance(result, dict):
+            return result.get("parsing_error")
+        return None
+
+    def _build_correction(self, template: str, input_vars: Dict, error: Exception):
+        """Chain for the single retry after a schema violation, with the error appended."""
+        logging.warning(f"Evaluation failed schema validation, retrying once: {str(error)[:200]}")
+        retry_vars = {**input_vars, "validation_error": str(error)[:Settings.SCHEMA_ERROR_MAX_CHARS]}
+        chain, estimated_tokens = self._build_chain(template + PROMPT_SCHEMA_CORRECTION, retry_vars)
+        return chain, retry_vars, estimated_tokens
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Feed the error back into the limiters and return the backoff, or re-raise if exhausted."""
+        if attempt >= Settings.LLM_MAX_RETRIES or getattr(error, "code", None) == "insufficient_quota":
+            raise error
+        retry_after = self._retry_after(error)
+        delay = backoff_delay(attempt, retry_after)
+        if isinstance(error, openai.RateLimitError):
+            self.concurrency_limiter.on_rate_limited()
+            self.rate_limiter.drain(retry_after or delay)
+        logging.warning(
+            f"{type(error).__name__} from {self.model}, retrying in {delay:.1f}s "
+            f"(attempt {attempt + 1}/{Settings.LLM_MAX_RETRIES})"
+        )
+        return delay
+
+    @staticmethod
+    def _message_text(message) -> str:
+        if isinstance(message, BaseMessage):
+            return message.content
+        return str(message)
+
+    def _response(self, result):
+        """Text of a plain response; structured-output results are returned unchanged."""
+        return result if isinstance(result, dict) else self._message_text(result)
 
-            return clean_llm_output(result)
+    @staticmethod
+    def _response_message(result):
+        return result["raw"] if isinstance(result, dict) else result
+
+    def _invoke_with_retries(self, chain, input_vars: Dict, estimated_tokens: int):
+        """Invoke chain under the shared rate and concurrency limits, retrying transient errors."""
+        for attempt in range(Settings.LLM_MAX_RETRIES + 1):
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                with self.concurrency_limiter.slot():
+                    start = time.monotonic()
+                    result = chain.invoke(input_vars)
+                    latency = time.monotonic() - start
+            except self.RETRYABLE_ERRORS as e:
+                time.sleep(self._retry_delay(e, attempt))
+                continue
+            self.concurrency_limiter.on_success(latency)
+            self.usage.record(self._response_message(result), latency)
+            return self._response(result)
+
+    async def _ainvoke_with_retries(self, chain, input_vars: Dict, estimated_tokens: int):
+        """Async counterpart of _invoke_with_retries."""
+        for attempt in range(Settings.LLM_MAX_RETRIES + 1):
+            await self.rate_limiter.acquire_async(estimated_tokens)
+            try:
+                async with self.concurrency_limiter.slot_async():
+                    start = time.monotonic()
+                    result = await chain.ainvoke(input_vars)
+                    latency = time.monotonic() - start
+            except self.RETRYABLE_ERRORS as e:
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                continue
+            self.concurrency_limiter.on_success(latency)
+            self.usage.record(self._response_message(result), latency)
+            return self._response(result)
+
+    def _finish_analysis(self, result, cache_key: Optional[str]) -> Dict:
+        if isinstance(result, dict):
+            if result.get("parsed") is None:
+                # Still invalid after the retry: salvage what we can but never cache it
+                logging.error(f"Evaluation failed schema validation twice: {str(result.get('parsing_error'))[:200]}")
+                return clean_llm_output(self._message_text(result["raw"]))
+            analysis = result["parsed"].model_dump()
+        else:
+            analysis = clean_llm_output(result)
+        if cache_key and isinstance(analysis, dict) and "information" in analysis and "evaluation" in analysis:
+            self.evaluation_cache.set(cache_key, analysis)
+        return analysis
+
+    def analyze_resume(self, resume_text: str, job_description: str = None,
+                      scoring_weights: Dict[str, float] = None, priority_order: List[str] = None,
+                      force_refresh: bool = False, run: RankingRun = None) -> Dict:
+        """Evaluate a resume, serving repeated requests from the evaluation cache.
+
+        run carries the ranking's job description, weights, priority and
+        example characteristics; without it they come from the plain arguments
+        (and no characteristics are used). Set force_refresh to bypass cached
+        results and re-score with the LLM.
+        """
+        try:
+            run = self._as_run(run, job_description, scoring_weights, priority_order, force_refresh)
+            template, input_vars, cache_key = self._prepare_analysis(resume_text, run)
+            cached = self._get_cached_analysis(cache_key, run.force_refresh)
+            if cached is not None:
+                return cached
+
+            # Create and execute chain
+            chain, estimated_tokens = self._build_chain(template, input_vars)
+            result = self._invoke_with_retries(chain, input_vars, estimated_tokens)
+            error = self._schema_error(result)
+            if error is not None:
+                chain, retry_vars, estimated_tokens = self._build_correction(template, input_vars, error)
+                result = self._invoke_with_retries(chain, retry_vars, estimated_tokens)
+            return self._finish_analysis(result, cache_key)
 
         except Exception as e:
             logging.error(f"Error in analyze_resume: {str(e)}")
             return self._generate_error_response()
 
+    async def analyze_resume_async(self, resume_text: str, job_description: str = None,
+                                   scoring_weights: Dict[str, float] = None, priority_order: List[str] = None,
+                                   force_refresh: bool = False, run: RankingRun = None) -> Dict:
+        """Non-blocking variant of analyze_resume using the async OpenAI client."""
+        try:
+            run = self._as_run(run, job_description, scoring_weights, priority_order, force_refresh)
+            template, input_vars, cache_key = self._prepare_analysis(resume_text, run)
+            cached = self._get_cached_analysis(cache_key, run.force_refresh)
+            if cached is not None:
+                return cached
+
+            chain, estimated_tokens = self._build_chain(template, input_vars)
+            result = await self._ainvoke_with_retries(chain, input_vars, estimated_tokens)
+            error = self._schema_error(result)
+            if error is not None:
+                chain, retry_vars, estimated_tokens = self._build_correction(template, input_vars, error)
+                result = await self._ainvoke_with_retries(chain, retry_vars, estimated_tokens)
+            return self._finish_analysis(result, cache_key)
+
+        except Exception as e:
+            logging.error(f"Error in analyze_resume_async: {str(e)}")
+            return self._generate_error_response()
+
+    def build_batch_request(self, custom_id: str, resume_text: str, job_description: str = None,
+                            scoring_weights: Dict[str, float] = None, priority_order: List[str] = None,
+                            run: RankingRun = None) -> Dict:
+        """One Batch API request line evaluating resume_text, rendered like a live analyze_resume call."""
+        run = self._as_run(run, job_description, scoring_weights, priority_order, False)
+        template, input_vars, _ = self._prepare_analysis(resume_text, run)
+        return self._batch_request(custom_id, template, input_vars)
+
+    def _batch_request(self, custom_id: str, template: str, input_vars: Dict) -> Dict:
+        prompt, _ = self._get_chain(template, self.llm)
+        body = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt.format(**input_vars)}],
+            "temperature": 0.3,
+            "top_p": 1.0,
+            "n": 1
+        }
+        if Settings.STRUCTURED_OUTPUT:
+            body["response_format"] = _analysis_response_format()
+        return {"custom_id": custom_id, "method": "POST", "url": Settings.BATCH_ENDPOINT, "body": body}
+
+    def analyze_resumes_batch(self, resumes: Dict[str, str], job_description: str = None,
+                              scoring_weights: Dict[str, float] = None, priority_order: List[str] = None,
+                              transport: BatchTransport = None, force_refresh: bool = False,
+                              progress_callback: Callable[[int, int], None] = None,
+                              poll_interval: float = None, timeout: float = None,
+                              run: RankingRun = None) -> Dict[str, Dict]:
+        """Evaluate many resumes through the provider's Batch API instead of live calls.
+
+        resumes maps a caller-chosen id to resume text. Cached evaluations are
+        returned directly; the rest are written to JSONL batch files, submitted
+        through transport (OpenAI by default), polled until finished and parsed
+        with clean_llm_output. Ids whose request failed get the error response.
+        progress_callback(completed, total) is called whenever the count of
+        finished requests changes. run is as in analyze_resume.
+        """
+        run = self._as_run(run, job_description, scoring_weights, priority_order, force_refresh)
+        analyses: Dict[str, Dict] = {}
+        cache_keys: Dict[str, Optional[str]] = {}
+        requests: List[Dict] = []
+        for custom_id, resume_text in resumes.items():
+            template, input_vars, cache_key = self._prepare_analysis(resume_text, run)
+            cached = self._get_cached_analysis(cache_key, run.force_refresh)
+            if cached is not None:
+                analyses[custom_id] = cached
+                continue
+            requests.append(self._batch_request(custom_id, template, input_vars))
+            cache_keys[custom_id] = cache_key
+
+        if not requests:
+            return analyses
+        transport = transport or OpenAIBatchTransport(openai.OpenAI(api_key=self.openai_api_key))
+        logging.info(f"Submitting {len(requests)} evaluations as a batch ({len(analyses)} served from cache)")
+
+        batch_ids = [
+            self._submit_batch(transport, requests[i:i + Settings.BATCH_MAX_REQUESTS])
+            for i in range(0, len(requests), Settings.BATCH_MAX_REQUESTS)
+        ]
+        finished = 0
+        for batch_id in batch_ids:
+            status = self._wait_for_batch(
+                transport, batch_id, poll_interval, timeout,
+                lambda done: progress_callback(finished + done, len(requests)) if progress_callback else None
+            )
+            finished += status.get("completed", 0) + status.get("failed", 0)
+            for file_id in (status.get("output_file_id"), status.get("error_file_id")):
+                if file_id:
+                    for line in transport.download(file_id).splitlines():
+                        self._read_batch_output(line, cache_keys, analyses)
+
+        failed = [custom_id for custom_id in cache_keys if custom_id not in analyses]
+        if failed:
+            logging.error(f"{len(failed)} batch evaluations returned no result")
+        for custom_id in failed:
+            analyses[custom_id] = self._generate_error_response()
+        return analyses
+
+    def _submit_batch(self, transport: BatchTransport, requests: List[Dict]) -> str:
+        """Write requests to a JSONL file under BATCH_DIR, submit it and remove the local copy."""
+        os.makedirs(Settings.BATCH_DIR, exist_ok=True)
+        fd, batch_file = tempfile.mkstemp(prefix="batch-", suffix=".jsonl", dir=Settings.BATCH_DIR)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as batch_output:
+                for request in requests:
+                    batch_output.write(json.dumps(request, ensure_ascii=False) + "\n")
+            batch_id = transport.submit(batch_file, Settings.BATCH_ENDPOINT, {"model": self.model})
+        finally:
+            os.remove(batch_file)
+        logging.info(f"Submitted batch {batch_id} with {len(requests)} requests")
+        return batch_id
+
+    def _wait_for_batch(self, transport: BatchTransport, batch_id: str, poll_interval: Optional[float],
+                        timeout: Optional[float], on_progress: Callable[[int], None]) -> Dict:
+        """Poll batch_id until it reaches a terminal state; raise TimeoutError after timeout seconds."""
+        interval = Settings.BATCH_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        deadline = time.monotonic() + (Settings.BATCH_TIMEOUT_SECONDS if timeout is None else timeout)
+        last_done = -1
+        while True:
+            status = transport.status(batch_id)
+            done = status.get("completed", 0) + status.get("failed", 0)
+            if done != last_done:
+                logging.info(f"Batch {batch_id} {status['status']}: {done}/{status.get('total', 0)} requests done")
+                on_progress(done)
+                last_done = done
+            if status["status"] in TERMINAL_BATCH_STATUSES:
+                if status["status"] != "completed":
+                    logging.error(f"Batch {batch_id} ended as {status['status']}: {status.get('errors') or 'no details'}")
+                return status
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Batch {batch_id} still {status['status']} after waiting; it keeps running on the provider")
+            time.sleep(interval)
+
+    def _read_batch_output(self, line: str, cache_keys: Dict[str, Optional[str]], analyses: Dict[str, Dict]) -> None:
+        """Map one output or error line back to its request's analysis."""
+        if not line.strip():
+            return
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            logging.error(f"Unreadable batch output line: {line[:200]}")
+            return
+        custom_id = entry.get("custom_id")
+        if custom_id not in cache_keys:
+            logging.warning(f"Batch output for unknown request {custom_id}")
+            return
+        response = entry.get("response") or {}
+        body = response.get("body") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            logging.error(f"Batch request {custom_id} failed: {entry.get('error') or body.get('error')}")
+            return
+        self.usage.record_openai_usage(body.get("usage"))
+        try:
+            content = body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            logging.error(f"Batch response for {custom_id} has no message content")
+            return
+        analyses[custom_id] = self._finish_analysis(content or "", cache_keys[custom_id])
+
     def _generate_error_response(self):
-        """Generate a standardized error response"""
+        """Generate a standardized error response; failed marks it as not a real evaluation"""
         return {
+            "failed": True,
             "information": {},
             "evaluation": {
                 "total_score": 0,
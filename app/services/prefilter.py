@@ -0,0 +1,98 @@
+import re
+import time
+import logging
+from collections import Counter
+from typing import Dict, List, Optional
+import numpy as np
+from ..config.settings import Settings
+
+# Keeps technology names such as "c++", "c#", "node.js" and "asp.net" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+STOP_WORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could do does
+for from has have having he her his how i if in into is it its may more most must no not of on
+or our out over own same she should so some such than that the their them then there these they
+this those through to under up very was we were what when where which while who will with would
+you your years year experience work working role team ability strong plus etc
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens, trailing punctuation stripped."""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def bm25_scores(query: str, documents: List[str], k1: float = None, b: float = None) -> np.ndarray:
+    """Okapi BM25 relevance of every document to query, computed as one matrix operation.
+
+    Only the query's terms are counted, so the term-frequency matrix is
+    (documents x distinct query terms) however large the resumes are.
+    """
+    k1 = Settings.PREFILTER_BM25_K1 if k1 is None else k1
+    b = Settings.PREFILTER_BM25_B if b is None else b
+    terms = sorted(set(tokenize(query)) - STOP_WORDS)
+    if not terms or not documents:
+        return np.zeros(len(documents))
+
+    tf = np.empty((len(documents), len(terms)))
+    lengths = np.empty(len(documents))
+    for row, document in enumerate(documents):
+        tokens = tokenize(document)
+        counts = Counter(tokens)
+        tf[row] = [counts.get(term, 0) for term in terms]
+        lengths[row] = len(tokens)
+
+    doc_freq = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(documents) - doc_freq + 0.5) / (doc_freq + 0.5))
+    avg_length = lengths.mean() or 1.0
+    norm = k1 * (1 - b + b * lengths / avg_length)
+    return (tf * (k1 + 1) / (tf + norm[:, None])) @ idf
+
+
+class LexicalPrefilter:
+    """Cheap first-pass shortlist of parsed resumes before LLM scoring.
+
+    Scores every resume against the job description with BM25 and keeps the
+    top_k best and/or those whose score is at least min_score (a fraction of
+    the best resume's score). Resumes outside the shortlist are not sent to
+    the LLM at all.
+    """
+
+    def __init__(self, top_k: Optional[int] = None, min_score: Optional[float] = None):
+        if top_k is not None and top_k < 1:
+            raise ValueError("Pre-filter top_k must be at least 1")
+        if min_score is not None and not 0 <= min_score <= 1:
+            raise ValueError("Pre-filter min_score must be between 0 and 1")
+        self.top_k = top_k
+        self.min_score = min_score
+        self.last_stats: Dict = {}
+
+    def select(self, job_description: str, texts: Dict[str, str]) -> Dict[str, str]:
+        """Subset of texts (keyed as given) worth an LLM evaluation, best match first."""
+        start = time.perf_counter()
+        keys = list(texts)
+        scores = bm25_scores(job_description, [texts[key] for key in keys])
+        order = np.argsort(-scores, kind="stable")
+
+        best = scores.max() if len(scores) else 0.0
+        if best <= 0:
+            # Nothing in the job description matched; the scores cannot tell resumes apart
+            logging.warning("Pre-filter found no job description terms in any resume; keeping all resumes")
+        else:
+            if self.min_score is not None:
+                order = order[scores[order] / best >= self.min_score]
+            if self.top_k is not None:
+                order = order[:self.top_k]
+
+        selected = {keys[i]: texts[keys[i]] for i in order}
+        self.last_stats = {
+            "candidates": len(keys),
+            "shortlisted": len(selected),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        logging.info(
+            f"Pre-filter kept {len(selected)} of {len(keys)} resumes for LLM scoring "
+            f"in {self.last_stats['seconds']}s"
+        )
+        return selected
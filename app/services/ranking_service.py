@@ -1,128 +1,1178 @@
-from typing import List, Dict
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple
 import pandas as pd
+import numpy as np
 import logging
-from ..parsers.pypdf_parser import PyPDFParser
-from ..parsers.llama_parser import LlamaParser
-from ..parsers.docx_parser import DocxParser
+from ..parsers.resume_parser import ResumeParser, needs_fallback, parse_resume_bytes, parse_resume_file
+from ..parsers.base_parser import DocumentData
+from ..parsers.cached_parser import get_parse_cache
 from .llm_service import LLMService
+from .batch_transport import BatchTransport
+from .prefilter import LexicalPrefilter
+from .deduplication import DuplicateDetector
+from .usage_tracker import UsageTracker, usage_cost
+from .run_journal import RunJournal, open_run_journal, run_metadata
 from ..config.settings import Settings
+from ..models.ranking_run import RankingRun
+from ..utils.text_normalizer import ResumeNormalizer
 import time
 import os
 import glob
+import queue
+import asyncio
+import itertools
+import threading
+import multiprocessing
 import concurrent.futures
 logging.basicConfig(level=logging.INFO)
 
 
 class RankingService:
+    RESULT_COLUMNS = [
+        'Rank',
+        'name',
+        'total_score',
+        *Settings.SCORE_CRITERIA,
+        'total_professional_experience',
+        'total_relevant_experience',
+        'skills',
+        'email',
+        'phone',
+        'location_info',
+        'File',
+        'processing_time',
+        'scored_by',
+        'duplicate_of'
+    ]
+
     def __init__(self, model: str,
                  scoring_weights: Dict[str, float] = None,
-                 ranking_priority: List[str] = None):
+                 ranking_priority: List[str] = None,
+                 force_rescore: bool = False,
+                 prefilter_top_k: int = None,
+                 prefilter_min_score: float = None,
+                 triage_model: str = None,
+                 cascade_top_n: int = None,
+                 cascade_margin: float = None,
+                 dedupe: bool = False,
+                 dedupe_threshold: float = None):
+        self.model = model
         self.llm_service = LLMService(model)
+        # Defaults for runs that do not pass their own (see new_run)
         self.scoring_weights = scoring_weights or Settings.DEFAULT_WEIGHTS
         self.ranking_priority = ranking_priority or Settings.DEFAULT_PRIORITY
+        self.force_rescore = force_rescore  # Bypass cached evaluations
+        # Optional lexical shortlist; only resumes it keeps are sent to the LLM
+        self.prefilter = (
+            LexicalPrefilter(prefilter_top_k, prefilter_min_score)
+            if prefilter_top_k is not None or prefilter_min_score is not None else None
+        )
+        # Two-tier cascade: triage_model scores everything, model re-scores the contested band
+        self.triage_model = triage_model
+        self.triage_service = LLMService(triage_model) if triage_model else None
+        self.cascade_top_n = cascade_top_n or Settings.CASCADE_TOP_N
+        self.cascade_margin = Settings.CASCADE_MARGIN if cascade_margin is None else cascade_margin
+        # Near-duplicate clusters are evaluated once and the result is copied to every member
+        self.deduplicator = DuplicateDetector(dedupe_threshold) if dedupe else None
+        # Cleans parsed text and enforces the resume token budget before prompting
+        self.normalizer = ResumeNormalizer(model)
+        self.normalize_text = Settings.NORMALIZE_RESUME_TEXT
+        # Default example good resumes; runs can pass their own
         self.example_good_dir = None
+        # In-memory alternative to example_good_dir: (file name, bytes) pairs
+        self.example_good_documents = None
+        # Statistics of the most recently finished run; concurrent runs overwrite each other
+        self.last_run_usage = {}
+        self.last_run_prefilter = {}
+        self.last_run_cascade = {}
+        self.last_run_normalization = {}
+        self.last_run_dedupe = {}
         self._initialize_parsers()
 
     def _initialize_parsers(self):
-        self.pdf_parser = PyPDFParser()
-        self.docx_parser = DocxParser()
-        self.llama_parser = LlamaParser()
+        # PyPDF failures are collected and sent to LlamaParse in batches (see _resolve_fallbacks)
+        self.resume_parser = ResumeParser(fallback=False)
 
-    def process_resumes(self, resume_dir: str, job_description: str) -> pd.DataFrame:
-        overall_start_time = time.time()
-        
+    def new_run(self, job_description: str, scoring_weights: Dict[str, float] = None,
+                ranking_priority: List[str] = None, force_rescore: bool = None) -> RankingRun:
+        """Settings for one run; anything not given falls back to this service's defaults."""
+        return RankingRun(
+            job_description=job_description or "",
+            scoring_weights=scoring_weights or self.scoring_weights,
+            ranking_priority=ranking_priority or self.ranking_priority,
+            force_refresh=self.force_rescore if force_rescore is None else force_rescore
+        )
+
+    def _find_resume_files(self, resume_dir: str, recursive: bool = False) -> List[str]:
+        """List supported resume files in resume_dir (and its subdirectories if recursive)."""
+        base = os.path.join(resume_dir, "**") if recursive else resume_dir
+        file_patterns = [
+            os.path.join(base, "*.pdf"),
+            os.path.join(base, "*.docx"),
+            os.path.join(base, "*.doc")
+        ]
+
+        all_files = []
+        for pattern in file_patterns:
+            all_files.extend(glob.glob(pattern, recursive=recursive))
+        return all_files
+
+    def _select_files(self, resume_dir: str, recursive: bool = False,
+                      skip_files: Set[str] = None) -> List[str]:
+        """Resume files of a run: those in resume_dir whose relative path is not in skip_files."""
+        all_files = self._find_resume_files(resume_dir, recursive)
+        if skip_files:
+            all_files = [f for f in all_files if os.path.relpath(f, resume_dir) not in skip_files]
+        if not all_files:
+            logging.warning("No resumes found in the specified directory")
+        return all_files
+
+    def _log_run_stats(self, usage_snapshot: Dict, triage_snapshot: Dict = None,
+                       normalize_snapshot: Dict = None):
+        """Log cache effectiveness, API token usage (incl. prefix-cache hit ratio) and
+        tokens saved by text normalization for a run."""
+        self.last_run_usage = self.llm_service.usage.log_summary(usage_snapshot)
+        if normalize_snapshot is not None:
+            self.last_run_normalization = self.normalizer.since(normalize_snapshot)
+            stats = self.last_run_normalization
+            logging.info(
+                f"Text normalization saved {stats['tokens_saved']} of {stats['tokens_before']} resume tokens "
+                f"({stats['saved_ratio']:.1%}, {stats['avg_tokens_saved']} per resume, "
+                f"{stats['truncated']} cut to the {self.normalizer.max_tokens}-token budget)"
+            )
+        if triage_snapshot is not None:
+            triage_usage = self.triage_service.usage.log_summary(
+                triage_snapshot, label=f"Triage ({self.triage_model}) usage"
+            )
+            self.last_run_cascade.update(self._cascade_savings(triage_usage, self.last_run_usage))
+            self.last_run_usage = UsageTracker.summarize({
+                field: triage_usage[field] + self.last_run_usage[field] for field in UsageTracker.FIELDS
+            })
+        if Settings.PARSE_CACHE_ENABLED:
+            logging.info(f"Parse cache stats: {get_parse_cache().stats()}")
+        if self.llm_service.evaluation_cache is not None:
+            logging.info(f"Evaluation cache stats: {self.llm_service.evaluation_cache.stats()}")
+
+    def process_resumes(self, resume_dir: str, job_description: str,
+                        progress_callback: Callable[[int, int], None] = None,
+                        parse_workers: int = None, llm_workers: int = None,
+                        recursive: bool = False, run_id: str = None, **run_options) -> pd.DataFrame:
+        """Ranked results of iter_resumes; run_options are its per-run settings."""
         if not os.path.exists(resume_dir):
             logging.error(f"Resume directory not found: {resume_dir}")
             return pd.DataFrame()
             
         try:
-            # First, analyze good resumes if provided
-            if self.example_good_dir:
-                logging.info("Processing sample good resumes first...")
-                self.llm_service.analyze_example_resumes(
-                    good_resumes_dir=self.example_good_dir,
-                    job_description=job_description
-                )
-                logging.info("Completed analyzing good resumes")
-            
-            # Process candidate resumes
-            file_patterns = [
-                os.path.join(resume_dir, "*.pdf"),
-                os.path.join(resume_dir, "*.docx"),
-                os.path.join(resume_dir, "*.doc")
-            ]
-
-            all_files = []
-            for pattern in file_patterns:
-                all_files.extend(glob.glob(pattern))
-
-            if not all_files:
-                logging.warning("No resumes found in the specified directory")
-                return pd.DataFrame()
-
-            results = []
-            # Use ThreadPoolExecutor for parallel processing
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                # Submit all resume processing tasks
-                future_to_file = {
-                    executor.submit(self._process_single_resume, file_path, job_description, overall_start_time): file_path
-                    for file_path in all_files
-                }
-                for future in concurrent.futures.as_completed(future_to_file):
-                    file_path = future_to_file[future]
-                    try:
-                        result = future.result()
-                        if result:
-                            results.append(result)
-                    except Exception as e:
-                        logging.error(f"Error processing {file_path}: {str(e)}")
-                        continue
+            results = list(self.iter_resumes(
+                resume_dir, job_description, progress_callback, parse_workers, llm_workers,
+                recursive=recursive, run_id=run_id, **run_options
+            ))
 
             # Create and return results DataFrame
-            return self._create_results_dataframe(results)
+            return self._create_results_dataframe(results, run_options.get("ranking_priority"))
             
         except Exception as e:
             logging.error(f"Error in process_resumes: {str(e)}")
             return pd.DataFrame()
 
-    def _process_single_resume(self, file_path: str, job_description: str, overall_start_time: float):
-        logging.info(f"Processing resume: {file_path}")
+    def iter_resumes(self, resume_dir: str, job_description: str,
+                     progress_callback: Callable[[int, int], None] = None,
+                     parse_workers: int = None, llm_workers: int = None,
+                     recursive: bool = False, skip_files: Set[str] = None,
+                     run_id: str = None, scoring_weights: Dict[str, float] = None, ranking_priority: List[str] = None,
+                     force_rescore: bool = None, example_good_dir: str = None,
+                     example_good_documents: List[Tuple[str, DocumentData]] = None) -> Iterator[Dict]:
+        """Yield each scored candidate as soon as its evaluation completes.
+
+        scoring_weights, ranking_priority, force_rescore and the example good
+        resumes (example_good_dir, or example_good_documents as (file name,
+        bytes) pairs) apply to this run only; anything not given falls back to
+        the service's defaults, so one service can run differently configured
+        rankings.
+
+        Parsing and LLM calls run as separate stages: a process pool of
+        parse_workers processes (0 parses on a thread with this service's own
+        resume_parser) feeds a bounded queue drained by llm_workers threads.
+        progress_callback(completed, total) is called from the consuming thread
+        after every resume, including ones that failed and yield nothing.
+        Each row's File is its path relative to resume_dir; files listed in
+        skip_files (same form) are not processed again.
+
+        With a run_id, every result is appended to that run's journal. Rerunning
+        with the same run_id yields the journaled results first and only
+        processes the remaining files.
+
+        With a prefilter, every file is parsed first and only the shortlisted
+        resumes are evaluated; progress totals count the shortlist.
+
+        With a triage_model, scoring runs as a cascade (see _run_cascade) and
+        progress is reported once per tier.
+
+        With dedupe, every file is parsed first and only one resume per
+        near-duplicate cluster is evaluated; the other members get a copy of
+        its row with duplicate_of set. Progress totals count the clusters.
+        """
+        overall_start_time = time.time()
+        usage_snapshot = self.llm_service.usage.snapshot()
+        normalize_snapshot = self.normalizer.snapshot()
+        triage_snapshot = self.triage_service.usage.snapshot() if self.triage_service else None
+        run = self.new_run(job_description, scoring_weights, ranking_priority, force_rescore)
+
+        if not os.path.exists(resume_dir):
+            logging.error(f"Resume directory not found: {resume_dir}")
+            return
+
+        # First, analyze good resumes if provided
+        run = self._analyze_examples(run, example_good_dir, example_good_documents)
         
-        # Parse content
-        content = None
-        if file_path.lower().endswith('.pdf'):
+        # Process candidate resumes
+        all_files = self._select_files(resume_dir, recursive, skip_files)
+        if not all_files:
+            return
+
+        yield from self._score(
+            all_files, None, resume_dir, run, overall_start_time,
+            progress_callback, parse_workers, llm_workers, run_id
+        )
+        self._log_run_stats(usage_snapshot, triage_snapshot, normalize_snapshot)
+
+    def process_documents(self, documents: Iterable[Tuple[str, DocumentData]], job_description: str,
+                          progress_callback: Callable[[int, int], None] = None,
+                          parse_workers: int = None, llm_workers: int = None,
+                          run_id: str = None, **run_options) -> pd.DataFrame:
+        """In-memory counterpart of process_resumes; see iter_documents."""
+        try:
+            results = list(self.iter_documents(
+                documents, job_description, progress_callback, parse_workers, llm_workers,
+                run_id=run_id, **run_options
+            ))
+            return self._create_results_dataframe(results, run_options.get("ranking_priority"))
+        except Exception as e:
+            logging.error(f"Error in process_documents: {str(e)}")
+            return pd.DataFrame()
+
+    def iter_documents(self, documents: Iterable[Tuple[str, DocumentData]], job_description: str,
+                       progress_callback: Callable[[int, int], None] = None,
+                       parse_workers: int = None, llm_workers: int = None,
+                       skip_files: Set[str] = None, run_id: str = None,
+                       scoring_weights: Dict[str, float] = None, ranking_priority: List[str] = None,
+                       force_rescore: bool = None, example_good_dir: str = None,
+                       example_good_documents: List[Tuple[str, DocumentData]] = None) -> Iterator[Dict]:
+        """Score resumes held in memory, e.g. uploads, without writing them to disk.
+
+        documents are (file name, bytes or memoryview) pairs; each is parsed
+        from an in-memory buffer and its row's File is the file name.
+        Otherwise this behaves like iter_resumes (per-run settings, journal,
+        pre-filter, cascade, dedupe): documents stream through the same parse
+        and LLM stages, and are only all parsed up front when a stage needs
+        every text.
+        """
+        overall_start_time = time.time()
+        usage_snapshot = self.llm_service.usage.snapshot()
+        normalize_snapshot = self.normalizer.snapshot()
+        triage_snapshot = self.triage_service.usage.snapshot() if self.triage_service else None
+        run = self.new_run(job_description, scoring_weights, ranking_priority, force_rescore)
+
+        run = self._analyze_examples(run, example_good_dir, example_good_documents)
+
+        documents = self._collect_documents(documents)
+        if skip_files:
+            documents = {name: data for name, data in documents.items() if name not in skip_files}
+        if not documents:
+            logging.warning("No resumes were provided")
+            return
+
+        yield from self._score(
+            list(documents), None, os.curdir, run, overall_start_time,
+            progress_callback, parse_workers, llm_workers, run_id, documents
+        )
+        self._log_run_stats(usage_snapshot, triage_snapshot, normalize_snapshot)
+
+    def _analyze_examples(self, run: RankingRun, example_good_dir: str = None,
+                          example_good_documents: List[Tuple[str, DocumentData]] = None) -> RankingRun:
+        """run with the ideal characteristics of its example good resumes, when any were given.
+
+        Without examples for the run, the service's default examples are used.
+        """
+        if not example_good_dir and not example_good_documents:
+            example_good_dir, example_good_documents = self.example_good_dir, self.example_good_documents
+        if not example_good_dir and not example_good_documents:
+            return run
+        logging.info("Processing sample good resumes first...")
+        characteristics = self.llm_service.analyze_example_resumes(
+            good_resumes_dir=example_good_dir,
+            job_description=run.job_description,
+            good_resumes=example_good_documents,
+            force_refresh=run.force_refresh
+        )
+        logging.info("Completed analyzing good resumes")
+        return run.model_copy(update={"good_characteristics": tuple(characteristics or ())})
+
+    def _score(self, all_files: List[str], texts: Optional[Dict[str, str]], resume_dir: str,
+               run: RankingRun, overall_start_time: float,
+               progress_callback: Optional[Callable[[int, int], None]],
+               parse_workers: Optional[int], llm_workers: Optional[int],
+               run_id: Optional[str],
+               documents: Optional[Dict[str, DocumentData]] = None) -> Iterator[Dict]:
+        """Run dedupe, pre-filter and the cascade or plain pipeline over all_files.
+
+        texts holds already parsed resumes by file path; without it, files are
+        parsed here (up front only when a stage needs every text). With
+        documents, all_files are names of in-memory documents parsed from it.
+        """
+        journal = self._open_journal(run_id, run) if run_id else None
+        try:
+            all_files, texts, duplicates = self._select_texts(all_files, texts, run, parse_workers, documents)
+            if self.triage_service is not None:
+                results = self._run_cascade(
+                    all_files, texts, resume_dir, run, overall_start_time,
+                    progress_callback, llm_workers, journal
+                )
+            else:
+                results = self._run_pipeline(
+                    all_files, resume_dir, run, overall_start_time,
+                    progress_callback, parse_workers, llm_workers, journal, texts,
+                    documents=documents
+                )
+            yield from self._fan_out(results, duplicates, resume_dir, journal, run.force_refresh)
+        finally:
+            if journal is not None:
+                journal.close()
+
+    def _select_texts(self, all_files: List[str], texts: Optional[Dict[str, str]], run: RankingRun,
+                      parse_workers: Optional[int],
+                      documents: Optional[Dict[str, DocumentData]] = None
+                      ) -> Tuple[List[str], Optional[Dict[str, str]], Dict[str, List[str]]]:
+        """Apply dedupe and the pre-filter, parsing every file first when they or the cascade need it.
+
+        Returns the files left to evaluate, their texts (None when no stage
+        needed them all) and the near-duplicate map of _deduplicate.
+        """
+        duplicates = {}
+        if self.prefilter is None and self.triage_service is None and self.deduplicator is None:
+            return all_files, texts, duplicates
+        if texts is None:
+            texts = (self._parse_documents(documents, parse_workers) if documents is not None
+                     else self._parse_all(all_files, parse_workers))
+        if self.deduplicator is not None:
+            texts, duplicates = self._deduplicate(texts)
+        if self.prefilter is not None:
+            texts = self._shortlist(texts, run.job_description)
+        return list(texts), texts, duplicates
+
+    def _open_journal(self, run_id: str, run: RankingRun) -> RunJournal:
+        model = f"{self.triage_model}>{self.model}" if self.triage_model else self.model
+        return open_run_journal(
+            run_id,
+            run_metadata(model, run.job_description, run.scoring_weights, run.ranking_priority,
+                         run.good_characteristics)
+        )
+
+    @staticmethod
+    def _record(journal: Optional[RunJournal], file_key: str, result: Dict) -> None:
+        """Journal a finished result; rows from a failed evaluation are left for the next run."""
+        if journal is not None and not result.get('failed'):
+            journal.record(file_key, result)
+
+    def _run_cascade(self, all_files: List[str], texts: Dict[str, str], resume_dir: str,
+                     run: RankingRun, overall_start_time: float,
+                     progress_callback: Optional[Callable[[int, int], None]],
+                     llm_workers: Optional[int], journal: Optional[RunJournal]) -> Iterator[Dict]:
+        """Score every resume with the triage model, then re-score the contested band with self.model.
+
+        The band is the cascade_top_n best triage scores plus anyone within
+        cascade_margin points of the N-th score. Results are yielded only once
+        final: triage rows outside the band after triage, band rows as the
+        strong model finishes them. Journaled results are final and skipped.
+        When no more than cascade_top_n resumes are left, all of them would be
+        in the band, so triage is skipped and self.model scores them directly.
+        """
+        done, pending = self._cascade_pending(all_files, resume_dir, run, journal)
+        if len(pending) <= self.cascade_top_n:
+            self._start_cascade(0, len(pending), 0.0)
+            final_start = time.time()
+            yield from self._run_pipeline(
+                all_files, resume_dir, run, overall_start_time,
+                progress_callback, None, llm_workers, journal, texts
+            )
+            self.last_run_cascade["final_seconds"] = round(time.time() - final_start, 2)
+            return
+        triage_start = time.time()
+        triaged = list(self._run_pipeline(
+            pending, resume_dir, run, overall_start_time,
+            progress_callback, None, llm_workers, None, texts, triage=True
+        ))
+        settled, finalists = self._split_band(triaged, all_files, resume_dir, done, triage_start)
+        for result in settled:
+            self._record(journal, result['File'], result)
+            yield result
+
+        final_start = time.time()
+        yield from self._run_pipeline(
+            finalists, resume_dir, run, overall_start_time,
+            progress_callback, None, llm_workers, journal, texts
+        )
+        self.last_run_cascade["final_seconds"] = round(time.time() - final_start, 2)
+
+    @staticmethod
+    def _cascade_pending(all_files: List[str], resume_dir: str, run: RankingRun,
+                         journal: Optional[RunJournal]) -> Tuple[Set[str], List[str]]:
+        """File keys the journal already holds, and the files still to triage."""
+        done = set(journal.completed()) if journal is not None and not run.force_refresh else set()
+        return done, [f for f in all_files if os.path.relpath(f, resume_dir) not in done]
+
+    def _start_cascade(self, triaged: int, rescored: int, triage_seconds: float) -> None:
+        """Reset last_run_cascade for a run that triaged triaged resumes and re-scores rescored of them."""
+        self.last_run_cascade = {
+            "triage_model": self.triage_model,
+            "model": self.model,
+            "triaged": triaged,
+            "rescored": rescored,
+            "triage_seconds": triage_seconds,
+        }
+        if triaged:
+            logging.info(
+                f"Cascade: {rescored} of {triaged} triaged resumes are in the contested band "
+                f"and go to {self.model}"
+            )
+        else:
+            logging.info(f"Cascade: {rescored} resumes fit in the contested band; skipping triage")
+
+    def _split_band(self, triaged: List[Dict], all_files: List[str], resume_dir: str,
+                    done: Set[str], triage_start: float) -> Tuple[List[Dict], List[str]]:
+        """Split triaged results into final ones outside the contested band and the files self.model scores.
+
+        The files are the band plus journaled files, which the final pipeline replays.
+        """
+        contested = self._contested_band(triaged)
+        self._start_cascade(len(triaged), len(contested), round(time.time() - triage_start, 2))
+        settled = [result for result in triaged if result['File'] not in contested]
+        finalists = [f for f in all_files if os.path.relpath(f, resume_dir) in done or
+                     os.path.relpath(f, resume_dir) in contested]
+        return settled, finalists
+
+    def _contested_band(self, results: List[Dict]) -> Set[str]:
+        """File keys of results whose triage score is close enough to the cutoff to re-score."""
+        if len(results) <= self.cascade_top_n:
+            return {result['File'] for result in results}
+        scores = np.array([float(result.get('total_score') or 0) for result in results])
+        cutoff = np.sort(scores)[::-1][self.cascade_top_n - 1]
+        return {result['File'] for result, score in zip(results, scores) if score >= cutoff - self.cascade_margin}
+
+    def _cascade_savings(self, triage_usage: Dict, final_usage: Dict) -> Dict:
+        """Estimate cost and model time saved against scoring every triaged resume with self.model.
+
+        The triage calls are re-priced at self.model's rates (same prompts, similar
+        completions); latency is the summed per-call latency, i.e. model time
+        rather than wall-clock time. Runs that skipped triage cost the same
+        either way.
+        """
+        # Every resume of the run was either triaged or, without triage, scored by self.model
+        baseline = triage_usage if triage_usage["calls"] else final_usage
+        cost = usage_cost(triage_usage, self.triage_model) + usage_cost(final_usage, self.model)
+        cost_without = usage_cost(baseline, self.model)
+        savings = {
+            "cost": round(cost, 4),
+            "cost_without_cascade": round(cost_without, 4),
+            "cost_saved": round(cost_without - cost, 4),
+        }
+        if final_usage["calls"]:
+            latency = triage_usage["latency"] + final_usage["latency"]
+            latency_without = baseline["calls"] * final_usage["latency"] / final_usage["calls"]
+            savings.update({
+                "latency": round(latency, 2),
+                "latency_without_cascade": round(latency_without, 2),
+                "latency_saved": round(latency_without - latency, 2),
+            })
+        logging.info(f"Cascade savings: {savings}")
+        return savings
+
+    def _run_pipeline(self, all_files: List[str], resume_dir: str, run: RankingRun,
+                      overall_start_time: float, progress_callback: Optional[Callable[[int, int], None]],
+                      parse_workers: Optional[int], llm_workers: Optional[int],
+                      journal: Optional[RunJournal],
+                      texts: Optional[Dict[str, str]] = None,
+                      triage: bool = False,
+                      documents: Optional[Dict[str, DocumentData]] = None) -> Iterator[Dict]:
+        """Replay journaled results, then parse and evaluate the remaining files.
+
+        texts holds already parsed resumes by file path; when given, nothing is
+        parsed again and the LLM stage is fed from it. documents holds the
+        in-memory data of all_files when they are not on disk. triage
+        evaluates with the cascade's triage model.
+        """
+        total = len(all_files)
+        completed = 0
+        replayed, all_files = self._split_journaled(all_files, resume_dir, run, journal)
+        for result in replayed:
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total)
+            yield result
+
+        if not all_files:
+            logging.info("All resumes in the directory were already processed")
+            return
+
+        parsed = queue.Queue(maxsize=Settings.PARSE_QUEUE_SIZE)
+        finished = queue.Queue()
+        stop = threading.Event()
+        worker_count = max(1, min(llm_workers or Settings.LLM_WORKERS, len(all_files)))
+
+        if texts is None:
+            parse_executor = self._create_parse_executor(len(all_files), parse_workers)
+            stages = [threading.Thread(
+                target=self._parse_stage,
+                args=(all_files, parse_executor, parsed, finished, worker_count, stop, documents),
+                name="resume-parse", daemon=True
+            )]
+        else:
+            parse_executor = None
+            stages = [threading.Thread(
+                target=self._feed_stage,
+                args=([(file_path, texts[file_path]) for file_path in all_files], parsed, worker_count, stop),
+                name="resume-feed", daemon=True
+            )]
+        stages += [
+            threading.Thread(
+                target=self._llm_stage,
+                args=(parsed, finished, run, resume_dir, overall_start_time, stop, triage),
+                name=f"resume-llm-{i}", daemon=True
+            )
+            for i in range(worker_count)
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            # Every file produces exactly one item on the finished queue
+            for _ in all_files:
+                result = finished.get()
+                completed += 1
+                if result:
+                    self._record(journal, result['File'], result)
+                if progress_callback:
+                    progress_callback(completed, total)
+                if result:
+                    yield result
+        finally:
+            # Stop both stages if the consumer stops iterating early
+            stop.set()
+            if parse_executor is not None:
+                parse_executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _split_journaled(all_files: List[str], resume_dir: str, run: RankingRun,
+                         journal: Optional[RunJournal]) -> Tuple[List[Dict], List[str]]:
+        """Journaled results among all_files, and the files still to evaluate."""
+        if journal is None or run.force_refresh:
+            return [], all_files
+        done = journal.completed()
+        replayed = [done[key] for key in (os.path.relpath(f, resume_dir) for f in all_files) if key in done]
+        remaining = [f for f in all_files if os.path.relpath(f, resume_dir) not in done]
+        if replayed:
+            logging.info(f"Run journal has {len(replayed)} finished resumes; {len(remaining)} left")
+        return replayed, remaining
+
+    def _parse_stage(self, files: List[str], parse_executor: Optional[concurrent.futures.Executor],
+                     parsed: queue.Queue, finished: queue.Queue, llm_workers: int,
+                     stop: threading.Event, documents: Optional[Dict[str, DocumentData]] = None):
+        """Parse resumes (from documents, when given) and queue their text for the LLM stage.
+
+        At most PARSE_QUEUE_SIZE parse jobs are submitted ahead of the queue, so
+        parsed text never piles up faster than the LLM workers take it. PDFs
+        PyPDF cannot read are set aside and sent to LlamaParse as one batch
+        once everything else is parsed. If the stage fails, every file not
+        handed off yet is reported as done, so the consumer never waits for it.
+        """
+        deferred = []
+        handed_off = set()
+        try:
+            for file_path, content in self._parse_files(files, parse_executor, stop, documents):
+                if needs_fallback(file_path, content):
+                    deferred.append(file_path)
+                    continue
+                if not self._hand_off(file_path, content, parsed, finished, stop):
+                    return
+                handed_off.add(file_path)
+            if deferred and not stop.is_set():
+                fallback = (
+                    self.resume_parser.parse_fallback_bytes({name: documents[name] for name in deferred})
+                    if documents is not None else self.resume_parser.parse_fallback(deferred)
+                )
+                for file_path in deferred:
+                    if not self._hand_off(file_path, fallback.get(file_path), parsed, finished, stop):
+                        return
+                    handed_off.add(file_path)
+        except Exception as e:
+            if not stop.is_set():
+                logging.error(f"Parse stage failed: {str(e)}")
+                for file_path in files:
+                    if file_path not in handed_off:
+                        finished.put(None)
+        finally:
+            # One sentinel per LLM worker
+            for _ in range(llm_workers):
+                self._put(parsed, None, stop)
+
+    def _parse_files(self, files: List[str], parse_executor: Optional[concurrent.futures.Executor],
+                     stop: threading.Event,
+                     documents: Optional[Dict[str, DocumentData]] = None) -> Iterator[tuple]:
+        """Yield (file_path, content) without the LlamaParse fallback, in completion order."""
+        if parse_executor is None:
+            for file_path in files:
+                if stop.is_set():
+                    return
+                try:
+                    if documents is not None:
+                        content = self.resume_parser.parse_bytes(file_path, documents[file_path])
+                    else:
+                        content = self.resume_parser.parse(file_path)
+                except Exception as parse_error:
+                    logging.error(f"Error parsing {file_path}: {str(parse_error)}")
+                    content = None
+                yield file_path, content
+            return
+
+        remaining = iter(files)
+        pending = {}
+        while not stop.is_set():
+            for file_path in itertools.islice(remaining, Settings.PARSE_QUEUE_SIZE - len(pending)):
+                if documents is not None:
+                    # memoryviews cannot be pickled to worker processes; bytes can
+                    future = parse_executor.submit(parse_resume_bytes, file_path, bytes(documents[file_path]), False)
+                else:
+                    future = parse_executor.submit(parse_resume_file, file_path, False)
+                pending[future] = file_path
+            if not pending:
+                return
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                file_path = pending.pop(future)
+                try:
+                    content = future.result()
+                except Exception as parse_error:
+                    logging.error(f"Error parsing {file_path}: {str(parse_error)}")
+                    content = None
+                yield file_path, content
+
+    def _feed_stage(self, items: List[tuple], parsed: queue.Queue, llm_workers: int,
+                    stop: threading.Event):
+        """Queue already parsed (file_path, text) pairs for the LLM stage."""
+        try:
+            for item in items:
+                if not self._put(parsed, item, stop):
+                    return
+        finally:
+            for _ in range(llm_workers):
+                self._put(parsed, None, stop)
+
+    def _hand_off(self, file_path: str, content: Optional[Dict], parsed: queue.Queue,
+                  finished: queue.Queue, stop: threading.Event) -> bool:
+        """Queue parsed text for evaluation, or report an unreadable file as done."""
+        resume_text = self._extract_resume_text(file_path, content)
+        if resume_text is None:
+            finished.put(None)
+            return True
+        return self._put(parsed, (file_path, resume_text), stop)
+
+    @staticmethod
+    def _put(target: queue.Queue, item, stop: threading.Event) -> bool:
+        """Block until item is queued; give up (returning False) once stop is set."""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _llm_stage(self, parsed: queue.Queue, finished: queue.Queue, run: RankingRun,
+                   resume_dir: str, overall_start_time: float, stop: threading.Event,
+                   triage: bool = False):
+        """Evaluate parsed resumes until the parse stage sends its sentinel."""
+        while not stop.is_set():
+            try:
+                item = parsed.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            file_path, resume_text = item
             try:
-                # Always use hybrid mode
+                result = self._evaluate_resume(
+                    file_path, resume_text, run, overall_start_time, resume_dir, triage
+                )
+            except Exception as e:
+                logging.error(f"Error processing {file_path}: {str(e)}")
+                result = None
+            finished.put(result)
+
+    def process_resumes_batch(self, resume_dir: str, job_description: str,
+                              transport: BatchTransport = None, **kwargs) -> pd.DataFrame:
+        """Ranked results of score_resumes_batch (see there for the arguments)."""
+        if not os.path.exists(resume_dir):
+            logging.error(f"Resume directory not found: {resume_dir}")
+            return pd.DataFrame()
+        return self._create_results_dataframe(
+            self.score_resumes_batch(resume_dir, job_description, transport, **kwargs),
+            kwargs.get("ranking_priority")
+        )
+
+    def score_resumes_batch(self, resume_dir: str, job_description: str,
+                            transport: BatchTransport = None,
+                            progress_callback: Callable[[int, int], None] = None,
+                            parse_workers: int = None, recursive: bool = False,
+                            skip_files: Set[str] = None, poll_interval: float = None,
+                            timeout: float = None, scoring_weights: Dict[str, float] = None,
+                            ranking_priority: List[str] = None, force_rescore: bool = None,
+                            example_good_dir: str = None,
+                            example_good_documents: List[Tuple[str, DocumentData]] = None) -> List[Dict]:
+        """Score every resume through the LLM provider's Batch API.
+
+        All files are parsed first, then evaluated as one asynchronous batch:
+        cheaper than live calls but it may take hours to finish, so it suits
+        large overnight runs. progress_callback(completed, total) reports
+        finished batch requests. Rows use the same File keys as iter_resumes,
+        and the per-run settings are the same.
+        """
+        overall_start_time = time.time()
+        usage_snapshot = self.llm_service.usage.snapshot()
+        normalize_snapshot = self.normalizer.snapshot()
+        run = self.new_run(job_description, scoring_weights, ranking_priority, force_rescore)
+
+        run = self._analyze_examples(run, example_good_dir, example_good_documents)
+
+        all_files = self._select_files(resume_dir, recursive, skip_files)
+        if not all_files:
+            return []
+
+        if self.triage_service is not None:
+            logging.warning("Batch runs score every resume with the main model; the triage cascade is not applied")
+        texts = self._parse_all(all_files, parse_workers)
+        duplicates = {}
+        if self.deduplicator is not None:
+            texts, duplicates = self._deduplicate(texts)
+        if self.prefilter is not None:
+            texts = self._shortlist(texts, run.job_description)
+        analyses = self.llm_service.analyze_resumes_batch(
+            {os.path.relpath(file_path, resume_dir): text for file_path, text in texts.items()},
+            transport=transport,
+            progress_callback=progress_callback,
+            poll_interval=poll_interval,
+            timeout=timeout,
+            run=run
+        )
+        results = []
+        for file_path in texts:
+            result = self._build_result(
+                file_path, analyses.get(os.path.relpath(file_path, resume_dir)), overall_start_time, resume_dir
+            )
+            if result:
+                results.append(result)
+        results = list(self._fan_out(results, duplicates, resume_dir))
+
+        self._log_run_stats(usage_snapshot, normalize_snapshot=normalize_snapshot)
+        return results
+
+    def _parse_all(self, files: List[str], parse_workers: int = None) -> Dict[str, str]:
+        """Parse every file before any evaluation starts; unreadable files are left out."""
+        contents = {}
+        parse_executor = self._create_parse_executor(len(files), parse_workers)
+        if parse_executor is None:
+            for file_path in files:
                 try:
-                    content = self.pdf_parser.parse(file_path)
-                    if not content or not content.get("content") or not content.get("content").strip():
-                        logging.warning(f"PyPDF parser failed for {file_path}, trying LlamaParse")
-                        content = self.llama_parser.parse(file_path)
-                except Exception as pdf_error:
-                    logging.error(f"PyPDF parser error: {str(pdf_error)}, falling back to LlamaParse")
-                    content = self.llama_parser.parse(file_path)
-            except Exception as parse_error:
-                logging.error(f"Error parsing {file_path}: {str(parse_error)}")
-                return None
+                    contents[file_path] = self.resume_parser.parse(file_path)
+                except Exception as parse_error:
+                    logging.error(f"Error parsing {file_path}: {str(parse_error)}")
         else:
-            try:
-                content = self.docx_parser.parse(file_path)
-            except Exception as docx_error:
-                logging.error(f"Error parsing {file_path}: {str(docx_error)}")
+            with parse_executor:
+                futures = [(file_path, parse_executor.submit(parse_resume_file, file_path, False))
+                           for file_path in files]
+                for file_path, future in futures:
+                    try:
+                        contents[file_path] = future.result()
+                    except Exception as parse_error:
+                        logging.error(f"Error parsing {file_path}: {str(parse_error)}")
+        self._resolve_fallbacks(contents)
+
+        texts = {}
+        for file_path, content in contents.items():
+            resume_text = self._extract_resume_text(file_path, content)
+            if resume_text is not None:
+                texts[file_path] = resume_text
+        return texts
+
+    @staticmethod
+    def _collect_documents(documents: Iterable[Tuple[str, DocumentData]]) -> Dict[str, DocumentData]:
+        """Supported documents by file name; a repeated name keeps the last document."""
+        collected = {}
+        for file_name, data in documents:
+            if not file_name.lower().endswith(('.pdf', '.docx', '.doc')):
+                logging.warning(f"Skipping unsupported file: {file_name}")
+                continue
+            if file_name in collected:
+                logging.warning(f"Duplicate file name {file_name}; keeping the last one")
+            collected[file_name] = data
+        return collected
+
+    def _parse_documents(self, documents: Dict[str, DocumentData], parse_workers: int = None) -> Dict[str, str]:
+        """In-memory counterpart of _parse_all: texts by file name, unreadable documents left out."""
+        contents = {}
+        parse_executor = self._create_parse_executor(len(documents), parse_workers)
+        if parse_executor is None:
+            for file_name, data in documents.items():
+                try:
+                    contents[file_name] = self.resume_parser.parse_bytes(file_name, data)
+                except Exception as parse_error:
+                    logging.error(f"Error parsing {file_name}: {str(parse_error)}")
+        else:
+            with parse_executor:
+                # memoryviews cannot be pickled to worker processes; bytes can
+                futures = [(file_name, parse_executor.submit(parse_resume_bytes, file_name, bytes(data), False))
+                           for file_name, data in documents.items()]
+                for file_name, future in futures:
+                    try:
+                        contents[file_name] = future.result()
+                    except Exception as parse_error:
+                        logging.error(f"Error parsing {file_name}: {str(parse_error)}")
+
+        failed = {file_name: documents[file_name] for file_name, content in contents.items()
+                  if needs_fallback(file_name, content)}
+        if failed:
+            contents.update(self.resume_parser.parse_fallback_bytes(failed))
+
+        texts = {}
+        for file_name, content in contents.items():
+            resume_text = self._extract_resume_text(file_name, content)
+            if resume_text is not None:
+                texts[file_name] = resume_text
+        return texts
+
+    def _resolve_fallbacks(self, contents: Dict[str, Optional[Dict]]) -> Dict[str, Optional[Dict]]:
+        """Re-parse every PDF in contents that PyPDF could not read, as one LlamaParse batch."""
+        failed = [file_path for file_path, content in contents.items() if needs_fallback(file_path, content)]
+        if failed:
+            contents.update(self.resume_parser.parse_fallback(failed))
+        return contents
+
+    def _shortlist(self, texts: Dict[str, str], job_description: str) -> Dict[str, str]:
+        """Apply the pre-filter to parsed texts and remember its stats for the run summary."""
+        shortlisted = self.prefilter.select(job_description, texts)
+        self.last_run_prefilter = self.prefilter.last_stats
+        return shortlisted
+
+    def _deduplicate(self, texts: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+        """Split parsed texts into one representative per near-duplicate cluster.
+
+        Returns the representatives' texts and a map from each representative
+        to the other files of its cluster.
+        """
+        clusters = self.deduplicator.cluster(texts)
+        self.last_run_dedupe = self.deduplicator.last_stats
+        representatives = {file_path: texts[file_path] for file_path in texts if file_path in clusters}
+        return representatives, {file_path: members for file_path, members in clusters.items() if members}
+
+    def _fan_out(self, results: Iterator[Dict], duplicates: Dict[str, List[str]], resume_dir: str,
+                 journal: Optional[RunJournal] = None, force_refresh: bool = False) -> Iterator[Dict]:
+        """Yield each result followed by a copy for every near-duplicate of its file."""
+        copies = self._duplicate_copies(duplicates, resume_dir, journal, force_refresh)
+        for result in results:
+            yield result
+            yield from copies(result)
+
+    def _duplicate_copies(self, duplicates: Dict[str, List[str]], resume_dir: str,
+                          journal: Optional[RunJournal] = None,
+                          force_refresh: bool = False) -> Callable[[Dict], List[Dict]]:
+        """Build the per-run function returning a result's copies for its near-duplicates.
+
+        Copies keep the scores, name their own File and point duplicate_of at
+        the evaluated file; they are journaled like evaluated results. The
+        journal is read once here, not once per result.
+        """
+        if not duplicates:
+            return lambda result: []
+        members_by_key = {
+            os.path.relpath(file_path, resume_dir): members for file_path, members in duplicates.items()
+        }
+        done = journal.completed() if journal is not None and not force_refresh else {}
+
+        def copies(result: Dict) -> List[Dict]:
+            rows = []
+            for member in members_by_key.get(result['File'], []):
+                key = os.path.relpath(member, resume_dir)
+                copy = {**result, 'File': key, 'duplicate_of': result['File']}
+                if key not in done:
+                    self._record(journal, key, copy)
+                rows.append(copy)
+            return rows
+
+        return copies
+
+    def rank_results(self, results: List[Dict], ranking_priority: List[str] = None) -> pd.DataFrame:
+        """Build the ranked results table from rows yielded by iter_resumes.
+
+        Ties are broken in ranking_priority order (the service's default when not given).
+        """
+        return self._create_results_dataframe(results, ranking_priority)
+
+    async def process_resumes_async(self, resume_dir: str, job_description: str,
+                                    max_concurrency: int = None,
+                                    parse_workers: int = None, **run_options) -> pd.DataFrame:
+        """Async counterpart of process_resumes built on non-blocking LLM calls; run_options go to iter_resumes_async."""
+        try:
+            results = [
+                result async for result in self.iter_resumes_async(
+                    resume_dir, job_description, max_concurrency, parse_workers, **run_options
+                )
+            ]
+            return self._create_results_dataframe(results, run_options.get("ranking_priority"))
+        except Exception as e:
+            logging.error(f"Error in process_resumes_async: {str(e)}")
+            return pd.DataFrame()
+
+    async def iter_resumes_async(self, resume_dir: str, job_description: str,
+                                 max_concurrency: int = None,
+                                 parse_workers: int = None,
+                                 progress_callback: Callable[[int, int], None] = None,
+                                 recursive: bool = False, skip_files: Set[str] = None,
+                                 run_id: str = None,
+                                 scoring_weights: Dict[str, float] = None,
+                                 ranking_priority: List[str] = None, force_rescore: bool = None,
+                                 example_good_dir: str = None,
+                                 example_good_documents: List[Tuple[str, DocumentData]] = None) -> AsyncIterator[Dict]:
+        """Yield each scored candidate as soon as its evaluation completes.
+
+        At most max_concurrency LLM requests are in flight at once. Parsing runs in
+        a process pool of parse_workers processes; pass 0 to parse on threads with
+        this service's own resume_parser instead. Everything else is as in
+        iter_resumes: per-run settings, recursive, skip_files, the run_id
+        journal, pre-filter, dedupe and the triage cascade, and rows use the
+        same File keys.
+        """
+        overall_start_time = time.time()
+        usage_snapshot = self.llm_service.usage.snapshot()
+        normalize_snapshot = self.normalizer.snapshot()
+        triage_snapshot = self.triage_service.usage.snapshot() if self.triage_service else None
+        run = self.new_run(job_description, scoring_weights, ranking_priority, force_rescore)
+
+        if not os.path.exists(resume_dir):
+            logging.error(f"Resume directory not found: {resume_dir}")
+            return
+
+        run = await asyncio.to_thread(self._analyze_examples, run, example_good_dir, example_good_documents)
+
+        all_files = self._select_files(resume_dir, recursive, skip_files)
+        if not all_files:
+            return
+
+        semaphore = asyncio.Semaphore(max_concurrency or Settings.MAX_CONCURRENT_REQUESTS)
+        journal = self._open_journal(run_id, run) if run_id else None
+        results = None
+        try:
+            all_files, texts, duplicates = await asyncio.to_thread(
+                self._select_texts, all_files, None, run, parse_workers
+            )
+            if self.triage_service is not None:
+                results = self._run_cascade_async(
+                    all_files, texts, resume_dir, run, overall_start_time,
+                    progress_callback, semaphore, journal
+                )
+            else:
+                results = self._run_pipeline_async(
+                    all_files, resume_dir, run, overall_start_time,
+                    progress_callback, semaphore, parse_workers, journal, texts
+                )
+            copies = self._duplicate_copies(duplicates, resume_dir, journal, run.force_refresh)
+            async for result in results:
+                yield result
+                for copy in copies(result):
+                    yield copy
+        finally:
+            if results is not None:
+                await results.aclose()
+            if journal is not None:
+                journal.close()
+
+        self._log_run_stats(usage_snapshot, triage_snapshot, normalize_snapshot)
+
+    async def _run_pipeline_async(self, all_files: List[str], resume_dir: str, run: RankingRun,
+                                  overall_start_time: float,
+                                  progress_callback: Optional[Callable[[int, int], None]],
+                                  semaphore: asyncio.Semaphore, parse_workers: Optional[int],
+                                  journal: Optional[RunJournal],
+                                  texts: Optional[Dict[str, str]] = None,
+                                  triage: bool = False) -> AsyncIterator[Dict]:
+        """Async counterpart of _run_pipeline: replay journaled results, then evaluate the rest concurrently."""
+        total = len(all_files)
+        completed = 0
+        replayed, all_files = self._split_journaled(all_files, resume_dir, run, journal)
+        for result in replayed:
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total)
+            yield result
+
+        if not all_files:
+            return
+
+        parse_executor = self._create_parse_executor(len(all_files), parse_workers) if texts is None else None
+        tasks = [
+            asyncio.create_task(
+                self._evaluate_resume_async(
+                    file_path, texts[file_path], run, overall_start_time, semaphore, resume_dir, triage
+                ) if texts is not None else self._process_single_resume_async(
+                    file_path, run, overall_start_time, semaphore, parse_executor, resume_dir
+                )
+            )
+            for file_path in all_files
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                completed += 1
+                if result:
+                    self._record(journal, result['File'], result)
+                if progress_callback:
+                    progress_callback(completed, total)
+                if result:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            if parse_executor is not None:
+                parse_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_cascade_async(self, all_files: List[str], texts: Dict[str, str], resume_dir: str,
+                                 run: RankingRun, overall_start_time: float,
+                                 progress_callback: Optional[Callable[[int, int], None]],
+                                 semaphore: asyncio.Semaphore,
+                                 journal: Optional[RunJournal]) -> AsyncIterator[Dict]:
+        """Async counterpart of _run_cascade."""
+        done, pending = self._cascade_pending(all_files, resume_dir, run, journal)
+        final_files = all_files
+        if len(pending) <= self.cascade_top_n:
+            self._start_cascade(0, len(pending), 0.0)
+        else:
+            triage_start = time.time()
+            triaged = [
+                result async for result in self._run_pipeline_async(
+                    pending, resume_dir, run, overall_start_time,
+                    progress_callback, semaphore, None, None, texts, triage=True
+                )
+            ]
+            settled, final_files = self._split_band(triaged, all_files, resume_dir, done, triage_start)
+            for result in settled:
+                self._record(journal, result['File'], result)
+                yield result
+
+        final_start = time.time()
+        async for result in self._run_pipeline_async(
+            final_files, resume_dir, run, overall_start_time,
+            progress_callback, semaphore, None, journal, texts
+        ):
+            yield result
+        self.last_run_cascade["final_seconds"] = round(time.time() - final_start, 2)
+
+    def _create_parse_executor(self, file_count: int,
+                               parse_workers: int = None) -> Optional[concurrent.futures.Executor]:
+        """Create a process pool for CPU-bound parsing, or None to parse on threads."""
+        if parse_workers is None:
+            if file_count < Settings.PARSE_PROCESS_MIN_FILES:
                 return None
+            parse_workers = Settings.PARSE_WORKERS
+        workers = min(parse_workers, file_count)
+        if workers <= 0:
+            return None
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(Settings.PARSE_START_METHOD)
+        )
+
+    async def _process_single_resume_async(self, file_path: str, run: RankingRun,
+                                           overall_start_time: float, semaphore: asyncio.Semaphore,
+                                           parse_executor: Optional[concurrent.futures.Executor],
+                                           resume_dir: str = None):
+        logging.info(f"Processing resume: {file_path}")
+        loop = asyncio.get_running_loop()
+        try:
+            if parse_executor is not None:
+                content = await loop.run_in_executor(parse_executor, parse_resume_file, file_path)
+            else:
+                content = await loop.run_in_executor(None, self._parse_with_fallback, file_path)
+        except Exception as parse_error:
+            logging.error(f"Error parsing {file_path}: {str(parse_error)}")
+            return None
+
+        resume_text = self._extract_resume_text(file_path, content)
+        if resume_text is None:
+            return None
+        return await self._evaluate_resume_async(
+            file_path, resume_text, run, overall_start_time, semaphore, resume_dir
+        )
+
+    async def _evaluate_resume_async(self, file_path: str, resume_text: str, run: RankingRun,
+                                     overall_start_time: float, semaphore: asyncio.Semaphore,
+                                     resume_dir: str = None, triage: bool = False) -> Optional[Dict]:
+        """Async counterpart of _evaluate_resume; at most semaphore's limit of calls run at once."""
+        llm_service = self.triage_service if triage else self.llm_service
+        try:
+            async with semaphore:
+                analysis = await llm_service.analyze_resume_async(resume_text, run=run)
+        except Exception as e:
+            logging.error(f"Error processing {file_path}: {str(e)}")
+            return None
+        return self._build_result(
+            file_path, analysis, overall_start_time, resume_dir,
+            scored_by=self.triage_model if triage else self.model
+        )
 
+    def _process_single_resume(self, file_path: str, run: RankingRun, overall_start_time: float):
+        logging.info(f"Processing resume: {file_path}")
+        
+        # Parse content
+        try:
+            content = self._parse_with_fallback(file_path)
+        except Exception as parse_error:
+            logging.error(f"Error parsing {file_path}: {str(parse_error)}")
+            return None
+
+        resume_text = self._extract_resume_text(file_path, content)
+        if resume_text is None:
+            return None
+        return self._evaluate_resume(file_path, resume_text, run, overall_start_time)
+
+    def _parse_with_fallback(self, file_path: str) -> Optional[Dict]:
+        """Parse one file, falling back to LlamaParse on its own when PyPDF finds no text."""
+        return self._resolve_fallbacks({file_path: self.resume_parser.parse(file_path)})[file_path]
+
+    def _evaluate_resume(self, file_path: str, resume_text: str, run: RankingRun,
+                         overall_start_time: float, resume_dir: str = None,
+                         triage: bool = False) -> Optional[Dict]:
+        llm_service = self.triage_service if triage else self.llm_service
+        analysis = llm_service.analyze_resume(resume_text, run=run)
+        return self._build_result(
+            file_path, analysis, overall_start_time, resume_dir,
+            scored_by=self.triage_model if triage else self.model
+        )
+
+    def _extract_resume_text(self, file_path: str, content: Optional[Dict]) -> Optional[str]:
         if not content or not content.get("content"):
             logging.error(f"Failed to extract content from {file_path}")
             return None
+        if not self.normalize_text:
+            return content["content"]
+        text = self.normalizer.normalize(content["content"], label=os.path.basename(file_path))
+        if not text:
+            logging.error(f"No content left in {file_path} after normalization")
+            return None
+        return text
 
-        # Analyze resume
-        analysis = self.llm_service.analyze_resume(
-            content["content"],
-            job_description,
-            self.scoring_weights,
-            self.ranking_priority
-        )
+    def _build_result(self, file_path: str, analysis: Dict, overall_start_time: float,
+                      resume_dir: str = None, scored_by: str = None) -> Optional[Dict]:
+        """Flatten an LLM analysis into a results row; File is relative to resume_dir when given.
 
+        scored_by names the model that produced the scores (defaults to self.model).
+        """
         if analysis and isinstance(analysis, dict) and 'information' in analysis and 'evaluation' in analysis:
             info = analysis["information"]
             scores = analysis["evaluation"]
@@ -136,9 +1186,16 @@ class RankingService:
                 'phone': info.get('phone', 'Not found'),
                 'email': info.get('email', 'add'),
                 'location_info': info.get('location', 'Not found'),
-                'File': os.path.basename(file_path),
-                'processing_time': round(time.time() - overall_start_time, 2)
+                'File': os.path.relpath(file_path, resume_dir) if resume_dir else os.path.basename(file_path),
+                'processing_time': round(time.time() - overall_start_time, 2),
+                'scored_by': scored_by or self.model
             }
+            # Keep per-criterion scores so rankings can be re-weighted locally
+            for criterion in Settings.SCORE_CRITERIA:
+                result[criterion] = scores.get(criterion, 0)
+            if analysis.get("failed"):
+                # Shown with a zero score but never journaled, so a rerun evaluates it again
+                result['failed'] = True
             logging.info(f"Successfully processed resume for: {info.get('name', 'unnamed candidate')}")
             return result
         else:
@@ -146,13 +1203,10 @@ class RankingService:
             logging.debug(f"Analysis result: {analysis}")
             return None
 
-    def _create_results_dataframe(self, results: List[Dict]):
-        """Create a DataFrame from the results list."""
+    def _create_results_dataframe(self, results: List[Dict], ranking_priority: List[str] = None):
+        """Create a DataFrame from the results list, ranked by ranking_priority (or the default)."""
         if not results:
-            return pd.DataFrame(columns=[
-                'Rank', 'name', 'total_score', 'total_professional_experience',
-                'total_relevant_experience', 'skills', 'email', 'phone', 'location_info', 'File', 'processing_time'
-            ])
+            return pd.DataFrame(columns=self.RESULT_COLUMNS)
 
         df = pd.DataFrame(results)
         
@@ -161,10 +1215,11 @@ class RankingService:
         df['total_professional_experience'] = pd.to_numeric(df.get('total_professional_experience', 0), errors='coerce').round(1)
         df['total_relevant_experience'] = pd.to_numeric(df.get('total_relevant_experience', 0), errors='coerce').round(1)
         df['processing_time'] = pd.to_numeric(df['processing_time'], errors='coerce').round(2)
+        for criterion in Settings.SCORE_CRITERIA:
+            df[criterion] = pd.to_numeric(df.get(criterion, 0), errors='coerce').fillna(0).round(2)
         
-        # Sort by total score and reset index for ranking
-        df = df.sort_values('total_score', ascending=False).reset_index(drop=True)
-        df.insert(0, 'Rank', range(1, len(df) + 1))
+        # Sort by total score, break ties by priority and assign ranks
+        df = self._rank(df, ranking_priority or self.ranking_priority)
         
         # Format columns for display
         df['skills'] = df['skills'].fillna('')
@@ -172,23 +1227,57 @@ class RankingService:
         df['email'] = df['email'].fillna('Not found')
         df['phone'] = df['phone'].fillna('Not found')
         df['location_info'] = df['location_info'].fillna('Not found')
+        # Rows journaled before the column existed were scored by the run's model
+        df['scored_by'] = df['scored_by'].fillna(self.model) if 'scored_by' in df else self.model
+        df['duplicate_of'] = df['duplicate_of'].fillna('') if 'duplicate_of' in df else ''
         
         # Reorder columns for better presentation
-        columns = [
-            'Rank',
-            'name',
-            'total_score',
-            'total_professional_experience',
-            'total_relevant_experience',
-            'skills',
-            'email',
-            'phone',
-            'location_info',
-            'File',
-            'processing_time'
-        ]
-        
-        return df[columns]
+        return df[self.RESULT_COLUMNS]
+
+    @staticmethod
+    def _rank(df: pd.DataFrame, priority: List[str] = None) -> pd.DataFrame:
+        """Sort by total score, break ties in priority order and (re)assign the Rank column."""
+        sort_columns = ['total_score']
+        for key in priority or []:
+            column = key if key in df.columns else Settings.CRITERION_ALIASES.get(key, key)
+            if column in df.columns and column not in sort_columns:
+                sort_columns.append(column)
+
+        df = df.drop(columns=['Rank'], errors='ignore')
+        df = df.sort_values(sort_columns, ascending=False, kind='mergesort').reset_index(drop=True)
+        df.insert(0, 'Rank', range(1, len(df) + 1))
+        return df
+
+    @staticmethod
+    def rescore(results: pd.DataFrame, new_weights: Dict[str, float],
+                new_priority: List[str] = None) -> pd.DataFrame:
+        """Recompute total scores and ranks from stored per-criterion scores.
+
+        Weight keys are mapped onto Settings.SCORE_CRITERIA (see
+        Settings.CRITERION_ALIASES), so slider changes never need an LLM call.
+        """
+        if results is None or results.empty:
+            return results
+
+        criterion_weights: Dict[str, float] = {}
+        for key, weight in new_weights.items():
+            column = Settings.CRITERION_ALIASES.get(key, key)
+            if column not in Settings.SCORE_CRITERIA:
+                logging.warning(f"Ignoring weight for unknown criterion: {key}")
+                continue
+            criterion_weights[column] = criterion_weights.get(column, 0.0) + float(weight)
+
+        missing = [column for column in criterion_weights if column not in results.columns]
+        if missing:
+            raise ValueError(f"Results do not contain per-criterion scores for: {', '.join(missing)}")
+
+        columns = list(criterion_weights)
+        scores = results[columns].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=float)
+        weights = np.fromiter(criterion_weights.values(), dtype=float, count=len(columns))
+
+        df = results.copy()
+        df['total_score'] = np.round(scores @ weights, 2)
+        return RankingService._rank(df, new_priority)
 
     def analyze_example_resumes(self, good_resumes_dir: str = None, bad_resumes_dir: str = None):
         """Analyze example resumes to extract characteristics"""
@@ -201,6 +1290,6 @@ class RankingService:
                 logging.warning(f"Bad resumes directory not found: {bad_resumes_dir}")
                 return
                 
-            self.llm_service.analyze_example_resumes(good_resumes_dir, bad_resumes_dir)
+            return self.llm_service.analyze_example_resumes(good_resumes_dir, bad_resumes_dir)
         except Exception as e:
             logging.error(f"Error analyzing example resumes: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,204 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Optional
+from ..config.settings import Settings
+
+
+class RateLimiter:
+    """Client-side token-bucket limiter for requests/min and tokens/min.
+
+    Each acquire reserves capacity immediately (buckets may go negative) and
+    returns after the deficit has refilled, so waiting callers are served in
+    arrival order without polling. Thread-safe and usable from asyncio.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests_per_minute = float(requests_per_minute)
+        self.tokens_per_minute = float(tokens_per_minute)
+        self._requests = self.requests_per_minute
+        self._tokens = self.tokens_per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and the given tokens; return seconds to wait before sending."""
+        # A single request can never need more than a full bucket
+        tokens = min(max(int(tokens), 0), self.tokens_per_minute)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._requests -= 1
+            self._tokens -= tokens
+            request_wait = -self._requests * 60 / self.requests_per_minute if self._requests < 0 else 0.0
+            token_wait = -self._tokens * 60 / self.tokens_per_minute if self._tokens < 0 else 0.0
+            return max(request_wait, token_wait)
+
+    def acquire(self, tokens: int) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            logging.debug(f"Rate limiter delaying request by {wait:.2f}s")
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            logging.debug(f"Rate limiter delaying request by {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    def drain(self, seconds: float) -> None:
+        """Empty both buckets for the given time, e.g. after the server reports a 429."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._requests = min(self._requests, -seconds * self.requests_per_minute / 60)
+            self._tokens = min(self._tokens, -seconds * self.tokens_per_minute / 60)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on in-flight requests driven by 429 and latency feedback.
+
+    The limit grows by roughly one per window of successful requests and is
+    multiplied by decrease_factor on a rate-limit error or a response slower
+    than latency_target. Decreases are spaced out so one burst of 429s only
+    halves the limit once.
+    """
+
+    def __init__(self, initial_limit: int, min_limit: int = 1, max_limit: int = 100,
+                 latency_target: Optional[float] = None, decrease_factor: float = 0.5,
+                 decrease_cooldown: float = 5.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._async_waiters = []
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._wake()
+
+    def _wake(self) -> None:
+        """Wake waiters for every free slot; must hold the condition lock."""
+        free = int(self._limit) - self._in_flight
+        if free <= 0:
+            return
+        self._condition.notify(free)
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.pop(0)
+            if not waiter.done():
+                loop.call_soon_threadsafe(self._resolve, waiter)
+                free -= 1
+
+    @staticmethod
+    def _resolve(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def on_success(self, latency: float) -> None:
+        if self.latency_target and latency > self.latency_target:
+            self._decrease(f"latency {latency:.1f}s above target")
+            return
+        with self._condition:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._wake()
+
+    def on_rate_limited(self) -> None:
+        self._decrease("rate limited")
+
+    def _decrease(self, reason: str) -> None:
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_cooldown:
+                return
+            self._last_decrease = now
+            self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+            logging.warning(f"Reducing LLM concurrency to {self.limit} ({reason})")
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        await self.acquire_async()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter, never shorter than a server-provided Retry-After."""
+    cap = min(Settings.LLM_BACKOFF_MAX_SECONDS, Settings.LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    delay = random.uniform(0, cap)
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_concurrency_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """Return the process-wide rate limiter for a model."""
+    with _registry_lock:
+        if model not in _rate_limiters:
+            limits = Settings.RATE_LIMITS.get(model, Settings.DEFAULT_RATE_LIMITS)
+            _rate_limiters[model] = RateLimiter(**limits)
+        return _rate_limiters[model]
+
+
+def get_concurrency_limiter(model: str) -> AdaptiveConcurrencyLimiter:
+    """Return the process-wide adaptive concurrency limiter for a model."""
+    with _registry_lock:
+        if model not in _concurrency_limiters:
+            _concurrency_limiters[model] = AdaptiveConcurrencyLimiter(
+                initial_limit=Settings.INITIAL_CONCURRENT_REQUESTS,
+                max_limit=Settings.MAX_CONCURRENT_REQUESTS,
+                latency_target=Settings.LLM_LATENCY_TARGET_SECONDS
+            )
+        return _concurrency_limiters[model]
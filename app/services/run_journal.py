@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence
+from ..config.settings import Settings
+
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+
+class RunJournal:
+    """Append-only JSONL record of the results completed by one ranking run.
+
+    The first line describes the run (model, job description and example
+    characteristics hashes, weights);
+    every further line is one finished resume. A rerun with the same run id
+    reads the journal back and only processes files it does not contain. A
+    line cut short by a crash is ignored, so the journal stays usable after
+    the process dies mid-write.
+    """
+
+    def __init__(self, path: str, metadata: Dict):
+        self.path = path
+        self.metadata = metadata
+        self._lock = threading.Lock()
+        self._completed: Dict[str, Dict] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+        if not self._header_written:
+            self._append({"type": "run", **metadata})
+
+    def _load(self) -> None:
+        self._header_written = False
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as journal_file:
+            data = journal_file.read()
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping unreadable line in run journal {self.path}")
+                continue
+            if entry.get("type") == "run":
+                self._check_metadata(entry)
+                self._header_written = True
+            elif entry.get("type") == "result":
+                self._completed[entry["file"]] = entry["result"]
+        if data and not data.endswith(b"\n"):
+            # Terminate a partial last line so the next entry starts cleanly
+            with open(self.path, "ab") as journal_file:
+                journal_file.write(b"\n")
+
+    def _check_metadata(self, header: Dict) -> None:
+        for field, value in self.metadata.items():
+            if field != "created_at" and header.get(field) != value:
+                raise ValueError(
+                    f"Run journal {os.path.basename(self.path)} was started with a different {field}; "
+                    f"use a new run id"
+                )
+
+    def _append(self, entry: Dict) -> None:
+        self._file.write(json.dumps(entry, default=str) + "\n")
+        self._file.flush()
+
+    def completed(self) -> Dict[str, Dict]:
+        """Results already recorded, keyed by file path relative to the resume directory."""
+        with self._lock:
+            return dict(self._completed)
+
+    def record(self, file_key: str, result: Dict) -> None:
+        with self._lock:
+            self._completed[file_key] = result
+            self._append({"type": "result", "file": file_key, "result": result})
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def journal_path(run_id: str) -> str:
+    if not RUN_ID_PATTERN.match(run_id or ""):
+        raise ValueError(f"Invalid run id '{run_id}' (use letters, digits, '.', '_' or '-')")
+    return os.path.join(Settings.RUN_JOURNAL_DIR, f"{run_id}.jsonl")
+
+
+def run_metadata(model: str, job_description: str, scoring_weights: Dict[str, float],
+                 ranking_priority: List[str], good_characteristics: Sequence[str] = ()) -> Dict:
+    """Inputs that must match for a journal's results to be reused."""
+    return {
+        "model": model,
+        "job_description": hashlib.sha256((job_description or "").encode("utf-8")).hexdigest(),
+        "scoring_weights": {k: float(v) for k, v in (scoring_weights or {}).items()},
+        "ranking_priority": list(ranking_priority or []),
+        "good_characteristics": hashlib.sha256(json.dumps(list(good_characteristics)).encode("utf-8")).hexdigest(),
+    }
+
+
+def open_run_journal(run_id: str, metadata: Dict) -> RunJournal:
+    """Open (or start) the journal for run_id, pruning journals past RUN_JOURNAL_TTL_SECONDS."""
+    prune_run_journals()
+    return RunJournal(journal_path(run_id), {**metadata, "created_at": time.time()})
+
+
+def prune_run_journals(max_age_seconds: Optional[float] = None) -> int:
+    """Delete journals not written to within max_age_seconds; return how many were removed."""
+    max_age = Settings.RUN_JOURNAL_TTL_SECONDS if max_age_seconds is None else max_age_seconds
+    directory = Settings.RUN_JOURNAL_DIR
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if name.endswith(".jsonl") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError as e:
+            logging.warning(f"Could not prune run journal {path}: {str(e)}")
+    return removed
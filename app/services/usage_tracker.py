@@ -0,0 +1,80 @@
+import logging
+import threading
+from typing import Any, Dict
+from ..config.settings import Settings
+
+
+def usage_cost(usage: Dict[str, float], model: str) -> float:
+    """Dollar cost of usage totals at model's Settings.MODEL_PRICING (0 for unknown models)."""
+    prices = Settings.MODEL_PRICING.get(model)
+    if not prices:
+        return 0.0
+    cached = usage.get("cached_tokens", 0)
+    uncached = usage.get("input_tokens", 0) - cached
+    return (
+        uncached * prices["input"] + cached * prices["cached_input"] + usage.get("output_tokens", 0) * prices["output"]
+    ) / 1_000_000
+
+
+class UsageTracker:
+    """Thread-safe accumulator of token usage reported by the API.
+
+    Records prompt, cached-prompt and completion tokens from LangChain's
+    usage_metadata so runs can report how much of each prompt was served from
+    the provider's prefix cache.
+    """
+
+    FIELDS = ("calls", "input_tokens", "cached_tokens", "output_tokens", "latency")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {field: 0 for field in self.FIELDS}
+
+    def record(self, message: Any, latency: float = 0.0) -> None:
+        """Add the usage metadata of one model response (no-op fields if absent)."""
+        usage = getattr(message, "usage_metadata", None) or {}
+        details = usage.get("input_token_details") or {}
+        self._add(usage.get("input_tokens", 0), details.get("cache_read", 0), usage.get("output_tokens", 0), latency)
+
+    def record_openai_usage(self, usage: Dict, latency: float = 0.0) -> None:
+        """Add a raw OpenAI "usage" object, as found in Batch API output lines."""
+        usage = usage or {}
+        details = usage.get("prompt_tokens_details") or {}
+        self._add(usage.get("prompt_tokens", 0), details.get("cached_tokens", 0), usage.get("completion_tokens", 0), latency)
+
+    def _add(self, input_tokens, cached_tokens, output_tokens, latency: float) -> None:
+        with self._lock:
+            self._totals["calls"] += 1
+            self._totals["input_tokens"] += input_tokens or 0
+            self._totals["cached_tokens"] += cached_tokens or 0
+            self._totals["output_tokens"] += output_tokens or 0
+            self._totals["latency"] += latency
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._totals)
+
+    def since(self, snapshot: Dict[str, float]) -> Dict[str, float]:
+        """Usage accumulated after snapshot was taken, with derived ratios."""
+        current = self.snapshot()
+        delta = {field: current[field] - snapshot.get(field, 0) for field in self.FIELDS}
+        return self.summarize(delta)
+
+    @staticmethod
+    def summarize(totals: Dict[str, float]) -> Dict[str, float]:
+        summary = dict(totals)
+        summary["latency"] = round(totals["latency"], 2)
+        summary["cached_token_ratio"] = (
+            round(totals["cached_tokens"] / totals["input_tokens"], 4) if totals["input_tokens"] else 0.0
+        )
+        summary["avg_latency"] = round(totals["latency"] / totals["calls"], 2) if totals["calls"] else 0.0
+        return summary
+
+    def log_summary(self, snapshot: Dict[str, float], label: str = "LLM usage") -> Dict[str, float]:
+        summary = self.since(snapshot)
+        logging.info(
+            f"{label}: {summary['calls']} calls, {summary['input_tokens']} prompt tokens "
+            f"({summary['cached_tokens']} cached, ratio {summary['cached_token_ratio']:.1%}), "
+            f"{summary['output_tokens']} completion tokens, avg latency {summary['avg_latency']}s"
+        )
+        return summary
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+
+class DiskCache:
+    """Persistent JSON key/value store backed by SQLite with LRU and TTL eviction.
+
+    Triggers keep the entry count and total size in a one-row totals table, so
+    a write only scans for least recently used entries when the cache is over
+    budget. A hit refreshes accessed_at at most once per touch_interval
+    seconds, so repeated hits stay read-only; recency is tracked to that
+    granularity.
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None,
+                 max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 touch_interval: float = 60.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            # One transaction, so totals cannot miss rows written while the triggers are created
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_created ON entries (created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                " id INTEGER PRIMARY KEY CHECK (id = 1),"
+                " entries INTEGER NOT NULL,"
+                " bytes INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO totals (id, entries, bytes) "
+                "SELECT 1, COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries BEGIN"
+                " UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 1; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries BEGIN"
+                " UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 1; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_resized AFTER UPDATE OF size ON entries BEGIN"
+                " UPDATE totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 1; END"
+            )
+
+    @contextmanager
+    def _connection(self):
+        """Open a short-lived connection so the cache is safe across threads and processes."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at, accessed_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self.ttl_seconds and row[1] < now - self.ttl_seconds:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    row = None
+                if row is not None and row[2] < now - self.touch_interval:
+                    conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logging.warning(f"Cache read failed for {self.path}: {str(e)}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value and evict least recently used entries if over budget."""
+        payload = json.dumps(value)
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the triggers
+                conn.execute(
+                    "INSERT INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                    "created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+                    (key, payload, len(payload.encode("utf-8")), now, now)
+                )
+                self._evict(conn)
+        except (sqlite3.Error, TypeError) as e:
+            logging.warning(f"Cache write failed for {self.path}: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop expired entries, then least recently used ones until the cache fits its budgets."""
+        evicted = 0
+        if self.ttl_seconds:
+            evicted += conn.execute(
+                "DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+
+        if self.max_bytes or self.max_entries:
+            count, total = conn.execute("SELECT entries, bytes FROM totals").fetchone()
+
+            def over_budget() -> bool:
+                return bool((self.max_bytes and total > self.max_bytes) or
+                            (self.max_entries and count > self.max_entries))
+
+            stale = []
+            if over_budget():
+                for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+                    stale.append((key,))
+                    total -= size
+                    count -= 1
+                    if not over_budget():
+                        break
+            conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+            evicted += len(stale)
+
+        if evicted:
+            logging.info(f"Evicted {evicted} entries from {self.path}")
+
+    def delete(self, key: str) -> None:
+        """Remove a single entry if present."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove every entry and reset counters."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM entries")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        with self._connection() as conn:
+            return conn.execute("SELECT entries FROM totals").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._connection() as conn:
+            entries, size = conn.execute("SELECT entries, bytes FROM totals").fetchone()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size
+        }
@@ -4,37 +4,63 @@ import re
 from typing import Dict
 import logging
 
+# A brace that opens a JSON object ({"... or {}), as opposed to prose like {name}
+_OBJECT_START = re.compile(r'\{\s*["}]')
+# A whole string literal (escapes included, possibly unterminated) or a brace
+_OBJECT_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"?|[{}]', re.DOTALL)
+
+
+def _object_span(text: str):
+    """The first balanced top-level {...} span that opens like a JSON object, or None.
+
+    Strings are consumed whole, so braces and escaped quotes inside them do not
+    count, and the text is scanned once. A span cut off before its closing
+    brace gives None.
+    """
+    start = _OBJECT_START.search(text)
+    if start is None:
+        return None
+    depth = 0
+    for token in _OBJECT_TOKEN.finditer(text, start.start()):
+        value = token.group()
+        if value == '{':
+            depth += 1
+        elif value == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start.start():token.end()]
+    return None
+
+
+def extract_json_object(text: str):
+    """Return the first complete JSON object in text (a ```json block if there is one), or None.
+
+    Only the first top-level object is decoded; when it is malformed the
+    result is None rather than some nested object that happens to parse.
+    """
+    # A closed ```json block is searched on its own
+    fence = text.find('```json')
+    fence_end = text.find('```', fence + 7) if fence >= 0 else -1
+    span = _object_span(text[fence + 7:fence_end] if fence_end >= 0 else text)
+    if span is None:
+        return None
+    try:
+        return json.loads(span)
+    except json.JSONDecodeError:
+        return None
+
+
 def clean_llm_output(text: str) -> dict:
     """Clean and parse LLM output to extract JSON."""
     if not text:
         return {}
         
     try:
-        # First try to find JSON in code blocks
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text, re.DOTALL)
-        if json_match:
-            try:
-                json_str = json_match.group(1).strip()
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                logging.error(f"Failed to parse JSON from code block: {json_str}")
-                
-        # Try to find raw JSON object
-        json_pattern = r'(\{(?:[^{}]|(?R))*\})'
-        matches = re.finditer(json_pattern, text, re.DOTALL)
-        for match in matches:
-            try:
-                json_str = match.group(1).strip()
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                continue
-                
-        # Try direct JSON parsing as last resort
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
-                
+        parsed = extract_json_object(text)
+        if isinstance(parsed, dict):
+            return parsed
+        logging.error("No JSON object found in LLM output")
+        logging.debug(f"Raw text: {text}")
     except Exception as e:
         logging.error(f"Error cleaning LLM output: {str(e)}")
         logging.debug(f"Raw text: {text}")
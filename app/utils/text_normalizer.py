@@ -0,0 +1,130 @@
+import re
+import logging
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Set
+from ..config.settings import Settings
+from .tokens import count_tokens, truncate_to_tokens
+
+# Invisible characters PDF/DOCX extraction leaves behind (soft hyphen, zero-width, BOM)
+INVISIBLE_CHARS = re.compile("[\u00ad\u200b\u200c\u200d\u2060\ufeff]")
+CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+HORIZONTAL_SPACE = re.compile(r"[^\S\n]+")
+# "engi-\nneering" -> "engineering"; only when the next line continues in lower case
+LINE_BREAK_HYPHEN = re.compile(r"(\w)-\n([a-z])")
+BLANK_LINES = re.compile(r"\n{3,}")
+# Page numbers ("3", "- 3 -", "Page 3 of 5", "3/5"); only dropped as the first or last line of a page
+PAGE_NUMBER_LINE = re.compile(
+    r"^(?:[-–—]?\s*\d{1,3}\s*[-–—]?|page\s+\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s*/\s*\d+)$",
+    re.IGNORECASE
+)
+# Rules made of punctuation or bullets
+RULE_LINE = re.compile(r"^[\W_]+$")
+
+
+def _clean_page(page: str) -> List[str]:
+    page = INVISIBLE_CHARS.sub("", page)
+    page = CONTROL_CHARS.sub(" ", page)
+    page = HORIZONTAL_SPACE.sub(" ", page)
+    lines = [line.strip() for line in page.split("\n")]
+    return LINE_BREAK_HYPHEN.sub(r"\1\2", "\n".join(lines)).split("\n")
+
+
+def _edge_indices(lines: List[str], edge_lines: int) -> Set[int]:
+    """Indices of the first and last edge_lines non-empty lines of a page."""
+    filled = [i for i, line in enumerate(lines) if line]
+    return set(filled[:edge_lines] + filled[-edge_lines:])
+
+
+def normalize_resume_text(text: str, repeated_line_min: Optional[int] = None,
+                          edge_lines: Optional[int] = None) -> str:
+    """Strip extraction noise from resume text without changing its content.
+
+    Collapses whitespace, rejoins words hyphenated across line breaks and
+    drops decorative rules. Pages are separated by form feeds (as the PDF
+    parsers emit them); a page number as the first or last line of a page is
+    dropped, and a line among a page's first or last edge_lines lines on at
+    least repeated_line_min pages is a header or footer, of which only the
+    first copy is kept. Lines inside a
+    page are never removed for repeating, so repeated role titles and
+    locations survive.
+    """
+    if not text:
+        return ""
+    repeated_line_min = repeated_line_min or Settings.NORMALIZE_REPEATED_LINE_MIN
+    edge_lines = edge_lines or Settings.NORMALIZE_PAGE_EDGE_LINES
+
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    pages = [_clean_page(page) for page in text.split("\f")]
+    edges = [_edge_indices(lines, edge_lines) for lines in pages]
+    # Pages on which each line sits at the top or bottom
+    counts = Counter(line for lines, edge in zip(pages, edges) for line in {lines[i] for i in edge})
+
+    seen = set()
+    kept = []
+    for lines, edge in zip(pages, edges):
+        for i, line in enumerate(lines):
+            if line and RULE_LINE.match(line):
+                continue
+            if i in edge:
+                if (i == min(edge) or i == max(edge)) and PAGE_NUMBER_LINE.match(line):
+                    continue
+                # Section labels ("Responsibilities:") legitimately repeat; headers/footers do not end in ':'
+                if counts[line] >= repeated_line_min and not line.endswith(":"):
+                    if line in seen:
+                        continue
+                    seen.add(line)
+            kept.append(line)
+    return BLANK_LINES.sub("\n\n", "\n".join(kept)).strip()
+
+
+class ResumeNormalizer:
+    """Normalizes parsed resume text and enforces the prompt's token budget.
+
+    Keeps thread-safe totals of tokens before and after normalization so a run
+    can report its input-token reduction.
+    """
+
+    FIELDS = ("resumes", "tokens_before", "tokens_after", "truncated")
+
+    def __init__(self, model: Optional[str] = None, max_tokens: Optional[int] = None):
+        self.model = model
+        self.max_tokens = Settings.RESUME_MAX_TOKENS if max_tokens is None else max_tokens
+        self._lock = threading.Lock()
+        self._totals = {field: 0 for field in self.FIELDS}
+
+    def normalize(self, text: str, label: str = "resume") -> str:
+        """Normalized text of one resume, cut to max_tokens; logs the tokens saved."""
+        tokens_before = count_tokens(text, self.model)
+        normalized = normalize_resume_text(text)
+        truncated = False
+        if self.max_tokens:
+            budgeted = truncate_to_tokens(normalized, self.max_tokens, self.model)
+            truncated = len(budgeted) < len(normalized)
+            normalized = budgeted
+        tokens_after = count_tokens(normalized, self.model)
+
+        with self._lock:
+            self._totals["resumes"] += 1
+            self._totals["tokens_before"] += tokens_before
+            self._totals["tokens_after"] += tokens_after
+            self._totals["truncated"] += int(truncated)
+        logging.info(
+            f"Normalized {label}: {tokens_before} -> {tokens_after} tokens "
+            f"({tokens_before - tokens_after} saved{', truncated to budget' if truncated else ''})"
+        )
+        return normalized
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._totals)
+
+    def since(self, snapshot: Dict[str, int]) -> Dict[str, float]:
+        """Totals accumulated after snapshot, with tokens saved overall and per resume."""
+        current = self.snapshot()
+        delta = {field: current[field] - snapshot.get(field, 0) for field in self.FIELDS}
+        delta["tokens_saved"] = delta["tokens_before"] - delta["tokens_after"]
+        delta["saved_ratio"] = round(delta["tokens_saved"] / delta["tokens_before"], 4) if delta["tokens_before"] else 0.0
+        delta["avg_tokens_saved"] = round(delta["tokens_saved"] / delta["resumes"], 1) if delta["resumes"] else 0.0
+        return delta
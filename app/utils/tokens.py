@@ -0,0 +1,48 @@
+import logging
+from functools import lru_cache
+from typing import Optional
+
+# Rough characters-per-token ratio for English prose when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: Optional[str]):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model or "gpt-4o")
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logging.warning(f"Tokenizer unavailable, estimating tokens from length: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count tokens with the model's local tokenizer, falling back to a length estimate."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut text to at most max_tokens tokens, preferring to end on a line break."""
+    if not text or max_tokens <= 0:
+        return text
+    encoding = _get_encoding(model)
+    if encoding is None:
+        if len(text) <= max_tokens * CHARS_PER_TOKEN:
+            return text
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        cut = encoding.decode(tokens[:max_tokens])
+    line_end = cut.rfind("\n")
+    # Only back off to a line break when that keeps most of the budget
+    return cut[:line_end] if line_end > len(cut) * 0.8 else cut
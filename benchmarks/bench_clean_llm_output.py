@@ -0,0 +1,75 @@
+"""Micro-benchmark for clean_llm_output on realistic multi-KB LLM responses.
+
+Run from the repository root:
+    python benchmarks/bench_clean_llm_output.py [--number 2000]
+
+Reports microseconds per call next to a bare json.loads of the same object,
+which is the floor any extractor has to pay.
+"""
+import os
+import sys
+import json
+import timeit
+import logging
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.helpers import clean_llm_output  # noqa: E402
+
+
+def make_analysis(skills: int) -> dict:
+    return {
+        "information": {
+            "name": "Jane Doe",
+            "email": "jane@example.com",
+            "phone": "+1-555-010-0000",
+            "location": "Berlin, Germany",
+            "skills": [f"Skill {i} {{with braces}} and \"quotes\"" for i in range(skills)],
+            "total_professional_experience": 7.5,
+            "total_relevant_experience": 5.0,
+        },
+        "evaluation": {
+            "skills_match": 82, "experience": 75, "education": 70,
+            "certifications": 40, "location": 100, "total_score": 76.4,
+            "reasoning": "Strong backend profile. " * 40,
+        },
+    }
+
+
+def make_responses(skills: int) -> dict:
+    payload = json.dumps(make_analysis(skills), indent=2)
+    preamble = "Here is the evaluation of the candidate against the job description. " * 5
+    return {
+        "fenced": f"{preamble}\n```json\n{payload}\n```\nLet me know if you need more detail.",
+        "inline": f"{preamble}\n{payload}\nThat concludes the analysis.",
+        "stray braces": f"Use the {{information}} and {{evaluation}} keys as requested.\n{payload}",
+        "bare": payload,
+        # Cut off mid-answer (e.g. max_tokens reached)
+        "truncated": f"{preamble}\n{payload[:-len(payload) // 3]}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="Calls per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements (best is reported)")
+    args = parser.parse_args()
+    # clean_llm_output logs every response it cannot parse
+    logging.disable(logging.CRITICAL)
+
+    for skills in (20, 150):
+        responses = make_responses(skills)
+        payload = responses["bare"]
+        floor = min(timeit.repeat(lambda: json.loads(payload), number=args.number, repeat=args.repeat))
+        print(f"\nResponse JSON size {len(payload) / 1024:.1f} KB "
+              f"(json.loads alone: {floor / args.number * 1e6:.1f} us)")
+        for label, text in responses.items():
+            if label != "truncated":
+                assert clean_llm_output(text)["evaluation"]["total_score"] == 76.4, label
+            best = min(timeit.repeat(lambda: clean_llm_output(text), number=args.number, repeat=args.repeat))
+            print(f"  {label:<13} {len(text) / 1024:6.1f} KB  {best / args.number * 1e6:8.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
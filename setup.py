@@ -18,5 +18,10 @@ setup(
         "openai",
         "langchain-openai",
         "llama-parse"
-    ]
+    ],
+    entry_points={
+        "console_scripts": [
+            "profile-rank=app.cli:main",
+        ]
+    }
 )
\ No newline at end of file
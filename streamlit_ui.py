@@ -3,23 +3,50 @@ from app.services.ranking_service import RankingService
 import pandas as pd
 from app.parsers.docx_parser import DocxParser
 from app.parsers.pypdf_parser import PyPDFParser
-from app.services.cleanup_service import CleanupService
+from app.parsers.cached_parser import with_parse_cache
 from app.config.settings import Settings
-import tempfile
-import os
 import shutil 
 import logging
+import time
+import json
+import hashlib
 
-def save_uploaded_files(uploaded_files):
-    """Save uploaded files to a temporary directory and return the directory path."""
-    temp_dir = tempfile.mkdtemp()
-    
-    for uploaded_file in uploaded_files:
-        file_path = os.path.join(temp_dir, uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-    
-    return temp_dir
+def compute_run_id(model, job_description, scoring_weights, priority_order, uploaded_files, good_resumes):
+    """Stable id for a set of inputs, so a rerun after an interruption continues the same journal."""
+    payload = json.dumps({
+        "model": model,
+        "job_description": job_description,
+        "scoring_weights": scoring_weights,
+        "priority_order": priority_order,
+        "files": sorted(upload_digests(uploaded_files)),
+        "good_resumes": sorted(upload_digests(good_resumes or [])),
+    }, sort_keys=True)
+    return "ui-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+def upload_digests(uploaded_files):
+    """(file name, sha256 of the contents) pairs, so a re-uploaded file with new contents is a new input."""
+    return [(f.name, hashlib.sha256(f.getbuffer()).hexdigest()) for f in uploaded_files]
+
+def uploaded_documents(uploaded_files):
+    """(file name, contents) pairs of uploads, read in place from Streamlit's buffers."""
+    return [(uploaded_file.name, uploaded_file.getbuffer()) for uploaded_file in uploaded_files]
+
+def session_ranker(model, triage_model, shortlist_size, dedupe):
+    """RankingService kept for the session, so reruns reuse it (and its shared clients).
+
+    Only the options that shape the pipeline rebuild it; weights, priority and
+    example resumes are passed to each run instead.
+    """
+    key = (model, triage_model, shortlist_size, dedupe)
+    if st.session_state.get('ranker_key') != key:
+        st.session_state.ranker = RankingService(
+            model=model,
+            prefilter_top_k=shortlist_size or None,
+            triage_model=triage_model,
+            dedupe=dedupe
+        )
+        st.session_state.ranker_key = key
+    return st.session_state.ranker
 
 def main():
     if 'results_df' not in st.session_state:
@@ -33,6 +60,15 @@ def main():
         list(Settings.SUPPORTED_MODELS.keys()),
         index=0
     )
+    triage_model = None
+    if model_choice != "gpt-4o-mini":
+        if st.checkbox(
+            "Two-tier scoring",
+            value=False,
+            help=f"Score every resume with gpt-4o-mini first and only re-score the top "
+                 f"{Settings.CASCADE_TOP_N} (plus near misses) with {model_choice}"
+        ):
+            triage_model = "gpt-4o-mini"
 
     # Job description input
     job_desc_file = st.file_uploader(
@@ -74,6 +110,38 @@ def main():
     if total_weight != 100:
         st.sidebar.error("Weights must sum to 100%. Please adjust the values.")
     
+    # Convert scoring weights
+    scoring_weights = {
+        "skills_match": float(skills_weight) / 100,
+        "total_professional_experience": float(total_professional_experience_weight) / 100,
+        "total_relevant_experience": float(total_relevant_experience_weight) / 100,
+        "education": float(education_weight) / 100,
+        "certifications": float(certifications_weight) / 100,
+        "location": float(location_weight) / 100
+    }
+
+    force_rescore = st.sidebar.checkbox(
+        "Force re-scoring",
+        value=False,
+        help="Ignore cached evaluations and re-score every resume with the LLM"
+    )
+
+    shortlist_size = st.sidebar.number_input(
+        "Shortlist size (0 = score all)",
+        min_value=0,
+        value=0,
+        step=10,
+        help="Rank resumes against the job description by keyword relevance first and only "
+             "send this many of the best matches to the LLM"
+    )
+
+    dedupe = st.sidebar.checkbox(
+        "Score near-duplicates once",
+        value=False,
+        help="Resumes that are nearly identical (re-submissions, overlapping uploads) are evaluated "
+             "once and share the result"
+    )
+
     st.sidebar.header("Tie-Breaking Priority")
     st.sidebar.write("Set the priority order for breaking ties between candidates with the same score.")
     
@@ -126,33 +194,21 @@ def main():
                     return ""
                     
                 file_extension = uploaded_file.name.split(".")[-1].lower()
-                temp_dir = None
-                temp_path = None
                 
                 try:
                     if file_extension == "txt":
                         return uploaded_file.getvalue().decode("utf-8")
-                        
-                    # Create temporary directory and file
-                    temp_dir = tempfile.mkdtemp()
-                    temp_path = os.path.join(temp_dir, f"job_desc_temp.{file_extension}")
-                    
-                    # Save uploaded file content
-                    with open(temp_path, "wb") as f:
-                        f.write(uploaded_file.getvalue())
-                        f.flush()
-                        os.fsync(f.fileno())
 
                     # Select appropriate parser
                     if file_extension in ["doc", "docx"]:
-                        parser = DocxParser()
+                        parser = with_parse_cache(DocxParser())
                     elif file_extension == "pdf":
-                        parser = PyPDFParser()
+                        parser = with_parse_cache(PyPDFParser())
                     else:
                         raise ValueError(f"Unsupported file extension: {file_extension}")
                 
-                    # Parse the file
-                    result = parser.parse(temp_path)
+                    # Parse the upload straight from memory; an unchanged file is served by content hash
+                    result = parser.parse_bytes(uploaded_file.name, uploaded_file.getbuffer())
                     
                     if not result or not result.get("content"):
                         raise ValueError("Parser returned no content")
@@ -163,10 +219,6 @@ def main():
                     logging.error(f"Error reading file {uploaded_file.name}: {str(e)}")
                     st.error(f"Error reading job description file: {str(e)}")
                     return ""
-                
-                finally:
-                    # Use cleanup service
-                    CleanupService.cleanup_job_desc_files(temp_path, temp_dir)
 
             # Extract job description text if file is uploaded
             job_description = ""
@@ -177,57 +229,85 @@ def main():
                         st.error("Failed to read job description file. Please check the file and try again.")
 
             try:
-                with st.spinner("Processing resumes..."):
-                    # Save uploaded files
-                    temp_dir = save_uploaded_files(uploaded_files)
-                    
-                    # Process good resumes first if provided
-                    if good_resumes:
-                        num_resumes = len(good_resumes)
-                        if num_resumes > 5:
-                            st.warning(f"Note: Only the first 5 sample resumes will be processed (you uploaded {num_resumes})")
-                        good_dir = save_uploaded_files(good_resumes)
-                    else:
-                        good_dir = None
-                        
-                    # Convert scoring weights
-                    scoring_weights = {
-                        "skills_match": float(skills_weight) / 100,
-                        "total_professional_experience": float(total_professional_experience_weight) / 100,
-                        "total_relevant_experience": float(total_relevant_experience_weight) / 100,
-                        "education": float(education_weight) / 100,
-                        "certifications": float(certifications_weight) / 100,
-                        "location": float(location_weight) / 100
-                    }
+                # Uploads are parsed from memory; nothing is written to disk
+                documents = uploaded_documents(uploaded_files)
+                
+                # Process good resumes first if provided
+                if good_resumes:
+                    num_resumes = len(good_resumes)
+                    if num_resumes > 5:
+                        st.warning(f"Note: Only the first 5 sample resumes will be processed (you uploaded {num_resumes})")
                     
-                    # Initialize ranker
-                    ranker = RankingService(
-                        model=model_choice,
-                        scoring_weights=scoring_weights,
-                        ranking_priority=priority_order
+                ranker = session_ranker(model_choice, triage_model, int(shortlist_size), dedupe)
+                
+                # Stream scored candidates into a live leaderboard as they complete
+                progress_bar = st.progress(0.0, text="Preparing resumes...")
+                leaderboard = st.empty()
+                start_time = time.time()
+
+                def update_progress(completed, total):
+                    elapsed = time.time() - start_time
+                    remaining = elapsed / completed * (total - completed)
+                    progress_bar.progress(
+                        completed / total,
+                        text=f"Processed {completed}/{total} resumes · about {remaining:.0f}s remaining"
                     )
+
+                run_model = f"{triage_model}>{model_choice}" if triage_model else model_choice
+                run_id = compute_run_id(run_model, job_description, scoring_weights,
+                                        priority_order, uploaded_files, good_resumes)
+                results = []
+                for result in ranker.iter_documents(
+                    documents, job_description, progress_callback=update_progress, run_id=run_id,
+                    scoring_weights=scoring_weights, ranking_priority=priority_order,
+                    force_rescore=force_rescore,
+                    example_good_documents=uploaded_documents(good_resumes) if good_resumes else None
+                ):
+                    results.append(result)
+                    leaderboard.dataframe(
+                        ranker.rank_results(results, priority_order)[['Rank', 'name', 'total_score', 'File']],
+                        hide_index=True,
+                        use_container_width=True
+                    )
+                progress_bar.empty()
+                leaderboard.empty()
+                results_df = ranker.rank_results(results, priority_order)
+                
+                if not results_df.empty:
+                    st.session_state.results_df = results_df
+                    usage = ranker.last_run_usage
+                    if usage.get("input_tokens"):
+                        st.caption(
+                            f"{usage['calls']} LLM calls, {usage['input_tokens']:,} prompt tokens "
+                            f"({usage['cached_token_ratio']:.0%} served from prompt cache)"
+                        )
+                    if ranker.last_run_dedupe.get("duplicates"):
+                        st.caption(
+                            f"{ranker.last_run_dedupe['duplicates']} near-duplicate resumes reused "
+                            f"another resume's evaluation"
+                        )
+                    cascade = ranker.last_run_cascade
+                    if cascade.get("triaged"):
+                        st.caption(
+                            f"Two-tier scoring: {cascade['rescored']} of {cascade['triaged']} resumes re-scored "
+                            f"by {cascade['model']}, saving about ${cascade.get('cost_saved', 0):.2f}"
+                        )
+                else:
+                    st.error("No results were generated. Please check the uploaded files and try again.")
                     
-                    # Set example directory if good resumes were provided
-                    if good_dir:
-                        ranker.example_good_dir = good_dir
-                    
-                    # Process all resumes
-                    results_df = ranker.process_resumes(temp_dir, job_description)
-                    
-                    if not results_df.empty:
-                        st.session_state.results_df = results_df
-                    else:
-                        st.error("No results were generated. Please check the uploaded files and try again.")
-                    
-                    # Use cleanup service instead of direct cleanup
-                    CleanupService.cleanup_upload_dirs(temp_dir, good_dir)
-                        
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
 
     # Move results display outside the button click handler
     if st.session_state.results_df is not None:
         results_df = st.session_state.results_df
+
+        # Re-weight locally from stored per-criterion scores; no LLM calls needed
+        if total_weight == 100:
+            try:
+                results_df = RankingService.rescore(results_df, scoring_weights, priority_order)
+            except ValueError as e:
+                logging.warning(f"Could not re-weight results: {str(e)}")
         st.subheader("Rankings:")
         
         # Add filter controls
@@ -284,6 +364,31 @@ def main():
                 help="Total evaluation score",
                 format="%.2f"
             ),
+            "skills_match": st.column_config.NumberColumn(
+                "Skills Score",
+                help="Per-criterion skills match score (0-100)",
+                format="%.2f"
+            ),
+            "experience": st.column_config.NumberColumn(
+                "Experience Score",
+                help="Per-criterion experience score (0-100)",
+                format="%.2f"
+            ),
+            "education": st.column_config.NumberColumn(
+                "Education Score",
+                help="Per-criterion education score (0-100)",
+                format="%.2f"
+            ),
+            "certifications": st.column_config.NumberColumn(
+                "Certifications Score",
+                help="Per-criterion certifications score (0-100)",
+                format="%.2f"
+            ),
+            "location": st.column_config.NumberColumn(
+                "Location Score",
+                help="Per-criterion location score (0-100)",
+                format="%.2f"
+            ),
             "total_professional_experience": st.column_config.NumberColumn(
                 "Total Professional Experience (Years)",
                 help="Total years of professional experience (excluding internships)",
@@ -318,6 +423,14 @@ def main():
                 "Processing Time (s)",
                 help="Time taken to process the resume",
                 format="%.2f"
+            ),
+            "scored_by": st.column_config.TextColumn(
+                "Scored By",
+                help="Model that produced the scores"
+            ),
+            "duplicate_of": st.column_config.TextColumn(
+                "Duplicate Of",
+                help="Near-identical resume whose evaluation this row reuses"
             )
         }
         
@@ -373,8 +486,4 @@ def main():
             st.markdown('</div>', unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    try:
-        main()
-    finally:
-        # Ensure cleanup runs when the app shuts down
-        CleanupService.cleanup_temp_files()
+    main()
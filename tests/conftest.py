@@ -0,0 +1,52 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from app.services.llm_service import LLMService
+from app.services.ranking_service import RankingService
+
+
+def make_analysis(name, score):
+    """LLM analysis for a candidate scored score on every criterion."""
+    return {
+        "information": {"name": name, "skills": ["Python"]},
+        "evaluation": {"skills_match": score, "experience": score, "education": score,
+                       "certifications": score, "location": score, "total_score": score}
+    }
+
+
+@pytest.fixture
+def make_llm_service():
+    """Build an LLMService without Streamlit secrets; its caches are off unless given.
+
+    llm, when given, replaces the chat model.
+    """
+    def make(model="gpt-4o-mini", llm=None, evaluation_cache=None, characteristics_cache=None):
+        with patch('app.services.llm_service.st') as mock_st, \
+                patch('app.services.llm_service.get_evaluation_cache', return_value=evaluation_cache), \
+                patch('app.services.llm_service.get_characteristics_cache', return_value=characteristics_cache):
+            mock_st.secrets = {"OPENAI_API_KEY": "sk-test"}
+            service = LLMService(model=model)
+        if llm is not None:
+            service.llm = llm
+        return service
+    return make
+
+
+@pytest.fixture
+def make_ranking_service():
+    """Build a RankingService whose LLMService and resume parser are mocks.
+
+    parse maps a file path to its text and analyze maps a resume text to its
+    analysis; options go to RankingService.
+    """
+    def make(parse=None, analyze=None, parser_used="docx2txt", model="gpt-4o", **options):
+        with patch('app.services.ranking_service.LLMService'):
+            service = RankingService(model=model, **options)
+        service.resume_parser = MagicMock()
+        if parse is not None:
+            service.resume_parser.parse.side_effect = lambda path: {
+                "content": parse(path), "parser_used": parser_used
+            }
+        if analyze is not None:
+            service.llm_service.analyze_resume.side_effect = lambda text, *args, **kwargs: analyze(text)
+        return service
+    return make
@@ -0,0 +1,213 @@
+import pytest
+import json
+import docx
+from unittest.mock import patch, MagicMock
+from app.services.batch_transport import BatchTransport, OpenAIBatchTransport
+from app.models.ranking_run import RankingRun
+from app.services.ranking_service import RankingService
+from app.utils.disk_cache import DiskCache
+from app.config.settings import Settings
+
+
+def analysis_json(name, score):
+    return json.dumps({
+        "information": {"name": name, "skills": ["Python"]},
+        "evaluation": {"skills_match": score, "experience": score, "education": score,
+                       "certifications": score, "location": score, "total_score": score}
+    })
+
+
+def name_and_score(body):
+    """Fake model: the resume is the last line of the prompt, "<name> <score>"."""
+    name, score = body["messages"][0]["content"].strip().splitlines()[-1].split()
+    return name, float(score)
+
+
+class FakeBatchServer(BatchTransport):
+    """In-process stand-in for the Batch API.
+
+    Each batch reports in_progress for `polls_until_done` status calls, then
+    completed. Requests whose resume names appear in fail_names get an error line.
+    """
+
+    name = "fake"
+
+    def __init__(self, polls_until_done=1, fail_names=(), content=None):
+        self.polls_until_done = polls_until_done
+        self.fail_names = set(fail_names)
+        self.content = content or (lambda body: analysis_json(*name_and_score(body)))
+        self.batches = {}
+        self.files = {}
+        self.submitted = []
+
+    def submit(self, batch_file, endpoint, metadata=None):
+        with open(batch_file, encoding="utf-8") as batch_input:
+            requests = [json.loads(line) for line in batch_input]
+        batch_id = f"batch_{len(self.batches)}"
+        self.batches[batch_id] = {"requests": requests, "polls": 0}
+        self.submitted.append((endpoint, metadata, requests))
+        return batch_id
+
+    def status(self, batch_id):
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        total = len(batch["requests"])
+        if batch["polls"] <= self.polls_until_done:
+            return {"status": "in_progress", "completed": 0, "failed": 0, "total": total,
+                    "output_file_id": None, "error_file_id": None}
+
+        output, errors = [], []
+        for request in batch["requests"]:
+            if name_and_score(request["body"])[0] in self.fail_names:
+                errors.append({"custom_id": request["custom_id"], "response": None,
+                               "error": {"code": "server_error", "message": "boom"}})
+            else:
+                body = {"choices": [{"message": {"role": "assistant", "content": self.content(request["body"])}}],
+                        "usage": {"prompt_tokens": 1000, "completion_tokens": 200,
+                                  "prompt_tokens_details": {"cached_tokens": 768}}}
+                output.append({"custom_id": request["custom_id"], "error": None,
+                               "response": {"status_code": 200, "body": body}})
+        self.files[f"{batch_id}_out"] = "\n".join(json.dumps(line) for line in output)
+        self.files[f"{batch_id}_err"] = "\n".join(json.dumps(line) for line in errors)
+        return {"status": "completed", "completed": len(output), "failed": len(errors), "total": total,
+                "output_file_id": f"{batch_id}_out", "error_file_id": f"{batch_id}_err" if errors else None}
+
+    def download(self, file_id):
+        return self.files[file_id]
+
+
+@pytest.fixture(autouse=True)
+def batch_dir(tmp_path):
+    with patch('app.services.llm_service.Settings.BATCH_DIR', str(tmp_path / "batches")):
+        yield tmp_path / "batches"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path / "evaluations.sqlite3"))
+
+
+@pytest.fixture
+def llm_service(make_llm_service, cache):
+    return make_llm_service(
+        llm=MagicMock(side_effect=AssertionError("Batch runs must not make live calls")), evaluation_cache=cache
+    )
+
+
+def run_batch(llm_service, resumes, transport, **kwargs):
+    return llm_service.analyze_resumes_batch(
+        resumes, "Python engineer", {"skills_match": 1.0}, ["skills_match"],
+        transport=transport, poll_interval=0, **kwargs
+    )
+
+
+class TestAnalyzeResumesBatch:
+    def test_outputs_are_mapped_back_by_custom_id(self, llm_service, batch_dir):
+        server = FakeBatchServer(polls_until_done=2)
+        progress = []
+
+        analyses = run_batch(llm_service, {"a.pdf": "Jane 80", "team/b.pdf": "John 90"}, server,
+                             progress_callback=lambda done, total: progress.append((done, total)))
+
+        assert analyses["a.pdf"]["information"]["name"] == "Jane"
+        assert analyses["team/b.pdf"]["evaluation"]["total_score"] == 90
+        assert progress == [(0, 2), (2, 2)]
+        assert list(batch_dir.iterdir()) == []
+
+    def test_requests_render_the_live_prompt(self, llm_service):
+        server = FakeBatchServer()
+        run_batch(llm_service, {"a.pdf": "Jane 80"}, server)
+
+        endpoint, metadata, requests = server.submitted[0]
+        request = requests[0]
+        run = RankingRun(job_description="Python engineer", scoring_weights={"skills_match": 1.0},
+                         ranking_priority=["skills_match"])
+        template, input_vars, _ = llm_service._prepare_analysis("Jane 80", run)
+        prompt, _ = llm_service._get_chain(template, llm_service.llm)
+        assert endpoint == Settings.BATCH_ENDPOINT
+        assert metadata == {"model": "gpt-4o-mini"}
+        assert request["custom_id"] == "a.pdf"
+        assert request["body"]["model"] == "gpt-4o-mini"
+        assert request["body"]["messages"] == [{"role": "user", "content": prompt.format(**input_vars)}]
+        assert request["body"]["response_format"]["json_schema"]["strict"] is True
+
+    def test_cached_evaluations_are_not_resubmitted(self, llm_service):
+        run_batch(llm_service, {"a.pdf": "Jane 80"}, FakeBatchServer())
+        server = FakeBatchServer()
+
+        analyses = run_batch(llm_service, {"a.pdf": "Jane 80", "b.pdf": "John 90"}, server)
+
+        assert [r["custom_id"] for r in server.submitted[0][2]] == ["b.pdf"]
+        assert analyses["a.pdf"]["information"]["name"] == "Jane"
+
+    def test_failed_requests_get_error_responses(self, llm_service, cache):
+        analyses = run_batch(llm_service, {"a.pdf": "Jane 80", "b.pdf": "John 90"},
+                             FakeBatchServer(fail_names={"John"}))
+
+        assert analyses["b.pdf"]["evaluation"]["total_score"] == 0
+        assert analyses["a.pdf"]["evaluation"]["total_score"] == 80
+        assert len(cache) == 1
+
+    def test_fenced_output_goes_through_clean_llm_output(self, llm_service):
+        server = FakeBatchServer(content=lambda body: f"```json\n{analysis_json('Jane', 75)}\n```")
+        assert run_batch(llm_service, {"a.pdf": "Jane 75"}, server)["a.pdf"]["evaluation"]["total_score"] == 75
+
+    def test_large_runs_are_split_into_several_batches(self, llm_service):
+        server = FakeBatchServer()
+        with patch('app.services.llm_service.Settings.BATCH_MAX_REQUESTS', 2):
+            analyses = run_batch(llm_service, {f"{i}.pdf": f"C{i} {i}" for i in range(5)}, server)
+
+        assert [len(requests) for _, _, requests in server.submitted] == [2, 2, 1]
+        assert len(analyses) == 5
+
+    def test_usage_is_recorded_from_batch_output(self, llm_service):
+        snapshot = llm_service.usage.snapshot()
+        run_batch(llm_service, {"a.pdf": "Jane 80"}, FakeBatchServer())
+
+        usage = llm_service.usage.since(snapshot)
+        assert (usage["calls"], usage["input_tokens"], usage["cached_tokens"]) == (1, 1000, 768)
+
+    def test_unfinished_batch_times_out(self, llm_service):
+        with pytest.raises(TimeoutError):
+            run_batch(llm_service, {"a.pdf": "Jane 80"}, FakeBatchServer(polls_until_done=10**6), timeout=0)
+
+
+class TestOpenAIBatchTransport:
+    def test_uploads_file_and_creates_batch(self, tmp_path):
+        batch_file = tmp_path / "batch.jsonl"
+        batch_file.write_text("{}\n")
+        client = MagicMock()
+        client.files.create.return_value.id = "file-1"
+        client.batches.create.return_value.id = "batch-1"
+
+        batch_id = OpenAIBatchTransport(client).submit(str(batch_file), "/v1/chat/completions")
+
+        assert batch_id == "batch-1"
+        assert client.files.create.call_args.kwargs["purpose"] == "batch"
+        client.batches.create.assert_called_once_with(
+            input_file_id="file-1", endpoint="/v1/chat/completions", completion_window="24h", metadata=None
+        )
+
+
+class TestRankingBatch:
+    def test_directory_is_ranked_from_batch_results(self, tmp_path, llm_service):
+        resumes = tmp_path / "resumes"
+        for name, text in (("jane.docx", "Jane 80"), ("team/john.docx", "John 90"), ("team/ana.docx", "Ana 85")):
+            path = resumes / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            document = docx.Document()
+            document.add_paragraph(text)
+            document.save(str(path))
+        with patch('app.services.ranking_service.LLMService', return_value=llm_service), \
+                patch('app.parsers.resume_parser.with_parse_cache', side_effect=lambda parser: parser):
+            ranker = RankingService(model="gpt-4o-mini")
+
+        df = ranker.process_resumes_batch(
+            str(resumes), "Python engineer", transport=FakeBatchServer(fail_names={"Ana"}),
+            parse_workers=0, recursive=True, poll_interval=0
+        )
+
+        # A failed request ranks last with the error response, as in live runs
+        assert list(df["File"]) == ["team/john.docx", "jane.docx", "team/ana.docx"]
+        assert list(df["name"])[:2] == ["John", "Jane"]
+        assert list(df["total_score"]) == [90, 80, 0]
@@ -0,0 +1,172 @@
+import pytest
+import argparse
+import docx
+import pandas as pd
+from unittest.mock import patch
+from app.cli import main, parse_weights, parse_priority, open_writer, read_results
+from app.services.usage_tracker import UsageTracker
+from tests.conftest import make_analysis
+
+
+def write_resume(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = docx.Document()
+    document.add_paragraph(text)
+    document.save(str(path))
+
+
+def fake_analysis(resume_text, *args, **kwargs):
+    name, score = resume_text.split()
+    return make_analysis(name, float(score))
+
+
+class TestArguments:
+    def test_weights_accept_percentages(self):
+        weights = parse_weights("skills_match=50,experience=30,education=20")
+        assert weights == pytest.approx({"skills_match": 0.5, "experience": 0.3, "education": 0.2})
+
+    def test_weights_accept_fractions_and_aliases(self):
+        weights = parse_weights("skills_match=0.6,total_relevant_experience=0.4")
+        assert weights["total_relevant_experience"] == pytest.approx(0.4)
+
+    def test_weights_must_sum_to_one_hundred(self):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_weights("skills_match=50,experience=30")
+
+    def test_unknown_criteria_are_rejected(self):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_weights("charisma=100")
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_priority("skills_match,charisma")
+
+
+class TestWriters:
+    ROWS = [
+        {"name": "Jane", "total_score": 80, "skills_match": 90, "File": "a/jane.docx"},
+        {"name": "John", "total_score": 70.5, "skills_match": 60, "File": "john.pdf"},
+    ]
+
+    @pytest.mark.parametrize("extension", ["csv", "jsonl", "parquet"])
+    def test_round_trip(self, tmp_path, extension):
+        path = str(tmp_path / f"results.{extension}")
+        with open_writer(path) as writer:
+            for row in self.ROWS:
+                writer.write(row)
+
+        df = read_results(path)
+        assert list(df["File"]) == ["a/jane.docx", "john.pdf"]
+        assert list(df["total_score"]) == [80.0, 70.5]
+
+    def test_csv_append_keeps_single_header(self, tmp_path):
+        path = str(tmp_path / "results.csv")
+        with open_writer(path) as writer:
+            writer.write(self.ROWS[0])
+        with open_writer(path, append=True) as writer:
+            writer.write(self.ROWS[1])
+
+        assert len(read_results(path)) == 2
+
+    def test_missing_results_file_reads_empty(self, tmp_path):
+        assert read_results(str(tmp_path / "missing.csv")).empty
+
+
+class TestBatchRun:
+    @pytest.fixture(autouse=True)
+    def fake_llm(self):
+        with patch('app.services.ranking_service.LLMService') as mock_llm, \
+                patch('app.parsers.resume_parser.with_parse_cache', side_effect=lambda parser: parser):
+            mock_llm.return_value.usage = UsageTracker()
+            mock_llm.return_value.evaluation_cache = None
+            mock_llm.return_value.analyze_resume.side_effect = fake_analysis
+            yield mock_llm.return_value
+
+    @pytest.fixture
+    def workspace(self, tmp_path):
+        resumes = tmp_path / "resumes"
+        write_resume(resumes / "jane.docx", "Jane 80")
+        write_resume(resumes / "team" / "john.docx", "John 90")
+        jd = tmp_path / "jd.txt"
+        jd.write_text("Python engineer")
+        return tmp_path
+
+    def run_cli(self, workspace, *extra):
+        return main([
+            str(workspace / "resumes"), "--jd", str(workspace / "jd.txt"),
+            "--parse-workers", "0", "--workers", "2", *extra
+        ])
+
+    def test_ranks_nested_folders_and_streams_rows(self, workspace, capsys):
+        output = workspace / "out.jsonl"
+        ranked = workspace / "ranked.csv"
+
+        assert self.run_cli(workspace, "-o", str(output), "--ranked-output", str(ranked)) == 0
+
+        assert sorted(read_results(str(output))["File"]) == ["jane.docx", "team/john.docx"]
+        assert list(pd.read_csv(ranked)["name"]) == ["John", "Jane"]
+        captured = capsys.readouterr()
+        assert "Scored 2 resumes" in captured.err
+        assert "John" in captured.out
+
+    def test_resume_from_skips_finished_files(self, workspace, fake_llm):
+        output = workspace / "out.csv"
+        assert self.run_cli(workspace, "-o", str(output)) == 0
+        write_resume(workspace / "resumes" / "team" / "ana.docx", "Ana 85")
+        fake_llm.analyze_resume.reset_mock()
+
+        assert self.run_cli(workspace, "-o", str(output), "--resume-from", str(output)) == 0
+
+        assert fake_llm.analyze_resume.call_count == 1
+        assert sorted(read_results(str(output))["name"]) == ["Ana", "Jane", "John"]
+
+    def test_resume_from_retries_failed_evaluations(self, workspace, fake_llm, capsys):
+        output = workspace / "out.csv"
+        fake_llm.analyze_resume.side_effect = lambda text, *args, **kwargs: (
+            {"failed": True, "information": {}, "evaluation": {"total_score": 0}}
+            if text.startswith("Jane") else fake_analysis(text)
+        )
+        assert self.run_cli(workspace, "-o", str(output)) == 0
+        assert list(read_results(str(output))["name"]) == ["John"]
+        assert "1 resumes failed to evaluate" in capsys.readouterr().err
+        fake_llm.analyze_resume.reset_mock()
+        fake_llm.analyze_resume.side_effect = fake_analysis
+
+        assert self.run_cli(workspace, "-o", str(output), "--resume-from", str(output)) == 0
+
+        assert fake_llm.analyze_resume.call_count == 1
+        assert sorted(read_results(str(output))["name"]) == ["Jane", "John"]
+
+    def test_no_recursive_ignores_subfolders(self, workspace):
+        output = workspace / "out.csv"
+        assert self.run_cli(workspace, "-o", str(output), "--no-recursive") == 0
+        assert list(read_results(str(output))["File"]) == ["jane.docx"]
+
+    def test_unsupported_output_format_fails(self, workspace):
+        assert self.run_cli(workspace, "-o", str(workspace / "out.xlsx")) == 1
+
+    def test_batch_mode_writes_rows_after_the_batch(self, workspace, fake_llm):
+        fake_llm.analyze_resumes_batch.side_effect = (
+            lambda resumes, *args, **kwargs: {key: fake_analysis(text) for key, text in resumes.items()}
+        )
+        output = workspace / "out.csv"
+
+        assert self.run_cli(workspace, "-o", str(output), "--batch", "--poll-interval", "0") == 0
+
+        assert fake_llm.analyze_resume.call_count == 0
+        assert fake_llm.analyze_resumes_batch.call_args.kwargs["poll_interval"] == 0
+        assert sorted(read_results(str(output))["name"]) == ["Jane", "John"]
+
+    def test_dedupe_scores_duplicates_once(self, workspace, fake_llm, capsys):
+        write_resume(workspace / "resumes" / "team" / "jane_again.docx", "Jane 80")
+        output = workspace / "out.csv"
+
+        assert self.run_cli(workspace, "-o", str(output), "--dedupe") == 0
+
+        assert fake_llm.analyze_resume.call_count == 2
+        rows = read_results(str(output)).set_index("File")
+        assert rows.loc["team/jane_again.docx", "duplicate_of"] == "jane.docx"
+        assert rows.loc["team/jane_again.docx", "total_score"] == 80
+        assert "1 near-duplicates of 3 resumes" in capsys.readouterr().err
+
+    def test_batch_mode_rejects_run_id(self, workspace):
+        with pytest.raises(SystemExit):
+            self.run_cli(workspace, "-o", str(workspace / "out.csv"), "--batch", "--run-id", "nightly")
@@ -0,0 +1,101 @@
+import random
+import pytest
+from app.services.deduplication import DuplicateDetector, MinHasher, contact_key
+
+
+def make_resume(seed, words=300):
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def edit(text, changes):
+    words = text.split()
+    for position in changes:
+        words[position] = "edited"
+    return " ".join(words)
+
+
+class TestMinHasher:
+    def test_identical_texts_share_a_signature(self):
+        hasher = MinHasher()
+        text = make_resume(1)
+        assert (hasher.signature(text) == hasher.signature(text)).all()
+
+    def test_similarity_tracks_overlap(self):
+        hasher = MinHasher()
+        original = make_resume(1)
+        near = DuplicateDetector.similarity(hasher.signature(original), hasher.signature(edit(original, [10])))
+        far = DuplicateDetector.similarity(hasher.signature(original), hasher.signature(make_resume(2)))
+        assert near > 0.9
+        assert far < 0.2
+
+    def test_empty_text_has_no_signature(self):
+        assert MinHasher().signature("  \n ") is None
+
+    def test_num_perm_must_be_a_power_of_two(self):
+        with pytest.raises(ValueError):
+            MinHasher(num_perm=48)
+
+
+class TestDuplicateDetector:
+    def test_clusters_near_duplicates_under_first_key(self):
+        original = make_resume(1)
+        texts = {
+            "b_copy.pdf": original,
+            "a_original.pdf": original,
+            "c_edited.pdf": edit(original, [5, 150]),
+            "d_other.pdf": make_resume(2),
+            "e_empty.pdf": "",
+        }
+
+        clusters = DuplicateDetector().cluster(texts)
+
+        assert clusters == {
+            "a_original.pdf": ["b_copy.pdf", "c_edited.pdf"],
+            "d_other.pdf": [],
+            "e_empty.pdf": [],
+        }
+
+    def test_template_resumes_of_different_applicants_stay_apart(self):
+        body = make_resume(5)
+        texts = {
+            "ana.pdf": f"Ana Silva\nana@example.com\n{body}",
+            "ana_again.pdf": f"Ana Silva\nANA@example.com\n{body}",
+            "ben.pdf": f"Ben Okafor\nben@example.com\n{body}",
+        }
+
+        assert DuplicateDetector().cluster(texts) == {"ana.pdf": ["ana_again.pdf"], "ben.pdf": []}
+
+    def test_contact_key_normalizes_emails_and_phones(self):
+        assert contact_key("Mail Ana@Example.com, call +1 (555) 010-2030 in 2019") == (
+            frozenset({"ana@example.com"}), frozenset({"15550102030"})
+        )
+
+    def test_threshold_controls_what_counts_as_duplicate(self):
+        original = make_resume(1)
+        # Ten edited words change 30 of ~300 shingles: about 0.8 similar
+        reworded = edit(original, range(0, 300, 30))
+        texts = {"a.pdf": original, "b.pdf": reworded}
+
+        assert DuplicateDetector(threshold=0.95).cluster(texts) == {"a.pdf": [], "b.pdf": []}
+        assert DuplicateDetector(threshold=0.6).cluster(texts) == {"a.pdf": ["b.pdf"]}
+
+    def test_signatures_do_not_depend_on_the_process(self):
+        # Python's str hash is salted per process; the word hash must not be
+        first = MinHasher().word_hashes("Senior data engineer")
+        assert first[0] == MinHasher().word_hashes("senior")[0]
+        assert int(first[0]) == 11905993193051389870
+
+    def test_reports_stats(self):
+        detector = DuplicateDetector()
+        text = make_resume(3)
+        detector.cluster({"a.pdf": text, "b.pdf": text, "c.pdf": make_resume(4)})
+
+        assert detector.last_stats["resumes"] == 3
+        assert detector.last_stats["clusters"] == 2
+        assert detector.last_stats["duplicates"] == 1
+
+    def test_invalid_threshold(self):
+        with pytest.raises(ValueError):
+            DuplicateDetector(threshold=0)
@@ -116,4 +116,33 @@ class TestHelpers:
         assert result == {"a": {"b": 2}}
         
         # Test malformed JSON
-        assert clean_llm_output("{a: 1}") == {}
\ No newline at end of file
+        assert clean_llm_output("{a: 1}") == {}
+
+    def test_clean_llm_output_unfenced_with_prose(self):
+        """JSON surrounded by prose is found without a code fence"""
+        text = 'Here is the analysis:\n{"information": {"name": "Jane"}, "evaluation": {"total_score": 70}}\nThanks!'
+        assert clean_llm_output(text)["evaluation"] == {"total_score": 70}
+
+    def test_clean_llm_output_braces_inside_strings(self):
+        """Braces and escaped quotes inside JSON strings do not end the object"""
+        text = '```json\n{"summary": "uses {templates} and \\"quotes\\" }", "score": 5}\n```'
+        assert clean_llm_output(text) == {"summary": 'uses {templates} and "quotes" }', "score": 5}
+
+    def test_clean_llm_output_skips_prose_braces(self):
+        """Placeholder braces in prose before the JSON are skipped"""
+        text = 'Fill in {name} and {score}:\n{"name": "Jane", "score": 9}'
+        assert clean_llm_output(text) == {"name": "Jane", "score": 9}
+
+    def test_clean_llm_output_malformed_outer_object(self):
+        """A malformed top-level object is rejected, not replaced by a nested one"""
+        text = '{"information": {"name": "Jane"}, "evaluation": {"total_score": 70},}'
+        assert clean_llm_output(text) == {}
+
+    def test_clean_llm_output_prefers_json_fence(self):
+        """A ```json block wins over an object in the surrounding prose"""
+        text = 'Template: {"name": "<name>"}\n```json\n{"name": "Jane", "score": 9}\n```'
+        assert clean_llm_output(text) == {"name": "Jane", "score": 9}
+
+    def test_clean_llm_output_truncated(self):
+        """A response cut off mid-object yields nothing"""
+        assert clean_llm_output('```json\n{"information": {"name": "Jane", "skills": ["Py') == {}
@@ -1,6 +1,25 @@
 import pytest
-from app.services.llm_service import LLMService
+import httpx
+from app.services.llm_service import LLMService, PerLoopTransport, get_chat_model
 from unittest.mock import patch, MagicMock
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.language_models.fake_chat_models import FakeListChatModel, GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain.prompts import PromptTemplate
+from app.config.prompt import PROMPT_INSTRUCTIONS, PROMPT_RUN_CONTEXT, PROMPT_TEMPLATE, PROMPT_TEMPLATE_GOOD
+from app.services.evaluation_cache import evaluation_cache_key
+from app.utils.disk_cache import DiskCache
+from app.models.analysis import ResumeAnalysis
+from app.models.ranking_run import RankingRun
+from langchain_core.runnables import RunnableLambda
+from pydantic import ValidationError
+from app.utils.tokens import count_tokens
+from app.config.settings import Settings
 
 class TestLLMService:
     @pytest.fixture
@@ -194,11 +213,8 @@ class TestLLMService:
         mock_chain = mock_prompt_instance | mock_llm | mock_str_parser
         mock_chain.invoke.return_value = mock_response
         
-        # Set the job description
-        llm_service.current_job_description = "Sample job description"
-        
         # Call the method
-        result = llm_service._analyze_characteristics("Sample resume text", "good")
+        result = llm_service._analyze_characteristics("Sample resume text", "good", "Sample job description")
         
         assert result == [
             "Clear contact information",
@@ -225,11 +241,8 @@ class TestLLMService:
         mock_chain = mock_prompt_instance | mock_llm | mock_str_parser
         mock_chain.invoke.return_value = mock_response
         
-        # Set the job description
-        llm_service.current_job_description = "Sample job description"
-        
         # Call the method
-        result = llm_service._analyze_characteristics("Sample resume text", "bad")
+        result = llm_service._analyze_characteristics("Sample resume text", "bad", "Sample job description")
         
         assert result == [
             "Spelling errors",
@@ -297,4 +310,462 @@ class TestLLMService:
         """Test reading from nonexistent directory"""
         mock_listdir.side_effect = FileNotFoundError()
         result = llm_service._read_resumes_from_dir("/nonexistent/dir")
-        assert result == ""
\ No newline at end of file
+        assert result == ""
+
+ANALYSIS_JSON = """```json
+{"information": {"name": "Jane Doe", "skills": ["Python"]},
+ "evaluation": {"skills_match": 90, "experience": 80, "education": 70,
+                "certifications": 60, "location": 100, "total_score": 83.5,
+                "explanation": "Strong match"}}
+```"""
+
+
+class TestEvaluationCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return DiskCache(str(tmp_path / "evaluations.sqlite3"), max_entries=100, ttl_seconds=3600)
+
+    @pytest.fixture
+    def llm_service(self, make_llm_service, cache):
+        return make_llm_service(llm=FakeListChatModel(responses=[ANALYSIS_JSON] * 3), evaluation_cache=cache)
+
+    def test_repeated_request_is_served_from_cache(self, llm_service, sample_weights):
+        first = llm_service.analyze_resume("resume", "jd", sample_weights, ["skills_match"])
+        llm_service.llm = MagicMock(side_effect=AssertionError("LLM must not be called"))
+        second = llm_service.analyze_resume("resume", "jd", sample_weights, ["skills_match"])
+
+        assert first == second
+        assert second["evaluation"]["total_score"] == 83.5
+        assert llm_service.evaluation_cache.stats()["hits"] == 1
+
+    def test_force_refresh_bypasses_cache(self, llm_service, sample_weights):
+        llm_service.analyze_resume("resume", "jd", sample_weights, ["skills_match"])
+        llm_service.analyze_resume("resume", "jd", sample_weights, ["skills_match"], force_refresh=True)
+
+        assert llm_service.llm.i == 2
+        assert llm_service.evaluation_cache.stats()["hits"] == 0
+
+    def test_changed_weights_miss_the_cache(self, llm_service, sample_weights):
+        llm_service.analyze_resume("resume", "jd", sample_weights, ["skills_match"])
+        llm_service.analyze_resume("resume", "jd", {**sample_weights, "location": 0.2}, ["skills_match"])
+
+        assert llm_service.llm.i == 2
+
+    def test_async_analysis_shares_the_cache(self, llm_service, sample_weights):
+        first = asyncio.run(llm_service.analyze_resume_async("resume", "jd", sample_weights, ["skills_match"]))
+        second = llm_service.analyze_resume("resume", "jd", sample_weights, ["skills_match"])
+
+        assert first["evaluation"]["total_score"] == 83.5
+        assert first == second
+        assert llm_service.llm.i == 1
+
+    def test_error_responses_are_not_cached(self, llm_service, sample_weights):
+        llm_service.llm = FakeListChatModel(responses=["not json"])
+        llm_service.analyze_resume("resume", "jd", sample_weights, ["skills_match"])
+
+        assert len(llm_service.evaluation_cache) == 0
+
+    def test_key_is_canonical(self, sample_weights):
+        reordered = dict(reversed(list(sample_weights.items())))
+        key_a = evaluation_cache_key("r", "jd", sample_weights, ["a"], model="gpt-4o", template_version="1")
+        key_b = evaluation_cache_key("r", "jd", reordered, ["a"], model="gpt-4o", template_version="1")
+        key_c = evaluation_cache_key("r", "jd", sample_weights, ["a"], model="gpt-4o-mini", template_version="1")
+
+        assert key_a == key_b
+        assert key_a != key_c
+
+    def test_expired_entries_are_evicted(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "ttl.sqlite3"), ttl_seconds=60)
+        cache.set("key", {"evaluation": {}})
+        with patch('app.utils.disk_cache.time.time', return_value=time.time() + 120):
+            assert cache.get("key") is None
+        assert len(cache) == 0
+
+    @pytest.fixture
+    def sample_weights(self):
+        return {"skills_match": 0.5, "experience": 0.3, "education": 0.2}
+
+
+class TestCharacteristicsCache:
+    EXAMPLES = [("star.docx", b"docx bytes")]
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return DiskCache(str(tmp_path / "characteristics.sqlite3"), max_entries=10)
+
+    @pytest.fixture
+    def make_service(self, make_llm_service, cache):
+        def make():
+            service = make_llm_service(
+                llm=FakeListChatModel(responses=["- Led migrations\n- Mentored engineers"] * 3),
+                characteristics_cache=cache
+            )
+            service._read_resumes_from_documents = MagicMock(return_value="=== Resume: star.docx ===\nStar\n")
+            return service
+        return make
+
+    def test_characteristics_are_shared_across_services(self, make_service):
+        first = make_service()
+        first.analyze_example_resumes(job_description="jd", good_resumes=self.EXAMPLES)
+        second = make_service()
+        characteristics = second.analyze_example_resumes(job_description="jd", good_resumes=self.EXAMPLES)
+
+        assert characteristics == ["Led migrations", "Mentored engineers"]
+        assert first.llm.i == 1 and second.llm.i == 0
+
+    def test_changed_job_description_or_force_refresh_calls_the_llm(self, make_service):
+        service = make_service()
+        service.analyze_example_resumes(job_description="jd", good_resumes=self.EXAMPLES)
+        service.analyze_example_resumes(job_description="other jd", good_resumes=self.EXAMPLES)
+        assert service.llm.i == 2
+
+        service = make_service()
+        service.analyze_example_resumes(job_description="jd", good_resumes=self.EXAMPLES, force_refresh=True)
+        assert service.llm.i == 1
+
+    def test_empty_extractions_are_not_cached(self, make_service, cache):
+        service = make_service()
+        service.llm = FakeListChatModel(responses=["no bullet points"])
+        assert service.analyze_example_resumes(job_description="jd", good_resumes=self.EXAMPLES) == []
+        assert len(cache) == 0
+
+
+class TestPromptLayout:
+    @pytest.fixture
+    def llm_service(self, make_llm_service):
+        return make_llm_service()
+
+    def render(self, llm_service, resume_text, good_characteristics=()):
+        run = RankingRun(
+            job_description="Senior Python role",
+            scoring_weights={"skills_match": 0.6, "experience": 0.4},
+            ranking_priority=["skills_match"],
+            good_characteristics=good_characteristics
+        )
+        template, input_vars, _ = llm_service._prepare_analysis(resume_text, run)
+        return PromptTemplate.from_template(template).format(**input_vars)
+
+    @pytest.mark.parametrize("good_characteristics", [(), ("Quantified achievements",)])
+    def test_resume_is_the_only_varying_tail(self, llm_service, good_characteristics):
+        first = self.render(llm_service, "RESUME-ONE", good_characteristics)
+        second = self.render(llm_service, "RESUME-TWO", good_characteristics)
+
+        prefix = first[:first.index("RESUME-ONE")]
+        assert second.startswith(prefix)
+        assert first == prefix + "RESUME-ONE\n"
+        for run_constant in ("Senior Python role", "Skills_match: 60.0%", llm_service.current_month_year):
+            assert run_constant in prefix
+
+    def test_instructions_are_fully_static(self):
+        assert PromptTemplate.from_template(PROMPT_INSTRUCTIONS).input_variables == []
+        assert PROMPT_TEMPLATE.startswith(PROMPT_INSTRUCTIONS)
+        assert PROMPT_TEMPLATE_GOOD.startswith(PROMPT_INSTRUCTIONS + PROMPT_RUN_CONTEXT)
+
+    def test_cached_token_ratio_is_recorded(self, llm_service):
+        message = AIMessage(
+            content=ANALYSIS_JSON,
+            usage_metadata={"input_tokens": 2000, "output_tokens": 300, "total_tokens": 2300,
+                            "input_token_details": {"cache_read": 1536}}
+        )
+        llm_service.llm = GenericFakeChatModel(messages=iter([message, message]))
+        snapshot = llm_service.usage.snapshot()
+
+        llm_service.analyze_resume("resume", "jd", {"skills_match": 1.0}, [])
+        llm_service.analyze_resume("resume", "jd", {"skills_match": 1.0}, [])
+        summary = llm_service.usage.since(snapshot)
+
+        assert summary["calls"] == 2
+        assert summary["input_tokens"] == 4000
+        assert summary["cached_tokens"] == 3072
+        assert summary["cached_token_ratio"] == 0.768
+
+
+VALID_ANALYSIS = {
+    "information": {
+        "name": "Jane Doe", "total_professional_experience": 6.0, "total_relevant_experience": 4.5,
+        "skills": ["Python"], "education": ["BSc"], "certifications": [],
+        "location": "Austin, TX", "email": "jane@example.com", "phone": None
+    },
+    "evaluation": {
+        "skills_match": 90, "experience": 80, "education": 70, "certifications": 0,
+        "location": 100, "total_score": 78.5, "explanation": "Strong Python background"
+    }
+}
+
+
+def structured_result(payload=None, error=None, content=""):
+    return {
+        "raw": AIMessage(content=content, usage_metadata={"input_tokens": 100, "output_tokens": 50, "total_tokens": 150}),
+        "parsed": ResumeAnalysis.model_validate(payload) if payload else None,
+        "parsing_error": error
+    }
+
+
+class FakeStructuredChatModel:
+    """Chat model stand-in whose structured output returns scripted results."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.prompts = []
+        self.structured_calls = []
+
+    def with_structured_output(self, schema, **kwargs):
+        self.structured_calls.append((schema, kwargs))
+
+        def respond(prompt):
+            self.prompts.append(prompt.to_string())
+            return self.results.pop(0)
+        return RunnableLambda(respond)
+
+
+class TestStructuredOutput:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return DiskCache(str(tmp_path / "evaluations.sqlite3"))
+
+    @pytest.fixture
+    def llm_service(self, make_llm_service, cache):
+        return make_llm_service(evaluation_cache=cache)
+
+    def analyze(self, llm_service):
+        return llm_service.analyze_resume("resume", "jd", {"skills_match": 1.0}, ["skills_match"])
+
+    def test_valid_response_is_used_without_text_parsing(self, llm_service):
+        llm_service.llm = FakeStructuredChatModel([structured_result(VALID_ANALYSIS)])
+
+        with patch('app.services.llm_service.clean_llm_output') as clean:
+            result = self.analyze(llm_service)
+
+        assert result == VALID_ANALYSIS
+        clean.assert_not_called()
+        schema, kwargs = llm_service.llm.structured_calls[0]
+        assert schema is ResumeAnalysis
+        assert kwargs == {"method": "json_schema", "strict": True, "include_raw": True}
+        assert llm_service.usage.snapshot()["input_tokens"] == 100
+        assert len(llm_service.evaluation_cache) == 1
+
+    def test_schema_violation_is_retried_once_with_the_error(self, llm_service):
+        llm_service.llm = FakeStructuredChatModel([
+            structured_result(error=ValueError("total_score: Input should be less than or equal to 100")),
+            structured_result(VALID_ANALYSIS)
+        ])
+
+        result = self.analyze(llm_service)
+
+        assert result["evaluation"]["total_score"] == 78.5
+        first, retry = llm_service.llm.prompts
+        assert retry.startswith(first)
+        assert "less than or equal to 100" in retry
+        assert len(llm_service.evaluation_cache) == 1
+
+    def test_repeated_violation_is_salvaged_but_not_cached(self, llm_service):
+        invalid = '{"information": {"name": "Jane"}, "evaluation": {"total_score": 120}}'
+        llm_service.llm = FakeStructuredChatModel([
+            structured_result(error=ValueError("bad"), content=invalid),
+            structured_result(error=ValueError("bad"), content=invalid)
+        ])
+
+        result = self.analyze(llm_service)
+
+        assert result["evaluation"]["total_score"] == 120
+        assert len(llm_service.llm.prompts) == 2
+        assert len(llm_service.evaluation_cache) == 0
+
+    def test_async_schema_retry(self, llm_service):
+        llm_service.llm = FakeStructuredChatModel([
+            structured_result(error=ValueError("missing explanation")),
+            structured_result(VALID_ANALYSIS)
+        ])
+
+        result = asyncio.run(llm_service.analyze_resume_async("resume", "jd", {"skills_match": 1.0}, []))
+        assert result == VALID_ANALYSIS
+
+    def test_openai_models_use_the_json_schema(self, llm_service):
+        assert llm_service._evaluation_llm() is not llm_service.llm
+
+    def test_models_without_structured_output_parse_text(self, llm_service):
+        llm_service.llm = FakeListChatModel(responses=[ANALYSIS_JSON])
+        assert llm_service._evaluation_llm() is llm_service.llm
+        assert self.analyze(llm_service)["evaluation"]["total_score"] == 83.5
+
+    def test_schema_rejects_out_of_range_scores(self):
+        payload = {**VALID_ANALYSIS, "evaluation": {**VALID_ANALYSIS["evaluation"], "total_score": 120}}
+        with pytest.raises(ValidationError):
+            ResumeAnalysis.model_validate(payload)
+
+
+class TestChainReuse:
+    @pytest.fixture
+    def llm_service(self, make_llm_service):
+        return make_llm_service(llm=FakeListChatModel(responses=[ANALYSIS_JSON] * 5))
+
+    def test_chain_is_built_once_per_template(self, llm_service):
+        for i in range(3):
+            llm_service.analyze_resume(f"resume {i}", "jd", {"skills_match": 1.0}, ["skills_match"])
+
+        assert len(llm_service._chains) == 1
+        assert llm_service._get_chain(PROMPT_TEMPLATE)[1] is llm_service._get_chain(PROMPT_TEMPLATE)[1]
+
+    def test_replacing_the_model_rebuilds_the_chain(self, llm_service):
+        _, first = llm_service._get_chain(PROMPT_TEMPLATE)
+        llm_service.llm = FakeListChatModel(responses=[ANALYSIS_JSON])
+        _, second = llm_service._get_chain(PROMPT_TEMPLATE)
+
+        assert first is not second
+        assert second.last is llm_service.llm
+
+    def test_run_constant_pieces_are_rendered_once(self, llm_service):
+        weights = {"skills_match": 0.6, "experience": 0.4}
+        assert llm_service._generate_criteria_list(weights) is llm_service._generate_criteria_list(dict(weights))
+
+    def test_token_estimate_matches_full_prompt(self, llm_service):
+        resume = "Senior engineer with Python and SQL experience. " * 50
+        run = RankingRun(job_description="Python role", scoring_weights={"skills_match": 1.0},
+                         ranking_priority=["skills_match"])
+        template, input_vars, _ = llm_service._prepare_analysis(resume, run)
+        _, estimated = llm_service._build_chain(template, input_vars)
+
+        full = count_tokens(PromptTemplate.from_template(template).format(**input_vars), "gpt-4o-mini")
+        assert abs(estimated - Settings.EXPECTED_COMPLETION_TOKENS - full) <= 2
+
+
+class TestSharedChatModel:
+    def test_services_for_a_model_share_one_client(self, make_llm_service):
+        first = make_llm_service("gpt-4o-mini")
+        second = make_llm_service("gpt-4o-mini")
+
+        assert first.llm is second.llm
+        assert first.llm is not make_llm_service("gpt-4o").llm
+
+    def test_client_keeps_connections_alive(self):
+        client = get_chat_model("gpt-4o-mini", "sk-pool-test")
+
+        async def async_pool():
+            return client.root_async_client._client._transport._transport()._pool
+
+        for pool in (client.root_client._client._transport._pool, asyncio.run(async_pool())):
+            assert pool._max_keepalive_connections == Settings.HTTP_MAX_CONNECTIONS
+            assert pool._keepalive_expiry == Settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+
+    def test_async_calls_work_across_event_loops(self):
+        body = json.dumps({
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }).encode()
+
+        class KeepAliveHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            with patch.dict(os.environ, {"OPENAI_API_BASE": f"http://127.0.0.1:{server.server_port}/v1"}):
+                client = get_chat_model("gpt-4o-mini", "sk-loop-test")
+            # Each asyncio.run is a new event loop, as in repeated process_resumes_async calls
+            assert [asyncio.run(client.ainvoke("hi")).content for _ in range(2)] == ["ok", "ok"]
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_async_pools_are_per_event_loop(self):
+        transport = PerLoopTransport(httpx.Limits(max_connections=2))
+
+        async def pools():
+            return transport._transport(), transport._transport()
+
+        first, same_loop = asyncio.run(pools())
+        second, _ = asyncio.run(pools())
+
+        assert first is same_loop
+        assert first is not second
+
+    def test_reference_date_is_read_per_call(self, make_llm_service):
+        service = make_llm_service()
+        run = RankingRun(job_description="jd", scoring_weights={"skills_match": 1.0},
+                         ranking_priority=["skills_match"])
+
+        with patch('app.services.llm_service.datetime') as mock_datetime:
+            mock_datetime.today.return_value.strftime.return_value = "January 2031"
+            _, input_vars, _ = service._prepare_analysis("resume", run)
+
+        assert input_vars["current_month_year"] == "January 2031"
+
+
+class EchoStructuredChatModel:
+    """Thread-safe stand-in that records every rendered prompt and names the candidate after the resume."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def with_structured_output(self, schema, **kwargs):
+        def respond(prompt):
+            text = prompt.to_string()
+            time.sleep(0.001)  # Let concurrent calls interleave
+            self.prompts.append(text)
+            resume = text.rsplit("\n", 2)[-2]
+            payload = {**VALID_ANALYSIS, "information": {**VALID_ANALYSIS["information"], "name": resume}}
+            return structured_result(payload)
+        return RunnableLambda(respond)
+
+
+class TestConcurrentRuns:
+    @pytest.fixture
+    def llm_service(self, make_llm_service):
+        return make_llm_service(llm=EchoStructuredChatModel())
+
+    def make_run(self, i):
+        return RankingRun(
+            job_description=f"JD-{i}", scoring_weights={"skills_match": 1.0},
+            ranking_priority=["skills_match"],
+            good_characteristics=(f"TRAIT-{i}",) if i % 2 else ()
+        )
+
+    def assert_prompts_match_their_runs(self, llm_service, count):
+        assert len(llm_service.llm.prompts) == count
+        for prompt in llm_service.llm.prompts:
+            i = int(prompt.rsplit("resume-", 1)[1].split("-")[0])
+            assert f"JD-{i}" in prompt and prompt.count("JD-") == 1
+            assert prompt.count("TRAIT-") == (i % 2) and (not i % 2 or f"TRAIT-{i}" in prompt)
+
+    def test_threads_share_one_service(self, llm_service):
+        from concurrent.futures import ThreadPoolExecutor
+        runs = [self.make_run(i) for i in range(8)]
+        jobs = [(f"resume-{i}-{k}", run) for i, run in enumerate(runs) for k in range(4)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda job: llm_service.analyze_resume(job[0], run=job[1]), jobs))
+
+        assert [result["information"]["name"] for result in results] == [resume for resume, _ in jobs]
+        self.assert_prompts_match_their_runs(llm_service, len(jobs))
+
+    def test_async_tasks_share_one_service(self, llm_service):
+        runs = [self.make_run(i) for i in range(8)]
+
+        async def rank_all():
+            return await asyncio.gather(*(
+                llm_service.analyze_resume_async(f"resume-{i}-0", run=run) for i, run in enumerate(runs)
+            ))
+
+        results = asyncio.run(rank_all())
+
+        assert [result["information"]["name"] for result in results] == [f"resume-{i}-0" for i in range(8)]
+        self.assert_prompts_match_their_runs(llm_service, len(runs))
+
+    def test_service_keeps_no_run_state(self, llm_service):
+        llm_service.analyze_resume("resume-1-0", run=self.make_run(1))
+        llm_service.analyze_resume("resume-2-0", "JD-2", {"skills_match": 1.0}, ["skills_match"])
+
+        assert "TRAIT-" not in llm_service.llm.prompts[-1]
+        assert not hasattr(llm_service, "good_characteristics")
@@ -1,9 +1,15 @@
 import pytest
 import os
+import asyncio
+import sqlite3
+import PyPDF2
 from app.parsers.pypdf_parser import PyPDFParser
 from app.parsers.docx_parser import DocxParser
 from app.parsers.llama_parser import LlamaParser
 from app.parsers.base_parser import BaseParser
+from app.parsers.cached_parser import CachedParser
+from app.parsers.resume_parser import ResumeParser
+from app.utils.disk_cache import DiskCache
 from unittest.mock import patch, MagicMock
 
 SAMPLE_DIR = "tests/samples"  # Adjust based on actual location
@@ -107,3 +113,335 @@ class TestBaseParser:
         result = parser.parse("test.pdf")
         assert result["content"] == "test"
         assert result["parser_used"] == "test"
+
+    def test_parse_bytes_defaults_to_a_temporary_file(self):
+        """Parsers without an in-memory path still parse bytes, through a temporary copy"""
+        class FileOnlyParser(BaseParser):
+            def parse(self, file_path: str):
+                self.seen = file_path
+                with open(file_path, "rb") as handle:
+                    return {"content": handle.read().decode(), "parser_used": "test"}
+
+        parser = FileOnlyParser()
+        result = parser.parse_bytes("resume.docx", memoryview(b"Jane Doe"))
+
+        assert result["content"] == "Jane Doe"
+        assert parser.seen.endswith(".docx")
+        assert not os.path.exists(parser.seen)
+
+class TestCachedParser:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return DiskCache(str(tmp_path / "parse_cache.sqlite3"))
+
+    @pytest.fixture
+    def resume_file(self, tmp_path):
+        path = tmp_path / "resume.pdf"
+        path.write_bytes(b"%PDF-1.4 resume bytes")
+        return str(path)
+
+    def test_second_parse_is_served_from_cache(self, cache, resume_file):
+        inner = MagicMock(spec=PyPDFParser)
+        inner.name, inner.version, inner.cache_empty_results = "PyPDF2", "1", True
+        inner.parse.return_value = {"content": "Jane Doe", "parser_used": "PyPDF2"}
+        parser = CachedParser(inner, cache)
+
+        assert parser.parse(resume_file)["content"] == "Jane Doe"
+        assert parser.parse(resume_file)["content"] == "Jane Doe"
+
+        inner.parse.assert_called_once_with(resume_file)
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_cache_key_is_content_addressed(self, cache, resume_file, tmp_path):
+        copy = tmp_path / "renamed.pdf"
+        copy.write_bytes(open(resume_file, "rb").read())
+        parser = CachedParser(PyPDFParser(), cache)
+
+        assert parser.cache_key(resume_file) == parser.cache_key(str(copy))
+        assert parser.cache_key(resume_file) != CachedParser(DocxParser(), cache).cache_key(resume_file)
+
+    def test_empty_llama_results_are_not_cached(self, cache, resume_file):
+        inner = MagicMock(spec=LlamaParser)
+        inner.name, inner.version, inner.cache_empty_results = "LlamaParse", "1", False
+        inner.parse.return_value = {"content": "", "parser_used": "LlamaParse"}
+        parser = CachedParser(inner, cache)
+
+        parser.parse(resume_file)
+        parser.parse(resume_file)
+
+        assert inner.parse.call_count == 2
+        assert len(cache) == 0
+
+    def test_missing_file_bypasses_cache(self, cache):
+        parser = CachedParser(PyPDFParser(), cache)
+        result = parser.parse("nonexistent.pdf")
+
+        assert result["content"] == ""
+        assert len(cache) == 0
+
+    def test_lru_eviction_respects_byte_budget(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "small.sqlite3"), max_bytes=120, touch_interval=0)
+        cache.set("a", {"content": "x" * 40})
+        cache.set("b", {"content": "y" * 40})
+        assert cache.get("a") is not None  # "a" is now the most recently used
+        cache.set("c", {"content": "z" * 40})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_hits_refresh_recency_once_per_interval(self, cache):
+        cache.set("a", {"content": "x"})
+        written = self.accessed_at(cache, "a")
+        with patch('app.utils.disk_cache.time.time', return_value=written + 30):
+            cache.get("a")
+        assert self.accessed_at(cache, "a") == written
+        with patch('app.utils.disk_cache.time.time', return_value=written + 90):
+            cache.get("a")
+        assert self.accessed_at(cache, "a") == written + 90
+
+    def test_totals_follow_replacements_and_deletes(self, cache):
+        cache.set("a", {"content": "x"})
+        cache.set("a", {"content": "x" * 50})
+        cache.set("b", {"content": "y"})
+        cache.delete("b")
+
+        assert len(cache) == 1
+        assert cache.stats()["bytes"] == len('{"content": "%s"}' % ("x" * 50))
+
+    @staticmethod
+    def accessed_at(cache, key):
+        with sqlite3.connect(cache.path) as conn:
+            return conn.execute("SELECT accessed_at FROM entries WHERE key = ?", (key,)).fetchone()[0]
+
+
+class StubLlamaClient:
+    """Local stand-in for the LlamaParse client: echoes the file name as its text."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.sync_calls = []
+        self.async_calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def _documents(self, file_path, extra_info=None):
+        # Like LlamaParse, bytes need a file_name in extra_info
+        name = extra_info["file_name"] if isinstance(file_path, bytes) else os.path.basename(file_path)
+        if name in self.fail:
+            raise RuntimeError("Job failed")
+        return [MagicMock(text=f"text of {name}")]
+
+    def load_data(self, file_path, extra_info=None):
+        self.sync_calls.append(file_path)
+        return self._documents(file_path, extra_info)
+
+    async def aload_data(self, file_path, extra_info=None):
+        self.async_calls.append(file_path)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self._documents(file_path, extra_info)
+
+
+class TestLlamaParserBatch:
+    @pytest.fixture
+    def scans(self, tmp_path):
+        paths = []
+        for i in range(6):
+            path = tmp_path / f"scan_{i}.pdf"
+            path.write_bytes(b"%PDF-1.4 scanned " + bytes([i]))
+            paths.append(str(path))
+        return paths
+
+    def test_parse_many_maps_results_to_files(self, scans):
+        client = StubLlamaClient(fail={"scan_2.pdf"})
+        results = LlamaParser(client=client).parse_many(scans)
+
+        assert results[scans[0]]["content"] == "text of scan_0.pdf"
+        assert results[scans[2]]["content"] == ""
+        assert "Job failed" in results[scans[2]]["error"]
+        assert sorted(client.async_calls) == sorted(scans)
+        assert client.sync_calls == []
+
+    def test_parse_many_bounds_requests_in_flight(self, scans):
+        client = StubLlamaClient()
+        with patch('app.parsers.llama_parser.Settings.LLAMA_PARSE_CONCURRENCY', 2):
+            LlamaParser(client=client).parse_many(scans)
+        assert client.peak == 2
+
+    def test_client_is_shared_per_api_key(self):
+        with patch('app.parsers.llama_parser.LlamaParse') as mock_llama, \
+                patch('app.parsers.llama_parser._clients', {}), \
+                patch.dict(os.environ, {"LLAMA_CLOUD_API_KEY": "llx-test"}):
+            first = LlamaParser()._get_client()
+            second = LlamaParser()._get_client()
+
+        assert first is second
+        mock_llama.assert_called_once()
+
+    def test_cached_parse_many_only_sends_misses(self, tmp_path, scans):
+        client = StubLlamaClient()
+        parser = CachedParser(LlamaParser(client=client), DiskCache(str(tmp_path / "cache.sqlite3")))
+        parser.parse(scans[0])
+
+        results = parser.parse_many(scans)
+
+        assert len(results) == 6
+        assert client.async_calls.count(scans[0]) == 0
+        assert len(client.async_calls) == 5
+
+    def test_resume_parser_defers_fallback(self, scans):
+        pdf_parser = MagicMock()
+        pdf_parser.parse.return_value = {"content": "", "parser_used": "PyPDF2"}
+        client = StubLlamaClient()
+        parser = ResumeParser(pdf_parser=pdf_parser, docx_parser=MagicMock(),
+                              llama_parser=LlamaParser(client=client), fallback=False)
+
+        assert parser.parse(scans[0])["content"] == ""
+        assert client.sync_calls == []
+        assert parser.parse(scans[0], fallback=True)["content"] == "text of scan_0.pdf"
+        assert parser.parse_fallback(scans[:3])[scans[1]]["content"] == "text of scan_1.pdf"
+
+
+def write_text_pdf(path, page_texts):
+    """Write a minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(bytes(output))
+    return str(path)
+
+
+class TestPdfStreaming:
+    @pytest.fixture
+    def long_pdf(self, tmp_path):
+        return write_text_pdf(tmp_path / "portfolio.pdf", [f"Page {i} project notes" for i in range(1, 41)])
+
+    def test_short_pdf_is_read_completely(self, tmp_path):
+        path = write_text_pdf(tmp_path / "resume.pdf", ["Jane Doe", "Python engineer"])
+        result = PyPDFParser().parse(path)
+
+        assert "Jane Doe" in result["content"] and "Python engineer" in result["content"]
+        assert "truncated" not in result
+
+    def test_page_budget_stops_extraction(self, long_pdf):
+        with patch.object(PyPDF2._page.PageObject, "extract_text", autospec=True,
+                          side_effect=lambda page, *args, **kwargs: "x") as extract:
+            result = PyPDFParser(max_pages=5).parse(long_pdf)
+
+        assert extract.call_count == 5
+        assert (result["truncated"], result["pages_read"], result["page_count"]) == (True, 5, 40)
+
+    def test_character_budget_cuts_text(self, long_pdf):
+        result = PyPDFParser(max_pages=0, max_chars=50).parse(long_pdf)
+
+        assert len(result["content"]) == 50
+        assert result["content"].startswith("Page 1 project notes")
+        assert result["truncated"]
+
+    def test_iter_pages_is_lazy(self, long_pdf):
+        pages = PyPDFParser().iter_pages(long_pdf)
+        assert "Page 1" in next(pages)
+        assert "Page 2" in next(pages)
+        pages.close()
+
+    def test_mmap_and_file_object_agree(self, long_pdf):
+        mapped = PyPDFParser(use_mmap=True).parse(long_pdf)
+        buffered = PyPDFParser(use_mmap=False).parse(long_pdf)
+        assert mapped == buffered
+
+    def test_budget_is_part_of_cache_key(self, tmp_path, long_pdf):
+        cache = DiskCache(str(tmp_path / "cache.sqlite3"))
+        assert CachedParser(PyPDFParser(max_pages=5), cache).cache_key(long_pdf) != \
+            CachedParser(PyPDFParser(max_pages=10), cache).cache_key(long_pdf)
+
+    def test_empty_file_is_reported(self, tmp_path):
+        path = tmp_path / "empty.pdf"
+        path.write_bytes(b"")
+        result = PyPDFParser().parse(str(path))
+        assert result["content"] == "" and "error" in result
+
+
+class TestInMemoryParsing:
+    @pytest.fixture
+    def pdf_path(self, tmp_path):
+        return write_text_pdf(tmp_path / "resume.pdf", ["Jane Doe", "Python engineer"])
+
+    def test_pdf_bytes_match_file_parse(self, pdf_path):
+        data = open(pdf_path, "rb").read()
+        parser = PyPDFParser()
+
+        assert parser.parse_bytes("resume.pdf", memoryview(data)) == parser.parse(pdf_path)
+
+    def test_invalid_pdf_bytes_are_reported(self):
+        result = PyPDFParser().parse_bytes("broken.pdf", b"not a pdf")
+        assert result["content"] == "" and "error" in result
+
+    def test_docx_bytes(self, tmp_path):
+        import docx
+        document = docx.Document()
+        document.add_paragraph("Jane Doe, data engineer")
+        path = tmp_path / "resume.docx"
+        document.save(str(path))
+
+        result = DocxParser().parse_bytes("resume.docx", memoryview(path.read_bytes()))
+
+        assert "Jane Doe, data engineer" in result["content"]
+        assert DocxParser().parse_bytes("broken.docx", b"not a zip")["content"] == ""
+
+    def test_cached_bytes_share_entries_with_files(self, tmp_path, pdf_path):
+        cache = DiskCache(str(tmp_path / "cache.sqlite3"))
+        inner = MagicMock(spec=PyPDFParser)
+        inner.name, inner.version, inner.cache_empty_results = "PyPDF2", "1", True
+        inner.parse.return_value = {"content": "Jane Doe", "parser_used": "PyPDF2"}
+        parser = CachedParser(inner, cache)
+        parser.parse(pdf_path)
+
+        assert parser.parse_bytes("upload.pdf", open(pdf_path, "rb").read())["content"] == "Jane Doe"
+        inner.parse_bytes.assert_not_called()
+
+    def test_llama_parses_bytes_with_file_name(self):
+        client = StubLlamaClient(fail={"scan_1.pdf"})
+        parser = LlamaParser(client=client)
+
+        assert parser.parse_bytes("scan_0.pdf", memoryview(b"%PDF scan"))["content"] == "text of scan_0.pdf"
+        results = parser.parse_many_bytes({"scan_0.pdf": b"%PDF a", "scan_1.pdf": b"%PDF b"})
+
+        assert results["scan_0.pdf"]["content"] == "text of scan_0.pdf"
+        assert "Job failed" in results["scan_1.pdf"]["error"]
+        assert len(client.async_calls) == 2
+
+    def test_resume_parser_routes_bytes_by_extension(self):
+        pdf_parser, docx_parser = MagicMock(), MagicMock()
+        pdf_parser.parse_bytes.return_value = {"content": "", "parser_used": "PyPDF2"}
+        docx_parser.parse_bytes.return_value = {"content": "docx text", "parser_used": "docx2txt"}
+        client = StubLlamaClient()
+        parser = ResumeParser(pdf_parser=pdf_parser, docx_parser=docx_parser,
+                              llama_parser=LlamaParser(client=client), fallback=False)
+
+        assert parser.parse_bytes("cv.docx", b"docx")["content"] == "docx text"
+        assert parser.parse_bytes("scan.pdf", b"%PDF")["content"] == ""
+        assert client.sync_calls == []
+        assert parser.parse_bytes("scan.pdf", b"%PDF", fallback=True)["content"] == "text of scan.pdf"
+        assert parser.parse_fallback_bytes({"scan.pdf": b"%PDF"})["scan.pdf"]["content"] == "text of scan.pdf"
@@ -0,0 +1,88 @@
+import pytest
+import os
+from app.services.prefilter import LexicalPrefilter, bm25_scores, tokenize
+from tests.conftest import make_analysis
+
+JOB_DESCRIPTION = "Senior backend engineer: Python, Django, PostgreSQL and AWS. C++ is a plus."
+
+RESUMES = {
+    "python.docx": "Backend engineer. Python and Django services on AWS with PostgreSQL.",
+    "partial.docx": "Data analyst using Python, Excel and Tableau dashboards.",
+    "cpp.docx": "Embedded developer writing C++ firmware.",
+    "chef.docx": "Head chef running a busy kitchen, menu planning and staff rota.",
+}
+
+
+class TestBM25:
+    def test_tokenizer_keeps_technology_names(self):
+        assert tokenize("Node.js, C++ and C#.") == ["node.js", "c++", "and", "c#"]
+
+    def test_relevant_resumes_score_higher(self):
+        scores = bm25_scores(JOB_DESCRIPTION, list(RESUMES.values()))
+        ranked = [name for _, name in sorted(zip(scores, RESUMES), reverse=True)]
+
+        assert ranked[0] == "python.docx"
+        assert ranked[-1] == "chef.docx"
+        assert scores[-1] == 0
+
+    def test_empty_query_scores_zero(self):
+        assert list(bm25_scores("the and of", ["Python", "Java"])) == [0, 0]
+
+
+class TestLexicalPrefilter:
+    def test_top_k_keeps_best_matches_in_order(self):
+        selected = LexicalPrefilter(top_k=2).select(JOB_DESCRIPTION, RESUMES)
+        assert list(selected)[0] == "python.docx"
+        assert len(selected) == 2
+
+    def test_min_score_is_relative_to_best_resume(self):
+        prefilter = LexicalPrefilter(min_score=0.01)
+        selected = prefilter.select(JOB_DESCRIPTION, RESUMES)
+
+        assert "chef.docx" not in selected
+        assert prefilter.last_stats["candidates"] == 4
+        assert prefilter.last_stats["shortlisted"] == 3
+
+    def test_no_overlap_keeps_everything(self):
+        assert len(LexicalPrefilter(top_k=1).select("Pastry chef", {"a": "Python", "b": "Java"})) == 2
+
+    @pytest.mark.parametrize("kwargs", [{"top_k": 0}, {"min_score": 1.5}])
+    def test_invalid_settings(self, kwargs):
+        with pytest.raises(ValueError):
+            LexicalPrefilter(**kwargs)
+
+
+class TestRankingWithPrefilter:
+    @pytest.fixture
+    def resume_dir(self, tmp_path):
+        for name in RESUMES:
+            (tmp_path / name).write_bytes(b"docx")
+        return str(tmp_path)
+
+    @pytest.fixture
+    def ranking_service(self, make_ranking_service):
+        return make_ranking_service(
+            parse=lambda path: RESUMES[os.path.basename(path)],
+            analyze=lambda text: make_analysis(text.split(".")[0], 50),
+            prefilter_top_k=2
+        )
+
+    def test_only_shortlist_reaches_the_llm(self, ranking_service, resume_dir):
+        progress = []
+        results = list(ranking_service.iter_resumes(
+            resume_dir, JOB_DESCRIPTION, parse_workers=0, llm_workers=1,
+            progress_callback=lambda done, total: progress.append((done, total))
+        ))
+
+        scored = [call.args[0] for call in ranking_service.llm_service.analyze_resume.call_args_list]
+        assert scored[0] == RESUMES["python.docx"]
+        assert len(scored) == 2
+        files = {result["File"] for result in results}
+        assert "python.docx" in files and "chef.docx" not in files
+        assert progress[-1] == (2, 2)
+        assert ranking_service.last_run_prefilter["candidates"] == 4
+
+    def test_without_prefilter_every_resume_is_scored(self, ranking_service, resume_dir):
+        ranking_service.prefilter = None
+        list(ranking_service.iter_resumes(resume_dir, JOB_DESCRIPTION, parse_workers=0))
+        assert ranking_service.llm_service.analyze_resume.call_count == 4
@@ -1,8 +1,16 @@
 import pytest
+import time
+import asyncio
+import threading
+import docx
 import pandas as pd
 from app.services.ranking_service import RankingService
 import os
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+from langchain_core.messages import AIMessage
+from app.services.usage_tracker import UsageTracker
+from app.services.run_journal import RunJournal
+from tests.conftest import make_analysis
 
 SAMPLE_DIR = "tests/samples"  # Make sure this directory exists with sample files
 
@@ -126,3 +134,585 @@ class TestRankingService:
         mock_llm_instance.analyze_example_resumes.assert_called_once_with(
             "good/dir", "bad/dir"
         )
+
+
+class TestRescore:
+    @pytest.fixture
+    def results(self):
+        return pd.DataFrame([
+            {"Rank": 1, "name": "A", "total_score": 80.0, "skills_match": 90, "experience": 70,
+             "education": 80, "certifications": 50, "location": 100,
+             "total_professional_experience": 4.0, "total_relevant_experience": 3.0},
+            {"Rank": 2, "name": "B", "total_score": 75.0, "skills_match": 60, "experience": 95,
+             "education": 70, "certifications": 90, "location": 50,
+             "total_professional_experience": 9.0, "total_relevant_experience": 8.0},
+        ])
+
+    @pytest.fixture
+    def ranking_service(self, make_ranking_service):
+        return make_ranking_service()
+
+    def test_rescore_recomputes_total_and_rank(self, results):
+        rescored = RankingService.rescore(results, {"experience": 1.0})
+
+        assert list(rescored["name"]) == ["B", "A"]
+        assert list(rescored["Rank"]) == [1, 2]
+        assert rescored["total_score"].tolist() == [95.0, 70.0]
+
+    def test_rescore_maps_experience_aliases(self, results):
+        weights = {"skills_match": 0.5, "total_professional_experience": 0.25, "total_relevant_experience": 0.25}
+        rescored = RankingService.rescore(results, weights)
+
+        assert rescored.set_index("name").loc["A", "total_score"] == 80.0
+        assert rescored.set_index("name").loc["B", "total_score"] == 77.5
+
+    def test_rescore_breaks_ties_by_priority(self, results):
+        weights = {"education": 0.5, "location": 0.5}
+        results.loc[1, ["education", "location"]] = [100, 80]  # B ties A at 90
+
+        by_location = RankingService.rescore(results, weights, ["location"])
+        by_experience = RankingService.rescore(results, weights, ["total_professional_experience"])
+
+        assert list(by_location["name"]) == ["A", "B"]
+        assert list(by_experience["name"]) == ["B", "A"]
+
+    def test_rescore_does_not_mutate_input(self, results):
+        RankingService.rescore(results, {"experience": 1.0})
+        assert results["total_score"].tolist() == [80.0, 75.0]
+
+    def test_rescore_requires_sub_scores(self, results):
+        with pytest.raises(ValueError):
+            RankingService.rescore(results.drop(columns=["experience"]), {"experience": 1.0})
+
+    def test_results_keep_per_criterion_scores(self, ranking_service, tmp_path):
+        resume = tmp_path / "jane.docx"
+        resume.write_bytes(b"docx")
+        ranking_service.resume_parser = MagicMock()
+        ranking_service.resume_parser.parse.return_value = {"content": "Jane Doe", "parser_used": "docx2txt"}
+        ranking_service.llm_service.analyze_resume.return_value = {
+            "information": {"name": "Jane Doe", "skills": ["Python"]},
+            "evaluation": {"skills_match": 88, "experience": 77, "education": 66,
+                           "certifications": 55, "location": 44, "total_score": 70}
+        }
+
+        result = ranking_service._process_single_resume(str(resume), ranking_service.new_run("jd"), 0.0)
+        df = ranking_service._create_results_dataframe([result])
+
+        assert result["skills_match"] == 88
+        assert df.loc[0, "location"] == 44
+        assert list(df.columns) == RankingService.RESULT_COLUMNS
+
+
+class TestProcessResumesAsync:
+    @pytest.fixture
+    def ranking_service(self, make_ranking_service):
+        return make_ranking_service(parse=os.path.basename)
+
+    @pytest.fixture
+    def resume_dir(self, tmp_path):
+        for i in range(12):
+            (tmp_path / f"candidate_{i:02d}.docx").write_bytes(b"docx")
+        return str(tmp_path)
+
+    def test_concurrency_is_bounded_by_semaphore(self, ranking_service, resume_dir):
+        in_flight, peak = 0, 0
+
+        async def fake_analyze(resume_text, *args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return make_analysis(resume_text, float(resume_text[10:12]))
+
+        ranking_service.llm_service.analyze_resume_async = AsyncMock(side_effect=fake_analyze)
+        df = asyncio.run(ranking_service.process_resumes_async(
+            resume_dir, "jd", max_concurrency=3, parse_workers=0
+        ))
+
+        assert len(df) == 12
+        assert peak == 3
+        assert df["name"].iloc[0] == "candidate_11.docx"
+        assert list(df["Rank"]) == list(range(1, 13))
+
+    def test_results_stream_in_completion_order(self, ranking_service, resume_dir):
+        async def fake_analyze(resume_text, *args, **kwargs):
+            # Later files finish first
+            await asyncio.sleep(0.05 - int(resume_text[10:12]) * 0.004)
+            return make_analysis(resume_text, 50)
+
+        ranking_service.llm_service.analyze_resume_async = AsyncMock(side_effect=fake_analyze)
+
+        async def collect():
+            return [r["name"] async for r in ranking_service.iter_resumes_async(
+                resume_dir, "jd", max_concurrency=12, parse_workers=0
+            )]
+
+        names = asyncio.run(collect())
+        assert names[0] == "candidate_11.docx"
+        assert names[-1] == "candidate_00.docx"
+
+    def test_failed_parses_are_skipped(self, ranking_service, resume_dir):
+        ranking_service.resume_parser.parse.side_effect = lambda path: (
+            {"content": "", "parser_used": "docx2txt"} if path.endswith("03.docx")
+            else {"content": "text", "parser_used": "docx2txt"}
+        )
+        ranking_service.llm_service.analyze_resume_async = AsyncMock(return_value=make_analysis("x", 60))
+
+        df = asyncio.run(ranking_service.process_resumes_async(resume_dir, "jd", parse_workers=0))
+        assert len(df) == 11
+
+    def test_parsing_in_process_pool(self, ranking_service, tmp_path):
+        document = docx.Document()
+        document.add_paragraph("Jane Doe - Python engineer")
+        document.save(str(tmp_path / "jane.docx"))
+        ranking_service.llm_service.analyze_resume_async = AsyncMock(return_value=make_analysis("Jane", 70))
+
+        df = asyncio.run(ranking_service.process_resumes_async(str(tmp_path), "jd", parse_workers=1))
+
+        assert len(df) == 1
+        resume_text = ranking_service.llm_service.analyze_resume_async.call_args[0][0]
+        assert "Python engineer" in resume_text
+        ranking_service.resume_parser.parse.assert_not_called()
+
+    def test_recursive_runs_share_file_keys_and_journal_with_iter_resumes(self, ranking_service, resume_dir,
+                                                                         tmp_path):
+        os.makedirs(os.path.join(resume_dir, "team"))
+        with open(os.path.join(resume_dir, "team", "candidate_12.docx"), "wb") as f:
+            f.write(b"docx")
+        ranking_service.llm_service.analyze_resume.side_effect = (
+            lambda text, *args, **kwargs: make_analysis(text, 50)
+        )
+        ranking_service.llm_service.analyze_resume_async = AsyncMock(side_effect=(
+            lambda text, *args, **kwargs: make_analysis(text, 50)
+        ))
+
+        async def collect(**kwargs):
+            return [r async for r in ranking_service.iter_resumes_async(resume_dir, "jd", parse_workers=0, **kwargs)]
+
+        with patch('app.services.run_journal.Settings.RUN_JOURNAL_DIR', str(tmp_path / "runs")):
+            streamed = list(ranking_service.iter_resumes(resume_dir, "jd", parse_workers=0, recursive=True,
+                                                         skip_files={"candidate_00.docx"}, run_id="mixed"))
+            replayed = asyncio.run(collect(recursive=True, run_id="mixed"))
+
+        assert os.path.join("team", "candidate_12.docx") in {row["File"] for row in streamed}
+        assert sorted(row["File"] for row in replayed) == sorted(
+            [row["File"] for row in streamed] + ["candidate_00.docx"]
+        )
+        # Only the file skipped by the first run is evaluated again
+        assert ranking_service.llm_service.analyze_resume_async.call_count == 1
+
+
+class TestIterResumes:
+    @pytest.fixture
+    def ranking_service(self, make_ranking_service):
+        return make_ranking_service(
+            parse=lambda path: "" if path.endswith("bad.docx") else os.path.basename(path),
+            analyze=lambda text: make_analysis(text, float(text[10:12]))
+        )
+
+    @pytest.fixture
+    def resume_dir(self, tmp_path):
+        for i in range(5):
+            (tmp_path / f"candidate_{i:02d}.docx").write_bytes(b"docx")
+        (tmp_path / "bad.docx").write_bytes(b"docx")
+        return str(tmp_path)
+
+    def test_yields_each_candidate_and_reports_progress(self, ranking_service, resume_dir):
+        progress = []
+        results = list(ranking_service.iter_resumes(
+            resume_dir, "jd", progress_callback=lambda done, total: progress.append((done, total)),
+            parse_workers=0
+        ))
+
+        assert len(results) == 5
+        assert progress == [(i, 6) for i in range(1, 7)]
+
+    def test_rank_results_orders_partial_results(self, ranking_service, resume_dir):
+        stream = ranking_service.iter_resumes(resume_dir, "jd", parse_workers=0)
+        partial = [next(stream), next(stream)]
+        stream.close()
+
+        leaderboard = ranking_service.rank_results(partial)
+        assert list(leaderboard["Rank"]) == [1, 2]
+        assert leaderboard["total_score"].is_monotonic_decreasing
+
+    def test_process_resumes_matches_streamed_results(self, ranking_service, resume_dir):
+        df = ranking_service.process_resumes(resume_dir, "jd", parse_workers=0)
+        assert list(df["name"]) == [f"candidate_{i:02d}.docx" for i in range(4, -1, -1)]
+
+    def test_llm_calls_bounded_by_llm_workers(self, ranking_service, resume_dir):
+        lock = threading.Lock()
+        in_flight, peak = 0, 0
+
+        def slow_analyze(text, *args, **kwargs):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+            return make_analysis(text, float(text[10:12]))
+
+        ranking_service.llm_service.analyze_resume.side_effect = slow_analyze
+        df = ranking_service.process_resumes(resume_dir, "jd", parse_workers=0, llm_workers=2)
+
+        assert len(df) == 5
+        assert peak == 2
+
+    def test_parse_stage_is_bounded_by_queue(self, ranking_service, resume_dir):
+        release = threading.Event()
+        ranking_service.llm_service.analyze_resume.side_effect = (
+            lambda text, *args, **kwargs: release.wait(5) and make_analysis(text, 50)
+        )
+        results = []
+
+        with patch('app.services.ranking_service.Settings.PARSE_QUEUE_SIZE', 1):
+            stream = ranking_service.iter_resumes(resume_dir, "jd", parse_workers=0, llm_workers=1)
+            consumer = threading.Thread(target=lambda: results.extend(stream))
+            consumer.start()
+            time.sleep(0.3)
+            parsed_while_blocked = ranking_service.resume_parser.parse.call_count
+            release.set()
+            consumer.join(5)
+
+        # One resume with the LLM worker, one queued, one waiting to be queued,
+        # plus at most the unreadable file that never enters the queue
+        assert parsed_while_blocked <= 4
+        assert len(results) == 5
+
+    def test_parsing_in_process_pool(self, ranking_service, tmp_path):
+        for name in ("jane", "john"):
+            document = docx.Document()
+            document.add_paragraph(f"{name} - Python engineer")
+            document.save(str(tmp_path / f"{name}.docx"))
+        ranking_service.llm_service.analyze_resume.side_effect = (
+            lambda text, *args, **kwargs: make_analysis(text.split()[0], 70)
+        )
+
+        df = ranking_service.process_resumes(str(tmp_path), "jd", parse_workers=1)
+
+        assert sorted(df["name"]) == ["jane", "john"]
+        ranking_service.resume_parser.parse.assert_not_called()
+
+
+class TestCascade:
+    # Triage score, then the strong model's score, per candidate
+    SCORES = {"ana": (90, 85), "ben": (80, 88), "cal": (77, 70), "dee": (60, 65), "eve": (40, 45)}
+
+    @pytest.fixture
+    def ranking_service(self):
+        def make_llm_service(model):
+            service = MagicMock(model=model, usage=UsageTracker())
+            tier = 0 if model == "gpt-4o-mini" else 1
+
+            def analyze(text, *args, **kwargs):
+                service.usage.record(AIMessage(content="", usage_metadata={
+                    "input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100
+                }), latency=1.0 + tier)
+                return make_analysis(text, self.SCORES[text][tier])
+            service.analyze_resume.side_effect = analyze
+            return service
+
+        with patch('app.services.ranking_service.LLMService', side_effect=make_llm_service):
+            service = RankingService(model="gpt-4o", triage_model="gpt-4o-mini",
+                                     cascade_top_n=2, cascade_margin=5)
+        service.resume_parser = MagicMock()
+        service.resume_parser.parse.side_effect = lambda path: {
+            "content": os.path.splitext(os.path.basename(path))[0], "parser_used": "docx2txt"
+        }
+        return service
+
+    @pytest.fixture
+    def resume_dir(self, tmp_path):
+        for name in self.SCORES:
+            (tmp_path / f"{name}.docx").write_bytes(b"docx")
+        return str(tmp_path)
+
+    def test_only_contested_band_is_rescored(self, ranking_service, resume_dir):
+        df = ranking_service.process_resumes(resume_dir, "jd", parse_workers=0)
+
+        # Top 2 triage scores are 90 and 80; cal (77) is within 5 points of the cutoff
+        rescored = {call.args[0] for call in ranking_service.llm_service.analyze_resume.call_args_list}
+        assert rescored == {"ana", "ben", "cal"}
+        assert ranking_service.triage_service.analyze_resume.call_count == 5
+        assert list(df["name"]) == ["ben", "ana", "cal", "dee", "eve"]
+        assert dict(zip(df["name"], df["scored_by"])) == {
+            "ana": "gpt-4o", "ben": "gpt-4o", "cal": "gpt-4o", "dee": "gpt-4o-mini", "eve": "gpt-4o-mini"
+        }
+
+    def test_run_reports_cost_and_latency_saved(self, ranking_service, resume_dir):
+        ranking_service.process_resumes(resume_dir, "jd", parse_workers=0)
+
+        cascade = ranking_service.last_run_cascade
+        assert (cascade["triaged"], cascade["rescored"]) == (5, 3)
+        # 5 triage + 3 strong calls against 5 strong calls
+        assert cascade["cost_without_cascade"] == pytest.approx(5 * (1000 * 2.5 + 100 * 10) / 1e6, abs=1e-4)
+        assert cascade["cost_saved"] > 0
+        assert cascade["latency_without_cascade"] == 10.0
+        assert cascade["latency_saved"] == 10.0 - (5 * 1.0 + 3 * 2.0)
+        assert ranking_service.last_run_usage["calls"] == 8
+
+    def test_async_runs_use_the_cascade(self, ranking_service, resume_dir):
+        for service in (ranking_service.llm_service, ranking_service.triage_service):
+            service.analyze_resume_async = AsyncMock(side_effect=service.analyze_resume.side_effect)
+
+        df = asyncio.run(ranking_service.process_resumes_async(resume_dir, "jd", parse_workers=0))
+
+        rescored = {call.args[0] for call in ranking_service.llm_service.analyze_resume_async.call_args_list}
+        assert rescored == {"ana", "ben", "cal"}
+        assert ranking_service.triage_service.analyze_resume_async.call_count == 5
+        assert list(df["name"]) == ["ben", "ana", "cal", "dee", "eve"]
+
+    def test_small_runs_rescore_everything(self, ranking_service, resume_dir):
+        ranking_service.cascade_top_n = 5
+        df = ranking_service.process_resumes(resume_dir, "jd", parse_workers=0)
+
+        assert set(df["scored_by"]) == {"gpt-4o"}
+        # Everyone would be in the band, so triage calls would only add cost
+        ranking_service.triage_service.analyze_resume.assert_not_called()
+        assert ranking_service.llm_service.analyze_resume.call_count == 5
+        cascade = ranking_service.last_run_cascade
+        assert (cascade["triaged"], cascade["rescored"], cascade["cost_saved"]) == (0, 5, 0)
+
+
+class TestFallbackBatching:
+    @pytest.fixture
+    def ranking_service(self, make_ranking_service):
+        # PyPDF finds no text in scanned PDFs
+        service = make_ranking_service(
+            parse=lambda path: "" if "scan" in path else os.path.basename(path), parser_used="PyPDF2",
+            analyze=lambda text: make_analysis(text, 50)
+        )
+        service.resume_parser.parse_fallback.side_effect = lambda paths: {
+            path: {"content": os.path.basename(path), "parser_used": "LlamaParse"} for path in paths
+        }
+        return service
+
+    @pytest.fixture
+    def resume_dir(self, tmp_path):
+        for name in ("text_1.pdf", "scan_1.pdf", "text_2.pdf", "scan_2.pdf", "scan_3.pdf"):
+            (tmp_path / name).write_bytes(b"%PDF")
+        return str(tmp_path)
+
+    def test_pipeline_sends_pypdf_failures_as_one_batch(self, ranking_service, resume_dir):
+        df = ranking_service.process_resumes(resume_dir, "jd", parse_workers=0)
+
+        ranking_service.resume_parser.parse_fallback.assert_called_once()
+        batch = ranking_service.resume_parser.parse_fallback.call_args.args[0]
+        assert sorted(os.path.basename(path) for path in batch) == ["scan_1.pdf", "scan_2.pdf", "scan_3.pdf"]
+        assert len(df) == 5
+
+    def test_fallback_failure_does_not_stall_the_run(self, ranking_service, resume_dir):
+        ranking_service.resume_parser.parse_fallback.side_effect = RuntimeError("LlamaParse is down")
+        progress = []
+
+        results = list(ranking_service.iter_resumes(
+            resume_dir, "jd", progress_callback=lambda done, total: progress.append((done, total)),
+            parse_workers=0
+        ))
+
+        assert sorted(result["File"] for result in results) == ["text_1.pdf", "text_2.pdf"]
+        assert progress[-1] == (5, 5)
+
+    def test_parse_all_batches_fallbacks(self, ranking_service, resume_dir):
+        texts = ranking_service._parse_all(ranking_service._find_resume_files(resume_dir), parse_workers=0)
+
+        ranking_service.resume_parser.parse_fallback.assert_called_once()
+        assert len(texts) == 5
+
+
+class TestDeduplication:
+    ORIGINAL = " ".join(f"skill{i}" for i in range(200))
+    TEXTS = {
+        "ana.docx": ORIGINAL,
+        "ana_resubmitted.docx": ORIGINAL,
+        "ana_typo.docx": ORIGINAL.replace("skill7 ", "skil7 "),
+        "ben.docx": " ".join(f"other{i}" for i in range(200)),
+    }
+
+    @pytest.fixture
+    def ranking_service(self, make_ranking_service):
+        return make_ranking_service(
+            parse=lambda path: self.TEXTS[os.path.basename(path)],
+            analyze=lambda text: make_analysis(text[:5], 80 if text == self.ORIGINAL else 60),
+            dedupe=True
+        )
+
+    @pytest.fixture
+    def resume_dir(self, tmp_path):
+        for name in self.TEXTS:
+            (tmp_path / name).write_bytes(b"docx")
+        return str(tmp_path)
+
+    def test_each_cluster_is_evaluated_once(self, ranking_service, resume_dir):
+        progress = []
+        df = ranking_service.process_resumes(
+            resume_dir, "jd", progress_callback=lambda done, total: progress.append((done, total)),
+            parse_workers=0
+        )
+
+        assert ranking_service.llm_service.analyze_resume.call_count == 2
+        assert progress[-1] == (2, 2)
+        assert len(df) == 4
+        assert dict(zip(df["File"], df["duplicate_of"])) == {
+            "ana.docx": "", "ana_resubmitted.docx": "ana.docx", "ana_typo.docx": "ana.docx", "ben.docx": ""
+        }
+        assert set(df.loc[df["duplicate_of"] == "ana.docx", "total_score"]) == {80}
+        assert ranking_service.last_run_dedupe["duplicates"] == 2
+
+    def test_async_runs_evaluate_each_cluster_once(self, ranking_service, resume_dir):
+        ranking_service.llm_service.analyze_resume_async = AsyncMock(
+            side_effect=ranking_service.llm_service.analyze_resume.side_effect
+        )
+
+        df = asyncio.run(ranking_service.process_resumes_async(resume_dir, "jd", parse_workers=0))
+
+        assert ranking_service.llm_service.analyze_resume_async.call_count == 2
+        assert len(df) == 4
+        assert set(df.loc[df["duplicate_of"] == "ana.docx", "File"]) == {"ana_resubmitted.docx", "ana_typo.docx"}
+
+    def test_duplicates_are_journaled(self, ranking_service, resume_dir, tmp_path):
+        with patch('app.services.run_journal.Settings.RUN_JOURNAL_DIR', str(tmp_path / "runs")):
+            first = list(ranking_service.iter_resumes(resume_dir, "jd", parse_workers=0, run_id="dupes"))
+            ranking_service.llm_service.analyze_resume.reset_mock()
+            rerun = list(ranking_service.iter_resumes(resume_dir, "jd", parse_workers=0, run_id="dupes"))
+
+        ranking_service.llm_service.analyze_resume.assert_not_called()
+        assert sorted(row["File"] for row in rerun) == sorted(row["File"] for row in first)
+
+    def test_async_runs_read_the_journal_once(self, ranking_service, resume_dir, tmp_path):
+        ranking_service.llm_service.analyze_resume_async = AsyncMock(
+            side_effect=ranking_service.llm_service.analyze_resume.side_effect
+        )
+        with patch('app.services.run_journal.Settings.RUN_JOURNAL_DIR', str(tmp_path / "runs")), \
+                patch.object(RunJournal, 'completed', autospec=True, side_effect=RunJournal.completed) as completed:
+            df = asyncio.run(ranking_service.process_resumes_async(
+                resume_dir, "jd", parse_workers=0, run_id="dupes"
+            ))
+
+        assert len(df) == 4
+        # One read to replay the run and one for the duplicate copies, whatever the number of results
+        assert completed.call_count == 2
+
+    def test_template_resumes_keep_their_own_identity(self, ranking_service, tmp_path):
+        texts = {
+            "ana.docx": f"Ana Silva ana@example.com {self.ORIGINAL}",
+            "ben.docx": f"Ben Okafor ben@example.com {self.ORIGINAL}",
+        }
+        for name in texts:
+            (tmp_path / name).write_bytes(b"docx")
+        ranking_service.resume_parser.parse.side_effect = lambda path: {
+            "content": texts[os.path.basename(path)], "parser_used": "docx2txt"
+        }
+        ranking_service.llm_service.analyze_resume.side_effect = (
+            lambda text, *args, **kwargs: make_analysis(text.split()[0], 80)
+        )
+
+        df = ranking_service.process_resumes(str(tmp_path), "jd", parse_workers=0)
+
+        assert ranking_service.llm_service.analyze_resume.call_count == 2
+        assert dict(zip(df["File"], df["name"])) == {"ana.docx": "Ana", "ben.docx": "Ben"}
+        assert set(df["duplicate_of"]) == {""}
+
+    def test_disabled_by_default(self, make_ranking_service):
+        assert make_ranking_service().deduplicator is None
+
+
+class TestInMemoryDocuments:
+    @pytest.fixture
+    def ranking_service(self, make_ranking_service):
+        service = make_ranking_service(analyze=lambda text: make_analysis(text, 70))
+        service.resume_parser.parse_bytes.side_effect = lambda name, data: {
+            "content": "" if name.startswith("scan") else bytes(data).decode(), "parser_used": "PyPDF2"
+        }
+        service.resume_parser.parse_fallback_bytes.side_effect = lambda documents: {
+            name: {"content": bytes(data).decode(), "parser_used": "LlamaParse"} for name, data in documents.items()
+        }
+        return service
+
+    @pytest.fixture
+    def documents(self):
+        return [
+            ("jane.pdf", memoryview(b"Jane")),
+            ("john.docx", b"John"),
+            ("scan_ana.pdf", memoryview(b"Ana")),
+            ("notes.txt", b"not a resume"),
+        ]
+
+    def test_scores_documents_without_touching_disk(self, ranking_service, documents):
+        with patch('app.services.ranking_service.glob.glob') as mock_glob:
+            df = ranking_service.process_documents(documents, "jd", parse_workers=0)
+
+        mock_glob.assert_not_called()
+        assert sorted(df["File"]) == ["jane.pdf", "john.docx", "scan_ana.pdf"]
+        assert sorted(df["name"]) == ["Ana", "Jane", "John"]
+        # PDFs PyPDF cannot read go to LlamaParse as one in-memory batch
+        ranking_service.resume_parser.parse_fallback_bytes.assert_called_once()
+
+    def test_first_result_arrives_before_every_document_is_parsed(self, ranking_service):
+        first_result = threading.Event()
+        parse = ranking_service.resume_parser.parse_bytes.side_effect
+
+        def parse_after_first_result(name, data):
+            if name == "last.pdf":
+                assert first_result.wait(timeout=5)
+            return parse(name, data)
+        ranking_service.resume_parser.parse_bytes.side_effect = parse_after_first_result
+
+        stream = ranking_service.iter_documents([("first.pdf", b"First"), ("last.pdf", b"Last")], "jd",
+                                                parse_workers=0)
+        assert next(stream)["name"] == "First"
+        first_result.set()
+        assert next(stream)["name"] == "Last"
+
+    def test_skip_files_and_progress(self, ranking_service, documents):
+        progress = []
+        results = list(ranking_service.iter_documents(
+            documents, "jd", progress_callback=lambda done, total: progress.append((done, total)),
+            parse_workers=0, skip_files={"jane.pdf"}
+        ))
+
+        assert sorted(result["File"] for result in results) == ["john.docx", "scan_ana.pdf"]
+        assert progress[-1] == (2, 2)
+
+    def test_example_documents_are_passed_to_the_llm_service(self, ranking_service, documents):
+        ranking_service.example_good_documents = [("star.pdf", b"Star")]
+        list(ranking_service.iter_documents(documents[:1], "jd", parse_workers=0))
+
+        ranking_service.llm_service.analyze_example_resumes.assert_called_once_with(
+            good_resumes_dir=None, job_description="jd", good_resumes=[("star.pdf", b"Star")],
+            force_refresh=False
+        )
+
+    def test_per_run_settings_do_not_change_the_service(self, ranking_service, documents):
+        weights = {"skills_match": 1.0}
+        ranking_service.llm_service.analyze_example_resumes.return_value = ["Led migrations"]
+        results = list(ranking_service.iter_documents(
+            documents[:2], "jd", parse_workers=0, scoring_weights=weights,
+            ranking_priority=["experience"], force_rescore=True,
+            example_good_documents=[("star.pdf", b"Star")]
+        ))
+
+        assert len(results) == 2
+        for call in ranking_service.llm_service.analyze_resume.call_args_list:
+            run = call.kwargs["run"]
+            assert (run.job_description, run.scoring_weights, run.ranking_priority) == ("jd", weights, ["experience"])
+            assert run.good_characteristics == ("Led migrations",)
+            assert run.force_refresh is True
+        ranking_service.llm_service.analyze_example_resumes.assert_called_once_with(
+            good_resumes_dir=None, job_description="jd", good_resumes=[("star.pdf", b"Star")],
+            force_refresh=True
+        )
+        assert ranking_service.scoring_weights is not weights
+        assert ranking_service.force_rescore is False
+        assert ranking_service.example_good_documents is None
+
+    def test_rank_results_uses_the_runs_priority(self, ranking_service):
+        a = ranking_service._build_result("a.pdf", make_analysis("A", 80), 0.0)
+        b = ranking_service._build_result("b.pdf", make_analysis("B", 80), 0.0)
+        results = [{**a, "skills_match": 90, "experience": 60}, {**b, "skills_match": 60, "experience": 90}]
+
+        assert list(ranking_service.rank_results(results, ["experience"])["name"]) == ["B", "A"]
+        assert list(ranking_service.rank_results(results, ["skills_match"])["name"]) == ["A", "B"]
@@ -0,0 +1,158 @@
+import pytest
+import asyncio
+import threading
+import httpx
+import openai
+from unittest.mock import patch
+from langchain_core.runnables import RunnableLambda
+from app.services.rate_limiter import RateLimiter, AdaptiveConcurrencyLimiter, backoff_delay
+
+ANALYSIS_JSON = '```json\n{"information": {"name": "Jane"}, "evaluation": {"total_score": 70}}\n```'
+
+
+def rate_limit_error(retry_after=None):
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://api.openai.com/v1"))
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+class TestRateLimiter:
+    def test_requests_within_budget_do_not_wait(self):
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=6000)
+        assert limiter.reserve(1000) == 0
+        assert limiter.reserve(1000) == 0
+
+    def test_token_budget_delays_large_requests(self):
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=6000)
+        assert limiter.reserve(6000) == 0
+        # 3000 tokens at 100 tokens/s
+        assert limiter.reserve(3000) == pytest.approx(30, abs=0.1)
+
+    def test_request_budget_delays_bursts(self):
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=10**6)
+        for _ in range(60):
+            assert limiter.reserve(1) == 0
+        assert limiter.reserve(1) == pytest.approx(1, abs=0.05)
+
+    def test_drain_blocks_all_callers(self):
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+        limiter.drain(2)
+        assert limiter.reserve(1) >= 2
+
+    def test_backoff_honours_retry_after(self):
+        with patch('app.services.rate_limiter.random.uniform', return_value=0.1):
+            assert backoff_delay(0, retry_after=3) == 3
+            assert backoff_delay(0) == 0.1
+
+
+class TestAdaptiveConcurrencyLimiter:
+    def test_rate_limit_halves_limit_once_per_cooldown(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16, decrease_cooldown=60)
+        limiter.on_rate_limited()
+        limiter.on_rate_limited()
+        assert limiter.limit == 8
+
+    def test_success_grows_limit_additively(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=5)
+        for _ in range(5):
+            limiter.on_success(0.1)
+        assert limiter.limit == 5
+        for _ in range(20):
+            limiter.on_success(0.1)
+        assert limiter.limit == 5
+
+    def test_slow_responses_shrink_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10, latency_target=1.0)
+        limiter.on_success(5.0)
+        assert limiter.limit == 5
+
+    def test_acquire_blocks_at_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not acquired.wait(0.1)
+        limiter.release()
+        assert acquired.wait(1)
+        thread.join()
+
+    def test_async_waiters_are_woken_on_release(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        peak = 0
+
+        async def task():
+            nonlocal peak
+            async with limiter.slot_async():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*(task() for _ in range(10)))
+
+        asyncio.run(run())
+        assert peak == 2
+        assert limiter.in_flight == 0
+
+
+class TestLLMServiceRetries:
+    @pytest.fixture
+    def llm_service(self, make_llm_service):
+        service = make_llm_service()
+        service.rate_limiter = RateLimiter(requests_per_minute=10**6, tokens_per_minute=10**9)
+        service.concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=8, decrease_cooldown=0)
+        return service
+
+    @pytest.fixture(autouse=True)
+    def fast_backoff(self):
+        with patch('app.services.llm_service.backoff_delay', return_value=0.0):
+            yield
+
+    def test_rate_limited_calls_are_retried(self, llm_service):
+        errors = [rate_limit_error(), rate_limit_error()]
+
+        def flaky(prompt):
+            if errors:
+                raise errors.pop()
+            return ANALYSIS_JSON
+
+        llm_service.llm = RunnableLambda(flaky)
+        result = llm_service.analyze_resume("resume", "jd", {"skills_match": 1.0}, ["skills_match"])
+
+        assert result["evaluation"]["total_score"] == 70
+        assert llm_service.concurrency_limiter.limit == 2
+
+    def test_exhausted_retries_return_error_response(self, llm_service):
+        def always_limited(prompt):
+            raise rate_limit_error()
+
+        llm_service.llm = RunnableLambda(always_limited)
+        with patch('app.services.llm_service.Settings.LLM_MAX_RETRIES', 2):
+            result = llm_service.analyze_resume("resume", "jd", {"skills_match": 1.0}, ["skills_match"])
+
+        assert result["evaluation"]["total_score"] == 0
+
+    def test_async_calls_are_retried(self, llm_service):
+        errors = [rate_limit_error()]
+
+        def flaky(prompt):
+            if errors:
+                raise errors.pop()
+            return ANALYSIS_JSON
+
+        llm_service.llm = RunnableLambda(flaky)
+        result = asyncio.run(llm_service.analyze_resume_async("resume", "jd", {"skills_match": 1.0}, []))
+        assert result["information"]["name"] == "Jane"
+
+    def test_requests_reserve_estimated_tokens(self, llm_service):
+        llm_service.llm = RunnableLambda(lambda prompt: ANALYSIS_JSON)
+        with patch.object(llm_service.rate_limiter, 'acquire', wraps=llm_service.rate_limiter.acquire) as acquire:
+            llm_service.analyze_resume("resume " * 200, "jd", {"skills_match": 1.0}, [])
+
+        estimated_tokens = acquire.call_args[0][0]
+        assert estimated_tokens > 200
@@ -0,0 +1,131 @@
+import pytest
+import os
+import time
+from unittest.mock import patch
+from app.services.llm_service import LLMService
+from app.services.run_journal import open_run_journal, prune_run_journals, run_metadata
+from tests.conftest import make_analysis
+
+METADATA = run_metadata("gpt-4o", "Python engineer", {"skills_match": 1.0}, ["skills_match"])
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path):
+    directory = tmp_path / "runs"
+    with patch('app.services.run_journal.Settings.RUN_JOURNAL_DIR', str(directory)):
+        yield directory
+
+
+class TestRunJournal:
+    def test_results_survive_reopen(self):
+        journal = open_run_journal("nightly", METADATA)
+        journal.record("a.pdf", {"name": "Jane", "total_score": 80})
+        journal.close()
+
+        reopened = open_run_journal("nightly", METADATA)
+        assert reopened.completed() == {"a.pdf": {"name": "Jane", "total_score": 80}}
+        reopened.close()
+
+    def test_partial_last_line_is_ignored(self, journal_dir):
+        journal = open_run_journal("crashed", METADATA)
+        journal.record("a.pdf", {"name": "Jane"})
+        journal.close()
+        with open(journal_dir / "crashed.jsonl", "a") as journal_file:
+            journal_file.write('{"type": "result", "file": "b.pdf", "res')
+
+        reopened = open_run_journal("crashed", METADATA)
+        reopened.record("c.pdf", {"name": "Ana"})
+        reopened.close()
+
+        assert set(open_run_journal("crashed", METADATA).completed()) == {"a.pdf", "c.pdf"}
+
+    def test_different_inputs_are_rejected(self):
+        open_run_journal("nightly", METADATA).close()
+        changed = run_metadata("gpt-4o", "Data analyst", {"skills_match": 1.0}, ["skills_match"])
+
+        with pytest.raises(ValueError, match="job_description"):
+            open_run_journal("nightly", changed)
+
+    def test_different_example_characteristics_are_rejected(self):
+        open_run_journal("nightly", METADATA).close()
+        changed = run_metadata("gpt-4o", "Python engineer", {"skills_match": 1.0}, ["skills_match"],
+                               ["Led a data platform team"])
+
+        with pytest.raises(ValueError, match="good_characteristics"):
+            open_run_journal("nightly", changed)
+
+    def test_invalid_run_id(self):
+        with pytest.raises(ValueError):
+            open_run_journal("../escape", METADATA)
+
+    def test_prune_removes_stale_journals(self, journal_dir):
+        open_run_journal("old", METADATA).close()
+        open_run_journal("new", METADATA).close()
+        stale = time.time() - 3600
+        os.utime(journal_dir / "old.jsonl", (stale, stale))
+
+        assert prune_run_journals(max_age_seconds=60) == 1
+        assert os.listdir(journal_dir) == ["new.jsonl"]
+
+
+class TestResumableRuns:
+    @pytest.fixture
+    def make_service(self, make_ranking_service):
+        return lambda: make_ranking_service(
+            parse=lambda path: "" if path.endswith("bad.docx") else os.path.basename(path),
+            analyze=lambda text: make_analysis(text, float(text[10:12]))
+        )
+
+    @pytest.fixture
+    def resume_dir(self, tmp_path):
+        directory = tmp_path / "resumes"
+        directory.mkdir()
+        for i in range(5):
+            (directory / f"candidate_{i:02d}.docx").write_bytes(b"docx")
+        (directory / "bad.docx").write_bytes(b"docx")
+        return str(directory)
+
+    def test_rerun_skips_finished_files(self, make_service, resume_dir):
+        first = make_service()
+        stream = first.iter_resumes(resume_dir, "jd", parse_workers=0, llm_workers=1, run_id="batch-1")
+        done = [next(stream)["name"], next(stream)["name"]]
+        stream.close()
+
+        second = make_service()
+        progress = []
+        df = second.process_resumes(
+            resume_dir, "jd", parse_workers=0, run_id="batch-1",
+            progress_callback=lambda completed, total: progress.append((completed, total))
+        )
+
+        assert len(df) == 5
+        analyzed = {call.args[0] for call in second.llm_service.analyze_resume.call_args_list}
+        assert analyzed.isdisjoint(done)
+        assert len(analyzed) == 3
+        assert progress[-1] == (6, 6)
+
+    def test_force_rescore_ignores_journal(self, make_service, resume_dir):
+        make_service().process_resumes(resume_dir, "jd", parse_workers=0, run_id="batch-2")
+
+        service = make_service()
+        service.force_rescore = True
+        df = service.process_resumes(resume_dir, "jd", parse_workers=0, run_id="batch-2")
+
+        assert len(df) == 5
+        assert service.llm_service.analyze_resume.call_count == 5
+
+    def test_failed_evaluations_are_retried_on_rerun(self, make_service, resume_dir):
+        first = make_service()
+        first.llm_service.analyze_resume.side_effect = lambda text, *args, **kwargs: (
+            LLMService._generate_error_response(None) if text == "candidate_01.docx"
+            else make_analysis(text, float(text[10:12]))
+        )
+        first_df = first.process_resumes(resume_dir, "jd", parse_workers=0, run_id="batch-3")
+        assert first_df.loc[first_df["File"] == "candidate_01.docx", "total_score"].item() == 0
+
+        second = make_service()
+        df = second.process_resumes(resume_dir, "jd", parse_workers=0, run_id="batch-3")
+
+        analyzed = [call.args[0] for call in second.llm_service.analyze_resume.call_args_list]
+        assert analyzed == ["candidate_01.docx"]
+        assert df.loc[df["File"] == "candidate_01.docx", "total_score"].item() == 1
@@ -0,0 +1,106 @@
+import pytest
+from app.utils.text_normalizer import ResumeNormalizer, normalize_resume_text
+from app.utils.tokens import count_tokens, truncate_to_tokens
+
+
+PAGE = """Jane Doe | jane@example.com | +1 555 0100
+Senior   Data\tEngineer
+
+Built stream pro-
+cessing pipelines in Python.
+Page {n} of 3
+"""
+
+
+class TestNormalizeResumeText:
+    def test_collapses_whitespace_and_blank_lines(self):
+        text = "Skills:   Python,\t SQL \n\n\n\n  Experience  \r\n"
+        assert normalize_resume_text(text) == "Skills: Python, SQL\n\nExperience"
+
+    def test_rejoins_line_break_hyphenation(self):
+        assert normalize_resume_text("data engi-\nneering") == "data engineering"
+        # Real hyphenated terms before a capitalised line are kept
+        assert normalize_resume_text("Full-\nStack") == "Full-\nStack"
+
+    def test_drops_page_numbers_and_rules(self):
+        text = "- 1 -\nSummary\n________\n• • •\nPython 3 developer\nPage 1 of 2\f3/4\nSkills"
+        assert normalize_resume_text(text) == "Summary\nPython 3 developer\nSkills"
+
+    def test_keeps_one_copy_of_repeated_page_headers(self):
+        text = "\f".join(PAGE.format(n=n) for n in range(1, 4))
+        normalized = normalize_resume_text(text)
+        assert normalized.count("Jane Doe | jane@example.com | +1 555 0100") == 1
+        assert normalized.count("Senior Data Engineer") == 1
+        assert "Page" not in normalized
+        assert "processing" in normalized
+
+    def test_repeated_role_titles_and_locations_are_kept(self):
+        role = "Software Engineer\nBangalore, India\n{company}\nBuilt services in Python.\n100\n"
+        body = "Jane Doe\n" + "".join(role.format(company=f"Company {n}") for n in range(1, 4)) + "Education\nBSc"
+
+        for text in (body, body.replace("Company 2", "Company 2\f")):
+            normalized = normalize_resume_text(text)
+            assert normalized.count("Software Engineer") == 3
+            assert normalized.count("Bangalore, India") == 3
+            # Standalone numbers inside a page are content, not page numbers
+            assert normalized.count("\n100\n") == 3
+
+    def test_page_numbers_are_only_dropped_at_page_edges(self):
+        text = "3\nJane Doe\nDelivered\n42\nfeatures\nPage 1 of 2\fProjects\n7\nshipped\n- 2 -"
+        assert normalize_resume_text(text) == "Jane Doe\nDelivered\n42\nfeatures\nProjects\n7\nshipped"
+
+    def test_repeated_section_labels_are_kept(self):
+        text = "\n".join(["Responsibilities:", "Led a team"] * 3)
+        assert normalize_resume_text(text).count("Responsibilities:") == 3
+
+    def test_strips_invisible_and_control_characters(self):
+        text = "Py\u00adthon\u200b dev\x00eloper\ufeff"
+        assert normalize_resume_text(text) == "Python dev eloper"
+
+    def test_empty_text(self):
+        assert normalize_resume_text("") == ""
+
+
+class TestTruncateToTokens:
+    def test_short_text_is_unchanged(self):
+        assert truncate_to_tokens("short text", 100) == "short text"
+
+    def test_long_text_fits_budget(self):
+        text = "\n".join(f"line {i} with some words in it" for i in range(500))
+        truncated = truncate_to_tokens(text, 200)
+        assert count_tokens(truncated) <= 200
+        assert text.startswith(truncated)
+        assert truncated.endswith("in it")
+
+
+class TestResumeNormalizer:
+    def test_reports_tokens_saved(self):
+        normalizer = ResumeNormalizer(max_tokens=0)
+        snapshot = normalizer.snapshot()
+        text = "\f".join(PAGE.format(n=n) for n in range(1, 4))
+
+        normalized = normalizer.normalize(text)
+
+        stats = normalizer.since(snapshot)
+        assert stats["resumes"] == 1
+        assert stats["tokens_before"] == count_tokens(text)
+        assert stats["tokens_after"] == count_tokens(normalized)
+        assert stats["tokens_saved"] > 0
+        assert stats["avg_tokens_saved"] == stats["tokens_saved"]
+        assert stats["truncated"] == 0
+
+    def test_enforces_token_budget(self):
+        normalizer = ResumeNormalizer(max_tokens=50)
+        text = "\n".join(f"Project {i}: shipped a distinct feature" for i in range(200))
+
+        normalized = normalizer.normalize(text)
+
+        assert count_tokens(normalized) <= 50
+        assert normalizer.snapshot()["truncated"] == 1
+
+    @pytest.mark.parametrize("snapshot", [{}, {"resumes": 0, "tokens_before": 0, "tokens_after": 0, "truncated": 0}])
+    def test_since_with_no_resumes(self, snapshot):
+        stats = ResumeNormalizer().since(snapshot)
+        assert stats["tokens_saved"] == 0
+        assert stats["saved_ratio"] == 0.0
+        assert stats["avg_tokens_saved"] == 0.0